@@ -0,0 +1,157 @@
+import argparse
+import logging
+import multiprocessing
+import time
+from typing import List, Optional
+
+from aspose_excel_to_pdf import LOAD_PROFILES, excel_to_pdf_aspose, start_jvm
+from batch_jobs import BatchResult, collect_input_files, reject_output_name_collisions
+from conversion_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ConversionCache
+from conversion_metrics import current_rss_bytes
+from job_manifest import JobManifest
+from output_profiles import OUTPUT_PROFILES
+
+# ワーカープロセスごとのキャッシュ（_init_workerで設定）
+_cache: Optional[ConversionCache] = None
+_load_profile = "full"
+_incremental = False
+_output_profile = "default"
+
+def _init_worker(cache_dir: Optional[str], cache_max_bytes: int, load_profile: str = "full",
+                 incremental: bool = False, max_heap: Optional[str] = None, output_profile: str = "default") -> None:
+    """
+    ワーカープロセスの起動時に一度だけJVMを起動する（max_heap はJVMの最大ヒープサイズ、例: "2g"）
+    """
+    global _cache, _load_profile, _incremental, _output_profile
+    _load_profile = load_profile
+    _incremental = incremental
+    _output_profile = output_profile
+    if cache_dir:
+        _cache = ConversionCache(cache_dir, cache_max_bytes)
+    start_jvm(max_heap)
+
+def _convert_one(excel_file: str) -> BatchResult:
+    start_time = time.perf_counter()
+    hits_before = _cache.hits if _cache else 0
+    try:
+        output_pdf = excel_to_pdf_aspose(excel_file, cache=_cache, load_profile=_load_profile, incremental=_incremental,
+                                         output_profile=_output_profile)
+        error = None if output_pdf else "PDFが作成されませんでした"
+    except Exception as e:
+        output_pdf = None
+        error = str(e)
+    cached = _cache is not None and _cache.hits > hits_before
+    return BatchResult(excel_file, output_pdf, time.perf_counter() - start_time, error, cached)
+
+def _pipe_worker_main(conn, cache_dir: Optional[str], cache_max_bytes: int) -> None:
+    """
+    SpireWorkerPool（worker_main）用のワーカー: JVMを一度だけ起動し、親から受け取ったファイルを1件ずつ変換する
+    """
+    _init_worker(cache_dir, cache_max_bytes)
+    while True:
+        try:
+            excel_file = conn.recv()
+        except EOFError:
+            break
+        if excel_file is None:
+            break
+        result = _convert_one(excel_file)
+        conn.send((result.output_pdf, result.error, result.cached, current_rss_bytes()))
+
+def convert_batch(source: str, workers: Optional[int] = None, cache_dir: Optional[str] = None,
+                  cache_max_bytes: int = DEFAULT_MAX_BYTES, load_profile: str = "full",
+                  incremental: bool = False, max_heap: Optional[str] = None,
+                  output_profile: str = "default", manifest_path: Optional[str] = None) -> List[BatchResult]:
+    """
+    Converts every Excel file matched by `source` with Aspose.Cells on a pool of worker processes.
+    各ワーカーは起動時にJVMを一度だけ起動し、以降の変換で使い回します。
+    cache_dir を指定すると、前回から内容が変わっていないファイルはキャッシュ済みPDFを使います。
+    load_profile="lean" では、PDFに描画されない部分（VBA、ピボットテーブルなど）を読み込みません。
+    incremental=True では、前回から変更されたシートだけを描画します（シートごとの断片は cache_dir に保存）。
+    max_heap で各ワーカーのJVMの最大ヒープサイズを指定すると、1ノードで同時に動かすワーカー数を見積もりやすくなります。
+    output_profile（fast / min-size / archive）で出力するPDFの最適化・圧縮・準拠規格を選べます。
+    manifest_path を指定すると各ファイルの結果をSQLiteのジョブ記録に残し、再実行時は成功済みのファイルを飛ばして
+    失敗したファイルと中断時に未完了だったファイルだけを変換します。
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    excel_files = collect_input_files(source)
+    if not excel_files:
+        print(f"'{source}' に一致するExcelファイルが見つかりません。")
+        return []
+    excel_files, rejected = reject_output_name_collisions(excel_files)
+    for result in rejected:
+        print(f"[失敗] {result.excel_file}: {result.error}")
+    if not excel_files:
+        return rejected
+
+    manifest = None
+    if manifest_path:
+        manifest = JobManifest(manifest_path, "aspose", {"load_profile": load_profile, "incremental": incremental,
+                                                         "output_profile": output_profile})
+        excel_files = manifest.resume(excel_files)
+        if not excel_files:
+            print("すべてのファイルが変換済みです。")
+            manifest.close()
+            return rejected
+
+    workers = workers or multiprocessing.cpu_count()
+    print(f"{len(excel_files)}個のファイルを{workers}プロセスで変換します...")
+
+    results = []
+    start_time = time.perf_counter()
+    # JVMはforkに対応していないため、ワーカーはspawnで起動する
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=workers, initializer=_init_worker, initargs=(cache_dir, cache_max_bytes, load_profile, incremental, max_heap, output_profile)) as pool:
+        for result in pool.imap_unordered(_convert_one, excel_files):
+            results.append(result)
+            if manifest is not None:
+                manifest.record(result)
+            if result.ok:
+                source_label = "キャッシュ" if result.cached else "変換"
+                print(f"[成功] {result.excel_file} -> {result.output_pdf} ({source_label}, {result.duration:.2f}秒)")
+            else:
+                print(f"[失敗] {result.excel_file}: {result.error} ({result.duration:.2f}秒)")
+                logger.error(f"変換に失敗しました: {result.excel_file}: {result.error}")
+    total_duration = time.perf_counter() - start_time
+    results = rejected + results
+
+    succeeded = sum(1 for result in results if result.ok)
+    throughput = (len(results) - len(rejected)) / total_duration if total_duration > 0 else 0.0
+    print(f"\n成功: {succeeded}件, 失敗: {len(results) - succeeded}件")
+    if cache_dir:
+        hits = sum(1 for result in results if result.cached)
+        print(f"キャッシュ: ヒット {hits}件, ミス {len(results) - len(rejected) - hits}件")
+    print(f"総処理時間: {total_duration:.2f}秒, スループット: {throughput:.2f}ファイル/秒")
+    if manifest is not None:
+        print(f"ジョブ記録: {manifest.summary()}")
+        manifest.close()
+    return results
+
+if __name__ == "__main__":
+    import sys
+
+    parser = argparse.ArgumentParser(description="Excelファイルを一括でPDFに変換します（Aspose.Cells）")
+    parser.add_argument("source", nargs="?", default="input", help="入力ディレクトリまたはglobパターン（既定: input）")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="ワーカープロセス数（既定: CPUコア数）")
+    parser.add_argument("--cache-dir", default=None, help="変換結果キャッシュのディレクトリ（省略時はキャッシュしない）")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="キャッシュの最大サイズ（MB）")
+    parser.add_argument("--load-profile", choices=LOAD_PROFILES, default="full",
+                        help="読み込みプロファイル（lean: VBA・ピボットテーブルなどPDFに不要な部分を読み込まない、"
+                             "low_memory: さらにセルデータをメモリ優先で保持する）")
+    parser.add_argument("--jvm-heap", default=None,
+                        help="ワーカーごとのJVMの最大ヒープサイズ（例: 2g、省略時は EXCEL_CONVERTER_JVM_HEAP またはJVMの既定値）")
+    parser.add_argument("--output-profile", choices=OUTPUT_PROFILES, default="default",
+                        help="出力プロファイル（fast: 速度優先、min-size: サイズ優先、archive: PDF/A）")
+    parser.add_argument("--incremental", action="store_true",
+                        help="前回から変更されたシートだけを描画する（--cache-dir 省略時は cache に断片を保存）")
+    parser.add_argument("--manifest", default=None,
+                        help="ジョブ記録（SQLite）のパス。指定すると再実行時に成功済みのファイルを飛ばす")
+    args = parser.parse_args()
+
+    cache_dir = args.cache_dir or (DEFAULT_CACHE_DIR if args.incremental else None)
+    results = convert_batch(args.source, args.workers, cache_dir, args.cache_max_mb * 1024 * 1024, args.load_profile,
+                            args.incremental, args.jvm_heap, args.output_profile, args.manifest)
+    # ジョブ記録を使う場合、変換するファイルが残っていないのは正常終了
+    sys.exit(0 if (results or args.manifest) and all(result.ok for result in results) else 1)
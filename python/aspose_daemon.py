@@ -0,0 +1,185 @@
+import argparse
+import contextlib
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from aspose import cells
+from aspose_excel_to_pdf import excel_to_pdf_aspose, start_jvm
+
+class ConverterDaemon:
+    """
+    Keeps the JVM and the Aspose.Cells classes warm and serves conversion requests.
+    JVMの起動とクラスの読み込みは起動時に一度だけ行います。
+
+    リクエスト（1行1JSON）:
+      {"id": 1, "excel_file": "input/a.xlsx"}
+      {"id": 2, "command": "stats"}
+    レスポンス:
+      {"id": 1, "ok": true, "output_pdf": "output/a_aspose.pdf", "duration": 0.12}
+    """
+
+    def __init__(self, warmup: bool = True):
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.failures = 0
+        self.total_job_duration = 0.0
+
+        start_time = time.perf_counter()
+        start_jvm()
+        self.jvm_startup_duration = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        if warmup:
+            self._warmup()
+        self.warmup_duration = time.perf_counter() - start_time
+
+    def _warmup(self) -> None:
+        """
+        小さなワークブックを一度PDFに変換し、読み込み・描画に使うクラスをロードしておく
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            workbook = cells.Workbook()
+            workbook.worksheets[0].cells.get("A1").put_value("warmup")
+            warmup_xlsx = str(Path(temp_dir) / "warmup.xlsx")
+            workbook.save(warmup_xlsx)
+            cells.Workbook(warmup_xlsx).save(str(Path(temp_dir) / "warmup.pdf"), cells.PdfSaveOptions())
+
+    def stats(self) -> dict:
+        """
+        Returns the measured warm latency and an estimated cold latency.
+        estimated_cold_latency は実測値ではなく、別プロセスで1件ずつ変換した場合を
+        JVM起動＋ウォームアップ＋平均変換時間として見積もった値です（プロセスの起動やモジュールの読み込みは含みません）。
+        """
+        warm_latency = self.total_job_duration / self.jobs if self.jobs else None
+        estimated_cold_latency = None
+        if warm_latency is not None:
+            estimated_cold_latency = self.jvm_startup_duration + self.warmup_duration + warm_latency
+        return {
+            "jobs": self.jobs,
+            "failures": self.failures,
+            "jvm_startup_duration": self.jvm_startup_duration,
+            "warmup_duration": self.warmup_duration,
+            "warm_latency": warm_latency,
+            "estimated_cold_latency": estimated_cold_latency,
+        }
+
+    def handle(self, request: dict) -> dict:
+        """
+        1件のリクエストを処理してレスポンスを返す
+        """
+        response = {"id": request.get("id")}
+        if request.get("command") == "stats":
+            response.update(ok=True, stats=self.stats())
+            return response
+
+        excel_file = request.get("excel_file")
+        if not excel_file:
+            response.update(ok=False, error="excel_file が指定されていません")
+            return response
+
+        with self._lock:
+            start_time = time.perf_counter()
+            try:
+                # 変換処理の出力がプロトコル（stdout）に混ざらないようにする
+                with contextlib.redirect_stdout(sys.stderr):
+                    output_pdf = excel_to_pdf_aspose(excel_file)
+                error = None if output_pdf else "PDFが作成されませんでした"
+            except Exception as e:
+                output_pdf = None
+                error = str(e)
+            duration = time.perf_counter() - start_time
+            self.jobs += 1
+            self.total_job_duration += duration
+            if error:
+                self.failures += 1
+
+        response.update(ok=error is None, output_pdf=output_pdf, duration=duration)
+        if error:
+            response["error"] = error
+        return response
+
+    def handle_line(self, line: str) -> str:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("リクエストはJSONオブジェクトである必要があります")
+            response = self.handle(request)
+        except ValueError as e:
+            response = {"id": None, "ok": False, "error": f"不正なリクエストです: {e}"}
+        return json.dumps(response, ensure_ascii=False)
+
+    def serve_stdio(self) -> None:
+        """
+        stdinからJSON Linesのリクエストを読み、stdoutにレスポンスを書き出す
+        """
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            sys.stdout.write(self.handle_line(line) + "\n")
+            sys.stdout.flush()
+
+    def serve_unix_socket(self, socket_path: str) -> None:
+        """
+        Unixドメインソケットで接続を待ち受け、接続ごとにJSON Linesのリクエストを処理する
+        """
+        daemon = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw_line in self.rfile:
+                    line = raw_line.decode("utf-8")
+                    if not line.strip():
+                        continue
+                    self.wfile.write((daemon.handle_line(line) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        with socketserver.ThreadingUnixStreamServer(socket_path, _Handler) as server:
+            server.daemon_threads = True
+            print(f"変換デーモンを起動しました: {socket_path}", file=sys.stderr)
+            try:
+                server.serve_forever()
+            finally:
+                os.unlink(socket_path)
+
+def request_conversion(socket_path: str, excel_file: str, request_id: Optional[int] = None) -> dict:
+    """
+    Sends one conversion request to a running daemon and returns its response.
+    """
+    request = {"id": request_id, "excel_file": excel_file}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        with client.makefile("rw", encoding="utf-8") as stream:
+            stream.write(json.dumps(request, ensure_ascii=False) + "\n")
+            stream.flush()
+            return json.loads(stream.readline())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JVMを常駐させたAspose.Cells変換デーモン")
+    parser.add_argument("--socket", default=None, help="待ち受けるUnixソケットのパス（省略時はstdin/stdoutを使用）")
+    parser.add_argument("--no-warmup", action="store_true", help="起動時のウォームアップ変換を行わない")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+
+    daemon = ConverterDaemon(warmup=not args.no_warmup)
+    print(f"JVM起動時間: {daemon.jvm_startup_duration:.2f}秒, ウォームアップ時間: {daemon.warmup_duration:.2f}秒", file=sys.stderr)
+    try:
+        if args.socket:
+            daemon.serve_unix_socket(args.socket)
+        else:
+            daemon.serve_stdio()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"統計: {json.dumps(daemon.stats(), ensure_ascii=False)}", file=sys.stderr)
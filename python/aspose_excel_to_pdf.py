@@ -1,10 +1,374 @@
 import logging
+import os
+import tempfile
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import BinaryIO, List, Optional, Tuple, Union
 import jpype
 from aspose import cells
 from aspose.pydrawing import Color
+from conversion_cache import ConversionCache
+from conversion_metrics import ConversionMetrics, current_rss_bytes, pdf_page_count
+from incremental import render_incremental
+from multi_sheet import (PageRange, SheetSelection, merge_pdfs_with_bookmarks, render_parts_parallel,
+                         resolve_sheet_indices, split_cell_region, trim_pdf_pages)
+from output_profiles import MIN_SIZE_IMAGE_DPI, MIN_SIZE_JPEG_QUALITY, check_mergeable, check_output_profile
+from page_layout import first_sheet_layout, print_sheet_layout
+from stream_io import WorkbookSource, as_binary_stream, stream_metrics
+
+# JVMの最大ヒープサイズ（例: "4g"）と追加のJVMオプション。ワーカープロセスにも引き継がれる
+JVM_HEAP_ENV = "EXCEL_CONVERTER_JVM_HEAP"
+JVM_OPTIONS_ENV = "EXCEL_CONVERTER_JVM_OPTIONS"
+
+def jvm_options(max_heap: Optional[str] = None) -> List[str]:
+    """
+    Returns the JVM flags for the configured heap size and extra options.
+    max_heap を省略すると環境変数 EXCEL_CONVERTER_JVM_HEAP を使い、どちらもなければJVMの既定値（物理メモリの1/4）になります。
+    """
+    options = []
+    heap = max_heap or os.environ.get(JVM_HEAP_ENV)
+    if heap:
+        options.append(f"-Xmx{heap}")
+    options.extend(os.environ.get(JVM_OPTIONS_ENV, "").split())
+    return options
+
+def start_jvm(max_heap: Optional[str] = None) -> None:
+    """
+    Starts the JVM used by Aspose.Cells if it is not running yet.
+    プロセスごとに一度だけJVMを起動する（ヒープサイズは起動時にしか指定できない）
+    """
+    if not jpype.isJVMStarted():
+        jpype.startJVM(*jvm_options(max_heap))
+    elif max_heap:
+        logging.getLogger(__name__).warning(f"JVMは起動済みのため、最大ヒープサイズ {max_heap} は適用されません")
+
+def _heap_pools():
+    management = jpype.JClass("java.lang.management.ManagementFactory")
+    heap = jpype.JClass("java.lang.management.MemoryType").HEAP
+    return [pool for pool in management.getMemoryPoolMXBeans() if pool.getType() == heap]
+
+def track_peak_heap(metrics: ConversionMetrics) -> None:
+    """
+    Resets the JVM heap peak and records `peak_heap_bytes` / `max_heap_bytes` in the metrics when the conversion finishes.
+    ピーク値はヒープの各領域（Eden・Survivor・Old）のピークの合計で、実際の同時使用量の上限値です。
+    別のワーカープロセスで描画したシートの分は含みません。
+    """
+    try:
+        pools = _heap_pools()
+        for pool in pools:
+            pool.resetPeakUsage()
+        max_heap = int(jpype.JClass("java.lang.management.ManagementFactory").getMemoryMXBean().getHeapMemoryUsage().getMax())
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"ヒープ使用量を取得できません: {e}")
+        return
+
+    def record(metrics: ConversionMetrics) -> None:
+        metrics.extra["peak_heap_bytes"] = sum(int(pool.getPeakUsage().getUsed()) for pool in pools)
+        if max_heap > 0:
+            metrics.extra["max_heap_bytes"] = max_heap
+
+    metrics.on_finish(record)
+
+# 読み込みプロファイル: full はすべてを読み込み、lean はPDFに描画されない部分を読み飛ばし、
+# low_memory は lean に加えてセルデータをメモリ優先（MemorySetting.MEMORY_PREFERENCE）の形式で保持する
+LOAD_PROFILES = ("full", "lean", "low_memory")
+
+def build_load_options(profile: str = "full"):
+    """
+    Builds the LoadOptions for a load profile, or returns None to load the whole workbook.
+    lean ではVBAプロジェクト・ピボットテーブル・入力規則・XMLマップを読み込まず、数式も解析しません
+    （PDFにはファイルに保存済みの計算結果が描画されます）。図形・グラフ・条件付き書式・名前定義（印刷範囲）は描画に必要なため読み込みます。
+    low_memory では、さらにセルデータを速度よりメモリ使用量を優先した形式で読み込みます。
+    """
+    if profile not in LOAD_PROFILES:
+        raise ValueError(f"不明な読み込みプロファイルです: {profile}（利用可能: {', '.join(LOAD_PROFILES)}）")
+    if profile == "full":
+        return None
+
+    try:
+        skipped = (cells.LoadDataFilterOptions.VBA | cells.LoadDataFilterOptions.PIVOT_TABLE
+                   | cells.LoadDataFilterOptions.DATA_VALIDATION | cells.LoadDataFilterOptions.XML_MAP)
+        load_options = cells.LoadOptions()
+        load_options.load_filter = cells.LoadFilter(cells.LoadDataFilterOptions.ALL & ~skipped)
+        load_options.parsing_formula_on_open = False
+        if profile == "low_memory":
+            load_options.memory_setting = cells.MemorySetting.MEMORY_PREFERENCE
+        return load_options
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"読み込みオプションを設定できないため、すべて読み込みます: {e}")
+        return None
+
+def load_workbook(excel_file: Union[str, BinaryIO], profile: str = "full"):
+    """
+    Loads a workbook with the given load profile.
+    excel_file にはファイルパスのほか、読み込み可能なバイナリストリームも指定できます。
+    """
+    load_options = build_load_options(profile)
+    if load_options is None:
+        return cells.Workbook(excel_file)
+    workbook = cells.Workbook(excel_file, load_options)
+    if profile == "low_memory":
+        # 描画中に作られるセルのデータもメモリ優先の形式にする
+        workbook.settings.memory_setting = cells.MemorySetting.MEMORY_PREFERENCE
+    return workbook
+
+def _show_only_sheet(workbook, sheet_index: int) -> None:
+    """
+    指定したシート以外を非表示にして、そのシートだけがPDFに出力されるようにする
+    """
+    worksheets = workbook.worksheets
+    worksheets.active_sheet_index = sheet_index
+    for i in range(len(worksheets)):
+        worksheets[i].is_visible = i == sheet_index
+
+def apply_export_region(workbook, region: str):
+    """
+    Restricts the PDF output to a cell range or a named range (such as a print area) and returns its worksheet.
+    region にはセル範囲（"A1:F40"、"Sheet2!A1:F40"）または名前付き範囲（"Print_Area"、"Sheet1!Print_Area" など）を指定します。
+    シート名のないセル範囲は最初のシートを対象とし、他のシートは出力しません。
+    """
+    worksheets = workbook.worksheets
+    cell_region = split_cell_region(region)
+    if cell_region is None:
+        named_range = worksheets.get_range_by_name(region)
+        if named_range is None:
+            raise ValueError(f"名前付き範囲 '{region}' が見つかりません")
+        worksheet = named_range.worksheet
+        last_row = named_range.first_row + named_range.row_count - 1
+        last_column = named_range.first_column + named_range.column_count - 1
+        area = (f"{cells.CellsHelper.cell_index_to_name(named_range.first_row, named_range.first_column)}:"
+                f"{cells.CellsHelper.cell_index_to_name(last_row, last_column)}")
+    else:
+        sheet_name, area = cell_region
+        sheet_names = [worksheets[i].name for i in range(len(worksheets))]
+        if sheet_name is not None and sheet_name not in sheet_names:
+            raise ValueError(f"シート '{sheet_name}' が見つかりません")
+        worksheet = worksheets[sheet_names.index(sheet_name) if sheet_name is not None else 0]
+
+    worksheet.page_setup.print_area = area
+    _show_only_sheet(workbook, worksheet.index)
+    return worksheet
+
+def _render_aspose_sheet(task: Tuple[str, int, str, str, str]) -> str:
+    """
+    ワーカープロセスで1シートだけをPDFに保存する（他のシートを非表示にして保存する）
+    """
+    excel_file, sheet_index, part_pdf, load_profile, output_profile = task
+    workbook = load_workbook(excel_file, load_profile)
+    _show_only_sheet(workbook, sheet_index)
+    save_options = build_pdf_save_options(output_profile=output_profile)
+    if save_options is None:
+        workbook.save(part_pdf)
+    else:
+        workbook.save(part_pdf, save_options)
+    return part_pdf
+
+def _render_aspose_visible_sheet(task: Tuple[str, int, str, str, str]) -> Optional[str]:
+    """
+    ワーカープロセスで1シートだけをPDFに保存する。出力するページがないシートは None を返す
+    """
+    try:
+        return _render_aspose_sheet(task)
+    except Exception:
+        # 空のシートは保存時に失敗するため、失敗したときだけページ数を確かめて読み飛ばす
+        excel_file, sheet_index, _, load_profile, _ = task
+        worksheet = load_workbook(excel_file, load_profile).worksheets[sheet_index]
+        if cells.rendering.SheetRender(worksheet, cells.rendering.ImageOrPrintOptions()).page_count == 0:
+            return None
+        raise
+
+def save_sheets_aspose(workbook, excel_file: str, sheets: SheetSelection, output_pdf: str,
+                       workers: Optional[int] = None, load_profile: str = "full",
+                       output_profile: str = "default") -> Optional[str]:
+    """
+    Renders the selected sheets in parallel and merges them into one PDF with a bookmark per sheet.
+    各シートはワーカープロセスで他のシートを非表示にして、単体で保存するときと同じ PdfSaveOptions で描画します。
+    非表示のシートと出力するページがないシートは含めません。
+    """
+    worksheets = workbook.worksheets
+    sheet_names = [worksheets[i].name for i in range(len(worksheets))]
+    indices = [index for index in resolve_sheet_indices(sheet_names, sheets) if worksheets[index].is_visible]
+    if not indices:
+        print("出力対象のシートがありません。")
+        return None
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tasks = [
+            (excel_file, index, str(Path(temp_dir) / f"sheet_{index}.pdf"), load_profile, output_profile)
+            for index in indices
+        ]
+        print(f"{len(tasks)}個のシートを並列でPDFに変換中...")
+        part_pdfs = render_parts_parallel(_render_aspose_visible_sheet, tasks, workers, initializer=start_jvm)
+        parts = [
+            (sheet_names[index], part_pdf) for index, part_pdf in zip(indices, part_pdfs)
+            if part_pdf is not None and pdf_page_count(part_pdf) != 0
+        ]
+        if not parts:
+            print("出力対象のページがあるシートがありません。")
+            return None
+        page_count = merge_pdfs_with_bookmarks(parts, output_pdf)
+    print(f"PDFファイルが作成されました: {output_pdf} ({len(parts)}シート, {page_count}ページ)")
+    return output_pdf
+
+# 元のフォントが見つからない文字に使う代替フォント
+FALLBACK_FONT = "IPAGothic"
+
+def build_pdf_save_options(page_range: Optional[PageRange] = None, output_profile: str = "default"):
+    """
+    Builds the PdfSaveOptions used for the first save attempt.
+    フォントが見つからず表示できない文字には FALLBACK_FONT を使うよう常に設定し、フォント起因の失敗で再描画しないようにします
+    （フォントがそろっている文字の描画は変わりません）。設定できない場合（ラッパーのバージョン差異など）は警告だけ出して続けます。
+    page_range を指定すると、そのページだけを描画します。output_profile の設定は apply_output_profile を参照してください。
+    設定するものが何もなければ None を返します。ページ範囲や出力プロファイルを設定できない場合は例外を送出するので、
+    どう保存するかは呼び出し側で決めてください。
+    """
+    save_options = _page_range_options(page_range)
+    try:
+        font_options = save_options if save_options is not None else cells.PdfSaveOptions()
+        font_options.default_font = FALLBACK_FONT
+        font_options.check_workbook_default_font = True
+        save_options = font_options
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"代替フォントを設定できません。設定せずに保存します: {e}")
+    if output_profile != "default":
+        save_options = save_options if save_options is not None else cells.PdfSaveOptions()
+        apply_output_profile(save_options, output_profile)
+    return save_options
+
+def apply_output_profile(save_options, profile: str) -> None:
+    """
+    Sets the optimization type, image compression, font embedding and compliance of an output profile.
+    fast と min-size はPDFの見た目を変えない範囲の設定のため、設定できない項目は警告だけ出して既定値で保存します。
+    archive（PDF/A-2b）は準拠の設定に失敗した場合に例外を送出します。
+    """
+    check_output_profile(profile)
+    if profile == "archive":
+        save_options.compliance = cells.rendering.PdfCompliance.PDF_A_2B
+        # PDF/Aではすべてのフォントの埋め込みが必須
+        save_options.embed_standard_windows_fonts = True
+        return
+
+    try:
+        save_options.embed_standard_windows_fonts = False
+        if profile == "fast":
+            save_options.optimization_type = cells.rendering.PdfOptimizationType.STANDARD
+        elif profile == "min-size":
+            save_options.optimization_type = cells.rendering.PdfOptimizationType.MINIMUM_SIZE
+            save_options.set_image_resample(MIN_SIZE_IMAGE_DPI, MIN_SIZE_JPEG_QUALITY)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"出力プロファイル {profile} の一部を設定できません: {e}")
+
+def _page_range_options(page_range: Optional[PageRange]):
+    """
+    ページ範囲だけを設定した PdfSaveOptions（ページ範囲の指定がなければ None）
+    """
+    if page_range is None:
+        return None
+    save_options = cells.PdfSaveOptions()
+    save_options.page_index, save_options.page_count = page_range
+    return save_options
+
+def _is_java_io_error(error: BaseException) -> bool:
+    """
+    例外またはその原因（__cause__）が java.io.IOException（とその派生クラス）かどうか
+    """
+    if not jpype.isJVMStarted():
+        return False
+    io_exception = jpype.JClass("java.io.IOException")
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, io_exception):
+            return True
+        seen.add(id(error))
+        error = error.__cause__
+    return False
+
+def classify_save_error(error: Exception) -> str:
+    """
+    Classifies a failure of Workbook.save as "io", "font" or "fatal".
+    入出力エラーはメッセージではなく例外の型（OSError、java.io.IOException）で判定します。
+    "io" だけが、別の出力先に保存すれば成功し得るエラーです。
+    PdfSaveOptions の作成・設定での失敗（"options"）は save_pdf_with_policy が保存前に区別します。
+    """
+    if isinstance(error, OSError) or _is_java_io_error(error):
+        return "io"
+    if "font" in f"{type(error).__name__}: {error}".lower():
+        return "font"
+    return "fatal"
+
+def save_pdf_with_policy(workbook, output_pdf: str, raw_output: str, metrics: ConversionMetrics,
+                         page_range: Optional[PageRange] = None, output_profile: str = "default") -> Optional[str]:
+    """
+    Saves the workbook as PDF, retrying only when a different configuration can succeed.
+    - 保存前に出力先へ書き込めるかを確認し、書き込めない場合は最初から raw_output に保存する
+    - 入出力エラー（ファイルがロックされている等）は raw_output への保存を1回だけ試す
+    - PdfSaveOptions を作成・設定できない場合は、オプションなしで保存する
+    - それ以外（破損した入力、メモリ不足など）は同じ描画を繰り返しても失敗するため再試行しない
+    どの経路で保存したかは metrics.extra["save_path"] に記録します。
+    page_range を指定した場合、オプションなしの保存では全ページを保存してからページ範囲だけを残します。
+    output_profile が archive の場合、PDF/Aでなくなるためオプションなしでの保存は行いません。
+    """
+    logger = logging.getLogger(__name__)
+
+    target = output_pdf
+    if not os.access(Path(output_pdf).parent, os.W_OK) or (Path(output_pdf).exists() and not os.access(output_pdf, os.W_OK)):
+        logger.warning(f"{output_pdf} に書き込めないため、{raw_output} に保存します")
+        target = raw_output
+        if not os.access(Path(raw_output).parent, os.W_OK):
+            metrics.extra["save_path"] = "preflight_failed"
+            logger.error(f"出力先ディレクトリに書き込めません: {Path(raw_output).parent}")
+            return None
+
+    try:
+        save_options = build_pdf_save_options(page_range, output_profile)
+    except Exception as options_error:
+        # 描画前の失敗なので、オプションなしで保存すれば成功し得る
+        category = "options"
+        metrics.extra["save_error"] = category
+        logger.error(f"PdfSaveOptionsを設定できません: {options_error}")
+    else:
+        try:
+            logger.info("PDFに保存しています...")
+            with metrics.phase("save"):
+                if save_options is None:
+                    workbook.save(target)
+                else:
+                    workbook.save(target, save_options)
+            metrics.extra["save_path"] = "primary" if target == output_pdf else "preflight_raw"
+            logger.info(f"PDF変換・保存時間: {metrics.duration('save'):.2f}秒")
+            return target
+        except Exception as save_error:
+            category = classify_save_error(save_error)
+            metrics.extra["save_error"] = category
+            logger.error(f"PDF変換中にエラーが発生しました（分類: {category}）: {save_error}")
+
+    if category == "io" and target != raw_output:
+        retry_target, retry_options, path_name = raw_output, save_options, "fallback_raw"
+    elif category == "options" and output_profile != "archive":
+        retry_target, retry_options, path_name = target, None, "fallback_no_options"
+    else:
+        metrics.extra["save_path"] = "failed"
+        print("別の設定でも成功する見込みがないため、再試行しません。")
+        return None
+
+    metrics.fallback_attempts += 1
+    try:
+        logger.info(f"代替方法（{path_name}）でPDFに保存しています...")
+        with metrics.phase(path_name):
+            if retry_options is None:
+                workbook.save(retry_target)
+            else:
+                workbook.save(retry_target, retry_options)
+            if path_name == "fallback_no_options" and page_range is not None:
+                trim_pdf_pages(retry_target, page_range)
+        metrics.extra["save_path"] = path_name
+        logger.info(f"代替方法でのPDF変換・保存時間: {metrics.duration(path_name):.2f}秒")
+        return retry_target
+    except Exception as retry_error:
+        metrics.extra["save_path"] = "failed"
+        logger.error(f"代替方法でのPDF変換中にエラーが発生しました: {retry_error}")
+        print(f"PDF変換に失敗しました: {retry_error}")
+        return None
 
 def add_custom_page_breaks(worksheet):
     """
@@ -106,152 +470,191 @@ def add_custom_page_breaks(worksheet):
         except Exception:
             print("  改ページ情報の取得に失敗しました。")
 
-def excel_to_pdf_aspose(excel_file: str) -> None:
+def excel_to_pdf_aspose(excel_file: str, cache: Optional[ConversionCache] = None,
+                        sheets: Optional[SheetSelection] = None, workers: Optional[int] = None,
+                        metrics: Optional[ConversionMetrics] = None, load_profile: str = "full",
+                        incremental: bool = False, page_range: Optional[PageRange] = None,
+                        region: Optional[str] = None, output_profile: str = "default") -> Optional[str]:
     """
     Converts an Excel file to PDF using Aspose.Cells.
     Excel上の設定（改ページ、印刷設定など）をそのままPDFに反映します。
+    作成したPDFのパスを返し、変換に失敗した場合はNoneを返します。
+    cache を指定すると、入力内容が同じ場合はWorkbookを読み込まずにキャッシュ済みPDFを返します。
+    sheets に "all" またはシート名／インデックスの並びを指定すると、シートごとに並列で描画して1つのPDFに結合します。
+    フェーズごとの所要時間は metrics（省略時は新規作成）に記録されます。
+    load_profile に "lean" を指定すると、PDFに描画されない部分（VBA、ピボットテーブルなど）を読み込みません。
+    "low_memory" では、さらにセルデータをメモリ優先の形式で保持します（JVMのヒープ上限は start_jvm で指定）。
+    JVMのヒープ使用量のピークは metrics の peak_heap_bytes に記録されます。
+    incremental=True では、前回から変更されたシートだけを描画し、変更のないシートはキャッシュ済みの断片を結合します。
+    page_range に (0から始まる先頭ページ, ページ数) を指定するとそのページだけを、region にセル範囲または名前付き範囲
+    （印刷範囲など）を指定するとその範囲だけを描画します（apply_export_region を参照）。
+    output_profile には "fast"・"min-size"・"archive"（PDF/A）を指定できます（apply_output_profile を参照）。
     """
     # Configure logging
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     logger = logging.getLogger(__name__)
     
     # 時間計測用
-    import time
-    start_time = time.time()
+    metrics = metrics or ConversionMetrics("aspose", excel_file)
+    track_peak_heap(metrics)
+    created_pdf = None
 
     try:
+        if (page_range is not None or region is not None) and (sheets is not None or incremental):
+            raise ValueError("page_range・region は sheets・incremental と同時に指定できません")
+        check_output_profile(output_profile)
+        if sheets is not None or incremental:
+            check_mergeable(output_profile)
+        metrics.extra["output_profile"] = output_profile
+
         # 出力ディレクトリの確認と作成
         output_dir = Path("output")
         output_dir.mkdir(exist_ok=True)
     
+        # 出力ファイル名を設定
+        output_pdf = f"output/{Path(excel_file).stem}_aspose.pdf"
+
+        # 入力内容が変わっていなければキャッシュ済みPDFを使う
+        cache_key = None
+        if cache is not None:
+            with metrics.phase("cache_lookup"):
+                cache_options = {"sheets": sheets} if sheets is not None else {}
+                if incremental:
+                    cache_options["incremental"] = True
+                if page_range is not None:
+                    cache_options["page_range"] = list(page_range)
+                if region is not None:
+                    cache_options["region"] = region
+                if output_profile != "default":
+                    cache_options["output_profile"] = output_profile
+                cache_key = cache.key(excel_file, "aspose", cache_options)
+                metrics.cache_hit = cache.fetch(cache_key, output_pdf)
+            if metrics.cache_hit:
+                print(f"キャッシュからPDFを取得しました: {output_pdf} (処理時間: {metrics.elapsed():.2f}秒)")
+                metrics.finish("cached")
+                return output_pdf
+
+        # 変更されたシートだけを描画し、変更のないシートは前回の断片を使う
+        if incremental:
+            created_pdf = render_incremental(
+                excel_file, output_pdf, "aspose", _render_aspose_sheet,
+                lambda index, part_pdf: (excel_file, index, part_pdf, load_profile, output_profile),
+                cache, sheets, workers, options={"output_profile": output_profile} if output_profile != "default" else None,
+                initializer=start_jvm, metrics=metrics,
+            )
+            if created_pdf is not None:
+                if cache_key is not None:
+                    cache.store(cache_key, created_pdf)
+                metrics.page_count = pdf_page_count(created_pdf)
+                print(f"\n総処理時間: {metrics.elapsed():.2f}秒")
+                metrics.finish("success")
+                return created_pdf
+
         print(f"Excelファイル '{excel_file}' をPDFに変換しています...")
         
         # Excelファイルを読み込む
-        load_start_time = time.time()
-        workbook = cells.Workbook(excel_file)
-        load_end_time = time.time()
-        load_duration = load_end_time - load_start_time
-        print(f"Excelファイルの読み込み完了: {load_duration:.2f}秒")
-        logger.info(f"Excelファイルの読み込み時間: {load_duration:.2f}秒")
-
-        # ワークシートを取得（ここでは最初のワークシート）
-        worksheet = workbook.worksheets[0]
+        rss_before = current_rss_bytes()
+        with metrics.phase("load"):
+            workbook = load_workbook(excel_file, load_profile)
+        rss_after = current_rss_bytes()
+        metrics.sheet_count = len(workbook.worksheets)
+        metrics.extra["load_profile"] = load_profile
+        if rss_before is not None and rss_after is not None:
+            metrics.extra["load_rss_delta_bytes"] = rss_after - rss_before
+        print(f"Excelファイルの読み込み完了: {metrics.duration('load'):.2f}秒")
+        logger.info(f"Excelファイルの読み込み時間: {metrics.duration('load'):.2f}秒")
 
-        # 既存の印刷設定を表示（情報提供のため）
-        print(f"印刷設定 - 用紙サイズ: {worksheet.page_setup.paper_size}")
-        print(f"印刷設定 - 向き: {'横' if worksheet.page_setup.orientation == cells.PageOrientationType.LANDSCAPE else '縦'}")
-        print(f"印刷設定 - フィット設定: 幅={worksheet.page_setup.fit_to_pages_wide}, 高さ={worksheet.page_setup.fit_to_pages_tall}")
+        # 複数シートを指定された場合はシートごとに並列で描画して結合する
+        if sheets is not None:
+            with metrics.phase("save"):
+                created_pdf = save_sheets_aspose(workbook, excel_file, sheets, output_pdf, workers, load_profile, output_profile)
+            if cache_key is not None and created_pdf is not None:
+                cache.store(cache_key, created_pdf)
+            if created_pdf is not None:
+                metrics.page_count = pdf_page_count(created_pdf)
+            print(f"\n総処理時間: {metrics.elapsed():.2f}秒")
+            metrics.finish("success" if created_pdf else "failed")
+            return created_pdf
 
-        # 改ページ情報を表示
-        print("\n既存の改ページ情報:")
-        try:
-            # countはメソッドなので()を付けて呼び出す
-            horizontal_breaks_count = worksheet.horizontal_page_breaks.count()
-            if horizontal_breaks_count > 0:
-                print("水平改ページ:")
-                for page_break in worksheet.horizontal_page_breaks:
-                    print(f"  行 {page_break.row + 1} の後")
-            else:
-                print("水平改ページはありません")
-                
-            vertical_breaks_count = worksheet.vertical_page_breaks.count()
-            if vertical_breaks_count > 0:
-                print("垂直改ページ:")
-                for page_break in worksheet.vertical_page_breaks:
-                    print(f"  列 {page_break.column + 1} の後")
+        # ワークシートを取得（出力範囲の指定がなければ最初のワークシート）
+        worksheet = workbook.worksheets[0]
+        if region is not None:
+            # 指定された範囲を印刷範囲にして、他のシートは出力しない
+            with metrics.phase("inspect"):
+                worksheet = apply_export_region(workbook, region)
+            print(f"出力範囲: {worksheet.name}!{worksheet.page_setup.print_area}")
+
+        with metrics.phase("inspect"):
+            # 既存の印刷設定を表示（情報提供のため）。xlsx は最初のシートのXMLから行データを読み飛ばして印刷設定だけを読み、要素ごとにJavaを呼び出さない
+            layout = first_sheet_layout(excel_file) if region is None else None
+            if layout is not None:
+                print_sheet_layout(layout)
             else:
-                print("垂直改ページはありません")
-        except Exception as page_break_error:
-            logger.error(f"改ページ情報の取得中にエラーが発生しました: {page_break_error}")
-            # 代替方法：lengthプロパティを試す
-            try:
-                logger.info("代替方法で改ページ情報を取得します...")
-                # lenまたはlengthプロパティを試みる
-                if len(worksheet.horizontal_page_breaks) > 0:
-                    print("水平改ページ:")
-                    for page_break in worksheet.horizontal_page_breaks:
-                        print(f"  行 {page_break.row + 1} の後")
-                else:
-                    print("水平改ページはありません")
+                # .xls や出力範囲を指定した場合はエンジンから読む
+                print(f"印刷設定 - 用紙サイズ: {worksheet.page_setup.paper_size}")
+                print(f"印刷設定 - 向き: {'横' if worksheet.page_setup.orientation == cells.PageOrientationType.LANDSCAPE else '縦'}")
+                print(f"印刷設定 - フィット設定: 幅={worksheet.page_setup.fit_to_pages_wide}, 高さ={worksheet.page_setup.fit_to_pages_tall}")
+
+                # 改ページ情報を表示
+                print("\n既存の改ページ情報:")
+                try:
+                    # countはメソッドなので()を付けて呼び出す
+                    horizontal_breaks_count = worksheet.horizontal_page_breaks.count()
+                    if horizontal_breaks_count > 0:
+                        print("水平改ページ:")
+                        for page_break in worksheet.horizontal_page_breaks:
+                            print(f"  行 {page_break.row + 1} の後")
+                    else:
+                        print("水平改ページはありません")
                     
-                if len(worksheet.vertical_page_breaks) > 0:
-                    print("垂直改ページ:")
-                    for page_break in worksheet.vertical_page_breaks:
-                        print(f"  列 {page_break.column + 1} の後")
-                else:
-                    print("垂直改ページはありません")
-            except Exception as alt_page_break_error:
-                logger.error(f"代替方法での改ページ情報取得中にエラーが発生しました: {alt_page_break_error}")
-                print("改ページ情報の取得に失敗しました。処理を続行します。")
+                    vertical_breaks_count = worksheet.vertical_page_breaks.count()
+                    if vertical_breaks_count > 0:
+                        print("垂直改ページ:")
+                        for page_break in worksheet.vertical_page_breaks:
+                            print(f"  列 {page_break.column + 1} の後")
+                    else:
+                        print("垂直改ページはありません")
+                except Exception as page_break_error:
+                    logger.error(f"改ページ情報の取得中にエラーが発生しました: {page_break_error}")
+                    # 代替方法：lengthプロパティを試す
+                    try:
+                        logger.info("代替方法で改ページ情報を取得します...")
+                        # lenまたはlengthプロパティを試みる
+                        if len(worksheet.horizontal_page_breaks) > 0:
+                            print("水平改ページ:")
+                            for page_break in worksheet.horizontal_page_breaks:
+                                print(f"  行 {page_break.row + 1} の後")
+                        else:
+                            print("水平改ページはありません")
+                        
+                        if len(worksheet.vertical_page_breaks) > 0:
+                            print("垂直改ページ:")
+                            for page_break in worksheet.vertical_page_breaks:
+                                print(f"  列 {page_break.column + 1} の後")
+                        else:
+                            print("垂直改ページはありません")
+                    except Exception as alt_page_break_error:
+                        logger.error(f"代替方法での改ページ情報取得中にエラーが発生しました: {alt_page_break_error}")
+                        print("改ページ情報の取得に失敗しました。処理を続行します。")
 
-        # 出力ファイル名を設定
-        output_pdf = f"output/{Path(excel_file).stem}_aspose.pdf"
+        # 失敗時に別の設定で成功し得る場合のみ再試行する
+        print("\nPDFに変換中...")
+        raw_output = str(Path(output_dir) / f"{Path(excel_file).stem}_raw.pdf")
+        if page_range is not None:
+            print(f"出力ページ: {page_range[0] + 1}ページ目から{page_range[1]}ページ")
+        created_pdf = save_pdf_with_policy(workbook, output_pdf, raw_output, metrics, page_range, output_profile)
+        if created_pdf is not None:
+            print(f"PDFファイルが作成されました: {created_pdf} (保存経路: {metrics.extra['save_path']}, 総処理時間: {metrics.elapsed():.2f}秒)")
 
-        # PDFの変換開始時間を記録
-        pdf_start_time = time.time()
-        
-        # PDFに直接変換する（PdfSaveOptionsを使わない方法）
-        # シンプルな方法でプロパティエラーを回避
-        try:
-            print("\nPDFに変換中...")
-            logger.info("標準的な方法でPDFに保存しています...")
-            # 最もシンプルな方法 - セーブオプションなしで保存
-            save_start_time = time.time()
-            workbook.save(output_pdf)
-            save_end_time = time.time()
-            save_duration = save_end_time - save_start_time
-            pdf_end_time = time.time()
-            pdf_duration = pdf_end_time - pdf_start_time
-            total_duration = pdf_end_time - start_time
-            print(f"PDFファイルが作成されました: {output_pdf} (保存時間: {save_duration:.2f}秒, PDF変換合計: {pdf_duration:.2f}秒, 総処理時間: {total_duration:.2f}秒)")
-            logger.info(f"PDF変換・保存時間: {save_duration:.2f}秒")
-        except Exception as pdf_error:
-            logger.error(f"標準的な方法でのPDF変換中にエラーが発生しました: {pdf_error}")
-            print(f"標準的な方法でのPDF変換に失敗しました: {pdf_error}")
-            
-            # 代替方法
-            try:
-                print("\n代替方法でPDFに変換中...")
-                logger.info("代替方法でPDFに保存しています...")
-                # 別の方法 - セーブオプションを最小限に設定
-                save_options = cells.PdfSaveOptions()
-                # 特に設定を追加せず、デフォルト設定で保存
-                save_start_time = time.time()
-                workbook.save(output_pdf, save_options)
-                save_end_time = time.time()
-                save_duration = save_end_time - save_start_time
-                pdf_end_time = time.time()
-                pdf_duration = pdf_end_time - pdf_start_time
-                total_duration = pdf_end_time - start_time
-                print(f"PDFファイルが作成されました: {output_pdf} (代替方法での保存時間: {save_duration:.2f}秒, PDF変換合計: {pdf_duration:.2f}秒, 総処理時間: {total_duration:.2f}秒)")
-                logger.info(f"代替方法でのPDF変換・保存時間: {save_duration:.2f}秒")
-            except Exception as alt_error:
-                logger.error(f"代替方法でのPDF変換中にエラーが発生しました: {alt_error}")
-                print(f"代替方法でのPDF変換に失敗しました: {alt_error}")
-                
-                # 最終手段
-                try:
-                    print("\n最終手段でPDFに変換中...")
-                    logger.info("最終手段でPDFに保存しています...")
-                    import os
-                    raw_output = str(Path(output_dir) / f"{Path(excel_file).stem}_raw.pdf")
-                    save_start_time = time.time()
-                    workbook.save(raw_output)
-                    save_end_time = time.time()
-                    save_duration = save_end_time - save_start_time
-                    pdf_end_time = time.time()
-                    pdf_duration = pdf_end_time - pdf_start_time
-                    total_duration = pdf_end_time - start_time
-                    print(f"PDFファイルが作成されました（最終手段）: {raw_output} (最終手段での保存時間: {save_duration:.2f}秒, PDF変換合計: {pdf_duration:.2f}秒, 総処理時間: {total_duration:.2f}秒)")
-                    logger.info(f"最終手段でのPDF変換・保存時間: {save_duration:.2f}秒")
-                except Exception as final_error:
-                    logger.error(f"最終手段でのPDF変換中にエラーが発生しました: {final_error}")
-                    print(f"最終手段でのPDF変換に失敗しました: {final_error}")
+        # 通常の出力先に保存できた場合のみキャッシュに登録する
+        if cache_key is not None and created_pdf == output_pdf:
+            cache.store(cache_key, output_pdf)
+        if created_pdf is not None:
+            metrics.page_count = pdf_page_count(created_pdf)
                     
         # 処理時間のサマリーを表示
-        end_time = time.time()
-        total_duration = end_time - start_time
-        print(f"\n総処理時間: {total_duration:.2f}秒")
+        print(f"\n総処理時間: {metrics.elapsed():.2f}秒")
+        metrics.finish("success" if created_pdf else "failed")
 
     except Exception as e:
         logger.error(f"Excel→PDF変換中にエラーが発生しました: {e}")
@@ -260,9 +663,40 @@ def excel_to_pdf_aspose(excel_file: str) -> None:
         logger.error(traceback.format_exc())
         
         # エラー時も処理時間を表示
-        end_time = time.time()
-        error_duration = end_time - start_time
-        print(f"エラーが発生しました。エラーまでの処理時間: {error_duration:.2f}秒")
+        print(f"エラーが発生しました。エラーまでの処理時間: {metrics.elapsed():.2f}秒")
+        metrics.finish("error", str(e))
+
+    return created_pdf
+
+def excel_stream_to_pdf_aspose(source: WorkbookSource, output: BinaryIO, metrics: Optional[ConversionMetrics] = None,
+                               load_profile: str = "full", page_range: Optional[PageRange] = None,
+                               region: Optional[str] = None, output_profile: str = "default") -> None:
+    """
+    Converts a workbook given as bytes or a binary stream and writes the PDF to `output`, without touching the disk.
+    Workbook のストリーム読み込みと Workbook.save のストリーム出力を使うため、一時ファイルも出力ディレクトリも使いません。
+    load_profile・page_range・region・output_profile は excel_to_pdf_aspose と同じです
+    （複数シートの並列描画とキャッシュはファイルを前提とするため使えません）。
+    変換に失敗した場合は例外を送出します。
+    """
+    check_output_profile(output_profile)
+    metrics = metrics or stream_metrics("aspose", source)
+    metrics.extra["output_profile"] = output_profile
+    track_peak_heap(metrics)
+    try:
+        with metrics.phase("load"):
+            workbook = load_workbook(as_binary_stream(source), load_profile)
+        metrics.sheet_count = len(workbook.worksheets)
+        metrics.extra["load_profile"] = load_profile
+        if region is not None:
+            with metrics.phase("inspect"):
+                apply_export_region(workbook, region)
+        with metrics.phase("save"):
+            save_options = build_pdf_save_options(page_range, output_profile)
+            workbook.save(output, save_options if save_options is not None else cells.SaveFormat.PDF)
+    except Exception as e:
+        metrics.finish("error", str(e))
+        raise
+    metrics.finish("success")
 
 def create_excel_file(filename: str, shape_type=None, row=None, column=None, height=None, width=None) -> None:
     """
@@ -365,8 +799,7 @@ if __name__ == "__main__":
     import jpype
 
     # Start JVM here, outside the loop
-    if not jpype.isJVMStarted():
-        jpype.startJVM()
+    start_jvm()
 
     while True:
         print("\nメニュー:")
@@ -0,0 +1,52 @@
+import glob
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+@dataclass
+class BatchResult:
+    """
+    Result of converting a single file in a batch run.
+    """
+    excel_file: str
+    output_pdf: Optional[str]
+    duration: float
+    error: Optional[str] = None
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.output_pdf is not None
+
+def collect_input_files(source: str) -> List[str]:
+    """
+    Returns the Excel files matched by a directory or a glob pattern.
+    ディレクトリが指定された場合はその直下の *.xls* を対象にします。
+    Excelが編集中に作る所有者ファイル（~$report.xlsx）は対象外です。
+    """
+    if Path(source).is_dir():
+        pattern = str(Path(source) / "*.xls*")
+    else:
+        pattern = source
+    return sorted(path for path in set(glob.glob(pattern)) if not Path(path).name.startswith("~$"))
+
+def reject_output_name_collisions(excel_files: List[str]) -> Tuple[List[str], List[BatchResult]]:
+    """
+    Splits off the files whose PDF would overwrite another file's PDF.
+    変換結果は拡張子とディレクトリを除いた名前（output/{stem}_aspose.pdf など）で保存されるため、
+    a.xls と a.xlsx のように名前が同じファイルを並列に変換すると、同じPDFに書き込んでしまいます。
+    どちらを残すべきか決められないため、重複したファイルはすべて失敗として返し、残りのファイルだけを変換します。
+    （大文字・小文字を区別しないファイルシステムも考慮して、名前は大文字・小文字を区別せずに比べます）
+    """
+    groups: Dict[str, List[str]] = {}
+    for excel_file in excel_files:
+        groups.setdefault(Path(excel_file).stem.casefold(), []).append(excel_file)
+    accepted, rejected = [], []
+    for excel_file in excel_files:
+        group = groups[Path(excel_file).stem.casefold()]
+        if len(group) == 1:
+            accepted.append(excel_file)
+        else:
+            others = ", ".join(other for other in group if other != excel_file)
+            rejected.append(BatchResult(excel_file, None, 0.0, f"出力ファイル名が重複するため変換しません（{others}）"))
+    return accepted, rejected
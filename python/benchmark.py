@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from engines import ENGINES, get_converter
+
+# ワークロードの種類: (行数, 列数, シート数)
+WORKLOADS: Dict[str, Tuple[int, int, int]] = {
+    "small": (100, 5, 1),
+    "wide": (1000, 50, 1),
+    "long": (50000, 10, 1),
+    "multi-sheet": (1000, 10, 20),
+}
+
+def create_synthetic_excel_file(path: str, rows: int, columns: int = 10, sheets: int = 1) -> None:
+    """
+    Writes a synthetic workbook shaped like create_excel_file's sample (Name/Age) but of any size.
+    openpyxlの書き込み専用モードを使うため、行数が多くてもメモリを消費しません。
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for sheet in range(sheets):
+        worksheet = workbook.create_sheet(f"Sheet{sheet + 1}")
+        worksheet.append(["Name", "Age"] + [f"Value{column}" for column in range(columns - 2)])
+        for row in range(rows):
+            worksheet.append([f"Employee {row}", 20 + row % 45] + [row * columns + column for column in range(columns - 2)])
+    workbook.save(path)
+
+def run_measured(command: list, cwd: Optional[str] = None) -> Tuple[float, int, int]:
+    """
+    Runs `command` as a child process and returns (wall seconds, peak RSS in KB, exit code).
+    ピークRSSには子プロセス（wkhtmltopdf）が待ち合わせたプロセスの値も含まれます。
+    """
+    start_time = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start_time
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return wall, usage.ru_maxrss, process.returncode
+
+def _run_one(engine: str, excel_file: str, repeat: int, result_file: str, all_sheets: bool = False) -> None:
+    """
+    子プロセス側: エンジンを初期化して repeat 回変換し、結果をJSONで書き出す
+    all_sheets=True の場合は全エンジンに sheets="all" を渡す（既定のシート選択はエンジンによって異なり、
+    pdfkit と reportlab は最初のシートだけ、Aspose と Spire はブック全体を描画するため）
+    """
+    converter = get_converter(engine)
+    kwargs = {"sheets": "all"} if all_sheets else {}
+    start_time = time.perf_counter()
+    converter.setup()
+    setup_duration = time.perf_counter() - start_time
+
+    latencies = []
+    failures = 0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        output_pdf = converter.convert(excel_file, **kwargs)
+        latencies.append(time.perf_counter() - start_time)
+        if output_pdf is None:
+            failures += 1
+
+    output_bytes = Path(output_pdf).stat().st_size if output_pdf and Path(output_pdf).exists() else None
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump({"setup": setup_duration, "latencies": latencies, "failures": failures,
+                   "output_bytes": output_bytes}, f)
+
+def run_benchmark(engines: List[str], workloads: List[str], repeat: int = 3) -> List[dict]:
+    """
+    Benchmarks every engine on every workload class in a fresh process each.
+    1回目の変換を含む各回のレイテンシ、スループット、ピークRSSを記録します。
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for workload in workloads:
+            rows, columns, sheets = WORKLOADS[workload]
+            excel_file = str(Path(temp_dir) / f"{workload}.xlsx")
+            create_synthetic_excel_file(excel_file, rows, columns, sheets)
+            for engine in engines:
+                result_file = str(Path(temp_dir) / f"{workload}_{engine}.json")
+                command = [sys.executable, os.path.abspath(__file__), "--run-one", engine, excel_file,
+                           "--repeat", str(repeat), "--result-file", result_file]
+                if sheets > 1:
+                    # 複数シートのワークロードは、どのエンジンでも全シートを描画して比べる
+                    command.append("--all-sheets")
+                wall, peak_rss_kb, returncode = run_measured(command, cwd=temp_dir)
+
+                result = {"engine": engine, "workload": workload, "rows": rows, "columns": columns,
+                          "sheets": sheets, "wall": wall, "peak_rss_mb": peak_rss_kb / 1024, "ok": False}
+                if returncode == 0 and Path(result_file).exists():
+                    with open(result_file, encoding="utf-8") as f:
+                        measured = json.load(f)
+                    latencies = sorted(measured["latencies"])
+                    result.update(
+                        ok=measured["failures"] == 0,
+                        setup=measured["setup"],
+                        latency_p50=statistics.median(latencies),
+                        latency_max=latencies[-1],
+                        throughput=len(latencies) / sum(latencies) if sum(latencies) > 0 else 0.0,
+                        output_bytes=measured["output_bytes"],
+                    )
+                results.append(result)
+                print(_format_row(result), flush=True)
+    return results
+
+def _format_row(result: dict) -> str:
+    if not result["ok"]:
+        return f"{result['workload']:<12} {result['engine']:<8} {'失敗':>10}"
+    return (f"{result['workload']:<12} {result['engine']:<8} {result['latency_p50']:>10.3f} "
+            f"{result['throughput']:>12.2f} {result['setup']:>10.2f} {result['peak_rss_mb']:>12.1f}")
+
+def recommend(results: List[dict]) -> Dict[str, str]:
+    """
+    Returns the engine with the lowest median latency for each workload class.
+    """
+    best = {}
+    for result in results:
+        if not result["ok"]:
+            continue
+        current = best.get(result["workload"])
+        if current is None or result["latency_p50"] < current["latency_p50"]:
+            best[result["workload"]] = result
+    return {workload: result["engine"] for workload, result in best.items()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aspose / Spire / pdfkit / reportlab の変換性能を比較します")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS), choices=list(WORKLOADS))
+    parser.add_argument("--repeat", type=int, default=3, help="1プロセスあたりの変換回数")
+    parser.add_argument("--json", default=None, help="結果をJSONで保存するパス")
+    parser.add_argument("--run-one", nargs=2, metavar=("ENGINE", "EXCEL_FILE"), help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    parser.add_argument("--all-sheets", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        _run_one(args.run_one[0], args.run_one[1], args.repeat, args.result_file, args.all_sheets)
+        sys.exit(0)
+
+    print(f"{'ワークロード':<12} {'エンジン':<8} {'p50(秒)':>10} {'ファイル/秒':>12} {'初期化(秒)':>10} {'ピークRSS(MB)':>12}")
+    results = run_benchmark(args.engines, args.workloads, args.repeat)
+
+    print("\nワークロードごとの推奨エンジン（p50レイテンシ最小）:")
+    for workload, engine in recommend(results).items():
+        print(f"  {workload}: {engine}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "recommendation": recommend(results)}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,73 @@
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import pdfkit
+
+from benchmark import create_synthetic_excel_file
+from excel_to_pdf import PDFKIT_OPTIONS, excel_files_to_pdf, excel_to_pdf, wkhtmltopdf_supports_outline
+
+def measure_startup(work_dir: str, repeat: int = 3) -> float:
+    """
+    Returns the median time of a wkhtmltopdf run on an empty page (process start, Qt/WebKit setup and font loading).
+    """
+    durations = []
+    for i in range(repeat):
+        start_time = time.perf_counter()
+        pdfkit.from_string("<html><body></body></html>", str(Path(work_dir) / f"empty_{i}.pdf"), options=PDFKIT_OPTIONS)
+        durations.append(time.perf_counter() - start_time)
+    return sorted(durations)[len(durations) // 2]
+
+def run_batch_benchmark(documents: int, rows: int, batch_sizes: List[int]) -> List[dict]:
+    """
+    Converts the same small workbooks one wkhtmltopdf run per file and in batches, and reports the time per document.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        excel_files = []
+        for i in range(documents):
+            excel_file = str(Path(temp_dir) / f"employee_{i}.xlsx")
+            create_synthetic_excel_file(excel_file, rows, 5)
+            excel_files.append(excel_file)
+        startup = measure_startup(temp_dir)
+        print(f"wkhtmltopdfの起動時間（空のページ）: {startup * 1000:.0f}ミリ秒\n")
+        if not wkhtmltopdf_supports_outline():
+            print("注意: patched Qt 版でないwkhtmltopdfのため、バッチモードも1件ずつ描画されます\n")
+        print(f"{'モード':<12} {'文書数':>8} {'合計(秒)':>10} {'1件(ミリ秒)':>12} {'起動の割合':>10}")
+
+        modes = [("per-file", 1, None)] + [(f"batch-{size}", size, size) for size in batch_sizes]
+        for label, runs_per_start, batch_size in modes:
+            output_dir = Path(temp_dir) / label
+            output_dir.mkdir()
+            start_time = time.perf_counter()
+            if batch_size is None:
+                created = [excel_to_pdf(excel_file, output_dir=str(output_dir)) for excel_file in excel_files]
+            else:
+                created = excel_files_to_pdf(excel_files, output_dir=str(output_dir), batch_size=batch_size)
+            total = time.perf_counter() - start_time
+            per_document = total / documents
+            result = {"mode": label, "documents": documents, "rows": rows, "total": total,
+                      "per_document": per_document, "startup": startup,
+                      "startup_share": min(startup / runs_per_start / per_document, 1.0),
+                      "failed": sum(1 for output_pdf in created if output_pdf is None)}
+            results.append(result)
+            print(f"{label:<12} {documents:>8} {total:>10.2f} {per_document * 1000:>12.0f} "
+                  f"{result['startup_share']:>9.0%}" + (f"  (失敗: {result['failed']}件)" if result["failed"] else ""),
+                  flush=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="excel_to_pdf の1件ずつの描画とバッチモードの1件あたりの時間を比較します")
+    parser.add_argument("--documents", type=int, default=100, help="変換する文書数")
+    parser.add_argument("--rows", type=int, default=30, help="1文書あたりの行数")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 50], help="1回のwkhtmltopdfに渡す文書数")
+    parser.add_argument("--json", default=None, help="結果をJSONで保存するパス")
+    args = parser.parse_args()
+
+    results = run_batch_benchmark(args.documents, args.rows, args.batch_sizes)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,64 @@
+import argparse
+import io
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from excel_to_pdf import HTML_FOOTER, HTML_HEADER, write_dataframe_table
+
+def create_synthetic_frame(rows: int, columns: int) -> pd.DataFrame:
+    """
+    Builds a frame shaped like the sample sheet (Name/Age) followed by numeric and text columns.
+    """
+    rng = np.random.default_rng(0)
+    data = {"Name": [f"Employee {row}" for row in range(rows)], "Age": 20 + np.arange(rows) % 45}
+    for column in range(columns - 2):
+        if column % 4 == 3:
+            data[f"Value{column}"] = [f"項目 <{row % 100}> & 備考" for row in range(rows)]
+        else:
+            data[f"Value{column}"] = rng.random(rows) * 1000
+    return pd.DataFrame(data)
+
+def render_to_html(df: pd.DataFrame) -> int:
+    html_content = df.to_html(index=False)
+    styled_html = HTML_HEADER + html_content + HTML_FOOTER
+    return len(styled_html)
+
+def render_fast(df: pd.DataFrame) -> int:
+    out = io.StringIO()
+    out.write(HTML_HEADER)
+    write_dataframe_table(df, out)
+    out.write(HTML_FOOTER)
+    return out.tell()
+
+def measure(render, df: pd.DataFrame):
+    """
+    (所要時間, ピークの追加メモリ(MB), 出力文字数) を返す
+    """
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    length = render(df)
+    duration = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak / (1024 * 1024), length
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DataFrame.to_html と列単位のHTML生成の速度を比較します")
+    parser.add_argument("--rows", type=int, default=100000, help="行数")
+    parser.add_argument("--columns", type=int, default=50, help="列数")
+    parser.add_argument("--repeat", type=int, default=3, help="計測回数（最短時間を表示）")
+    args = parser.parse_args()
+
+    df = create_synthetic_frame(args.rows, args.columns)
+    print(f"{args.rows}行 x {args.columns}列")
+    print(f"{'方式':<10} {'時間(秒)':>10} {'ピークメモリ(MB)':>16} {'出力(文字)':>14}")
+    durations = {}
+    for name, render in (("to_html", render_to_html), ("fast", render_fast)):
+        runs = [measure(render, df) for _ in range(args.repeat)]
+        duration, peak_mb, length = min(runs)
+        durations[name] = duration
+        print(f"{name:<10} {duration:>10.2f} {peak_mb:>16.1f} {length:>14}")
+    print(f"\n高速化: {durations['to_html'] / durations['fast']:.1f}倍")
@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from benchmark import create_synthetic_excel_file, run_measured
+
+# (エンジン, 読み込みプロファイル)。Spire.XLS は読み込みを絞れないため full のみ計測する
+CASES = [("aspose", "full"), ("aspose", "lean"), ("aspose", "low_memory"), ("spire", "full")]
+
+def _load_one(engine: str, profile: str, excel_file: str, result_file: str) -> None:
+    """
+    子プロセス側: エンジンを初期化してからワークブックを読み込み、読み込み時間とメモリ増加量をJSONで書き出す
+    """
+    from conversion_metrics import current_rss_bytes
+
+    if engine == "aspose":
+        from aspose_excel_to_pdf import load_workbook, start_jvm
+
+        start_jvm()
+        load = lambda: load_workbook(excel_file, profile)
+    else:
+        from spire.xls import Workbook
+
+        def load():
+            workbook = Workbook()
+            workbook.LoadFromFile(excel_file)
+            return workbook
+
+    rss_before = current_rss_bytes()
+    start_time = time.perf_counter()
+    workbook = load()
+    duration = time.perf_counter() - start_time
+    rss_after = current_rss_bytes()
+    rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump({"load": duration, "rss_delta": rss_delta}, f)
+    del workbook
+
+def run_load_benchmark(excel_files: List[str], work_dir: str) -> List[dict]:
+    """
+    Measures the load time and memory of every file with each engine and load profile, in a fresh process each.
+    """
+    results = []
+    for excel_file in excel_files:
+        for engine, profile in CASES:
+            result_file = str(Path(work_dir) / f"{Path(excel_file).stem}_{engine}_{profile}.json")
+            command = [sys.executable, os.path.abspath(__file__), "--run-one", engine, profile, excel_file,
+                       "--result-file", result_file]
+            _, peak_rss_kb, returncode = run_measured(command, cwd=work_dir)
+
+            result = {"file": excel_file, "engine": engine, "profile": profile,
+                      "peak_rss_mb": peak_rss_kb / 1024, "ok": False}
+            if returncode == 0 and Path(result_file).exists():
+                with open(result_file, encoding="utf-8") as f:
+                    measured = json.load(f)
+                result.update(ok=True, load=measured["load"], rss_delta=measured["rss_delta"])
+            results.append(result)
+            print(_format_row(result), flush=True)
+    return results
+
+def _format_row(result: dict) -> str:
+    label = f"{Path(result['file']).name:<24} {result['engine']:<8} {result['profile']:<10}"
+    if not result["ok"]:
+        return f"{label} {'失敗':>10}"
+    rss_delta = f"{result['rss_delta'] / (1024 * 1024):>12.1f}" if result["rss_delta"] is not None else f"{'-':>12}"
+    return f"{label} {result['load']:>10.3f} {rss_delta} {result['peak_rss_mb']:>12.1f}"
+
+def savings(results: List[dict]) -> List[dict]:
+    """
+    Returns the load time and memory saved by each of Aspose's reduced load profiles compared to a full load, per file.
+    """
+    aspose = {(result["file"], result["profile"]): result for result in results
+              if result["engine"] == "aspose" and result["ok"]}
+    saved = []
+    for excel_file in dict.fromkeys(result["file"] for result in results):
+        full = aspose.get((excel_file, "full"))
+        for profile in ("lean", "low_memory"):
+            reduced = aspose.get((excel_file, profile))
+            if full is None or reduced is None:
+                continue
+            saved.append({
+                "file": excel_file,
+                "profile": profile,
+                "load_saved": full["load"] - reduced["load"],
+                "peak_rss_saved_mb": full["peak_rss_mb"] - reduced["peak_rss_mb"],
+            })
+    return saved
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ワークブックの読み込み時間とメモリを読み込みプロファイルごとに比較します")
+    parser.add_argument("excel_files", nargs="*", help="計測するExcelファイル（省略時は合成データを使用）")
+    parser.add_argument("--rows", type=int, default=50000, help="合成データの行数")
+    parser.add_argument("--sheets", type=int, default=5, help="合成データのシート数")
+    parser.add_argument("--json", default=None, help="結果をJSONで保存するパス")
+    parser.add_argument("--run-one", nargs=3, metavar=("ENGINE", "PROFILE", "EXCEL_FILE"), help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        _load_one(*args.run_one, args.result_file)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        excel_files = [os.path.abspath(excel_file) for excel_file in args.excel_files]
+        if not excel_files:
+            excel_file = str(Path(temp_dir) / "synthetic.xlsx")
+            create_synthetic_excel_file(excel_file, args.rows, 10, args.sheets)
+            excel_files = [excel_file]
+
+        print(f"{'ファイル':<24} {'エンジン':<8} {'設定':<10} {'読込(秒)':>10} {'増加RSS(MB)':>12} {'ピークRSS(MB)':>12}")
+        results = run_load_benchmark(excel_files, temp_dir)
+
+    print("\nfull と比べた削減量（Aspose.Cells）:")
+    for saved in savings(results):
+        print(f"  {Path(saved['file']).name} ({saved['profile']}): 読み込み時間 {saved['load_saved']:.3f}秒, ピークRSS {saved['peak_rss_saved_mb']:.1f}MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "savings": savings(results)}, f, ensure_ascii=False, indent=2)
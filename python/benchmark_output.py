@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from benchmark import create_synthetic_excel_file, run_measured
+from output_profiles import OUTPUT_PROFILES, PDFKIT_PROFILE_OPTIONS
+
+BENCHMARK_ENGINES = ("aspose", "spire", "pdfkit")
+
+def _profiles_for(engine: str) -> List[str]:
+    # wkhtmltopdf は PDF/A を出力できない
+    return [profile for profile in OUTPUT_PROFILES if engine != "pdfkit" or profile in PDFKIT_PROFILE_OPTIONS]
+
+def _convert_one(engine: str, profile: str, excel_file: str, repeat: int, result_file: str) -> None:
+    """
+    子プロセス側: エンジンを初期化して repeat 回変換し、変換時間と出力サイズをJSONで書き出す
+    """
+    from engines import get_converter
+
+    converter = get_converter(engine)
+    converter.setup()
+    latencies = []
+    output_pdf = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        output_pdf = converter.convert(excel_file, output_profile=profile)
+        latencies.append(time.perf_counter() - start_time)
+        if output_pdf is None:
+            break
+
+    output_bytes = Path(output_pdf).stat().st_size if output_pdf and Path(output_pdf).exists() else None
+    with open(result_file, "w", encoding="utf-8") as f:
+        json.dump({"latencies": latencies, "output_bytes": output_bytes}, f)
+
+def run_output_benchmark(excel_files: List[str], engines: List[str], work_dir: str, repeat: int = 3) -> List[dict]:
+    """
+    Converts every file with each engine and output profile in a fresh process and records render time and PDF size.
+    """
+    results = []
+    for excel_file in excel_files:
+        for engine in engines:
+            for profile in _profiles_for(engine):
+                result_file = str(Path(work_dir) / f"{Path(excel_file).stem}_{engine}_{profile}.json")
+                command = [sys.executable, os.path.abspath(__file__), "--run-one", engine, profile, excel_file,
+                           "--repeat", str(repeat), "--result-file", result_file]
+                _, _, returncode = run_measured(command, cwd=work_dir)
+
+                result = {"file": excel_file, "engine": engine, "profile": profile, "ok": False}
+                if returncode == 0 and Path(result_file).exists():
+                    with open(result_file, encoding="utf-8") as f:
+                        measured = json.load(f)
+                    if measured["output_bytes"] is not None:
+                        result.update(ok=True, render=statistics.median(measured["latencies"]),
+                                      output_bytes=measured["output_bytes"])
+                results.append(result)
+                print(_format_row(result, results), flush=True)
+    return results
+
+def _format_row(result: dict, results: List[dict]) -> str:
+    label = f"{Path(result['file']).name:<24} {result['engine']:<8} {result['profile']:<10}"
+    if not result["ok"]:
+        return f"{label} {'失敗':>10}"
+    # 同じファイル・エンジンの default と比べたサイズ
+    default = next((other for other in results if other["ok"] and other["profile"] == "default"
+                    and other["file"] == result["file"] and other["engine"] == result["engine"]), None)
+    ratio = f"{result['output_bytes'] / default['output_bytes']:>9.2f}x" if default else f"{'-':>10}"
+    return f"{label} {result['render']:>10.3f} {result['output_bytes'] / 1024:>12.1f} {ratio}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="出力プロファイルごとの変換時間とPDFのサイズを比較します")
+    parser.add_argument("excel_files", nargs="*", help="計測するExcelファイル（省略時は合成データを使用）")
+    parser.add_argument("--engines", nargs="+", choices=BENCHMARK_ENGINES, default=list(BENCHMARK_ENGINES))
+    parser.add_argument("--rows", type=int, default=5000, help="合成データの行数")
+    parser.add_argument("--repeat", type=int, default=3, help="1プロセスあたりの変換回数（中央値を表示）")
+    parser.add_argument("--json", default=None, help="結果をJSONで保存するパス")
+    parser.add_argument("--run-one", nargs=3, metavar=("ENGINE", "PROFILE", "EXCEL_FILE"), help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        _convert_one(*args.run_one, args.repeat, args.result_file)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        excel_files = [os.path.abspath(excel_file) for excel_file in args.excel_files]
+        if not excel_files:
+            excel_file = str(Path(temp_dir) / "synthetic.xlsx")
+            create_synthetic_excel_file(excel_file, args.rows, 10)
+            excel_files = [excel_file]
+
+        print(f"{'ファイル':<24} {'エンジン':<8} {'設定':<10} {'変換(秒)':>10} {'出力(KB)':>12} {'対default':>10}")
+        results = run_output_benchmark(excel_files, args.engines, temp_dir, args.repeat)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,27 @@
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmark import create_synthetic_excel_file, run_measured
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="excel_to_pdf の通常モードとストリーミングモードを比較します")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 500000], help="計測する行数")
+    parser.add_argument("--columns", type=int, default=10, help="列数")
+    args = parser.parse_args()
+
+    script = str(Path(__file__).with_name("excel_to_pdf.py"))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        print(f"{'行数':>10} {'モード':<10} {'時間(秒)':>10} {'ピークRSS(MB)':>14}")
+        for rows in args.rows:
+            excel_file = str(Path(temp_dir) / f"bench_{rows}.xlsx")
+            create_synthetic_excel_file(excel_file, rows, args.columns)
+            for mode, extra_args in (("default", []), ("streaming", ["--streaming"])):
+                command = [sys.executable, script, excel_file, "--output-dir", temp_dir] + extra_args
+                wall, peak_rss_kb, returncode = run_measured(command)
+                status = "" if returncode == 0 else f" (失敗: 終了コード {returncode})"
+                print(f"{rows:>10} {mode:<10} {wall:>10.2f} {peak_rss_kb / 1024:>14.1f}{status}")
+
+if __name__ == "__main__":
+    main()
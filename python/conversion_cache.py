@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "cache"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1GB
+
+# キャッシュに保存する出力の拡張子（PDFとプレビュー画像）
+ENTRY_SUFFIXES = (".pdf", ".png", ".webp")
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Linuxでファイルのデータをコピーせずに共有するioctl（FICLONE）
+_FICLONE = 0x40049409
+
+def _clone_file(source: Path, destination: str) -> None:
+    """
+    リフリンク（コピーオンライト）を作成し、対応していない場合は通常のコピーをする
+    どちらの場合も destination は独立したファイルになるため、書き換えても source には影響しない
+    """
+    try:
+        import fcntl
+
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return
+    except (ImportError, OSError):
+        pass
+    shutil.copyfile(source, destination)
+
+class ConversionCache:
+    """
+    On-disk cache of converted PDFs keyed by input content hash, engine and save options.
+    入力ファイルの内容が変わっていなければ、Workbookを読み込まずにキャッシュ済みPDFを出力先に配置します。
+    エントリは出力ファイルと同じ拡張子で保存されるため、プレビュー画像も同じ仕組みでキャッシュできます。
+    キャッシュの合計サイズが max_bytes を超えると、最も長く使われていないエントリから削除します（LRU）。
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, excel_file: str, engine: str, options: Optional[dict] = None) -> str:
+        """
+        Builds the cache key for converting `excel_file` with `engine` and `options`.
+        """
+        digest = hashlib.sha256()
+        digest.update(file_sha256(excel_file).encode("ascii"))
+        digest.update(engine.encode("utf-8"))
+        digest.update(json.dumps(options or {}, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str, suffix: str = ".pdf") -> Path:
+        suffix = suffix.lower()
+        return self.cache_dir / f"{key}{suffix if suffix in ENTRY_SUFFIXES else '.pdf'}"
+
+    def _entries(self):
+        return (entry for entry in self.cache_dir.iterdir() if entry.suffix in ENTRY_SUFFIXES)
+
+    def fetch(self, key: str, output_pdf: str) -> bool:
+        """
+        Places a copy of the cached PDF at `output_pdf` and returns True on a hit.
+        対応するファイルシステム（Btrfs、XFSなど）ではリフリンクでデータを共有し、それ以外ではコピーします。
+        ハードリンクは使いません（キャッシュを使わない変換が出力先を上書きすると、キャッシュの中身まで書き換わるため）。
+        """
+        output_path = Path(output_pdf)
+        entry = self._entry_path(key, output_path.suffix)
+        if not entry.exists():
+            self.misses += 1
+            return False
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        # 出力先に書きかけのファイルが見えないよう、同じディレクトリの一時ファイルに置いてから置き換える
+        # （mkstemp の一時ファイルは所有者しか読めないため、umask に従って作成される名前付きの一時ファイルを使う）
+        temp_path = str(output_path.with_name(f".{output_path.name}.{uuid.uuid4().hex}.tmp"))
+        try:
+            _clone_file(entry, temp_path)
+            os.replace(temp_path, output_path)
+        except FileNotFoundError:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            if entry.exists():
+                raise
+            # exists() の確認後に他のプロセスがエントリを削除した（LRUによる削除など）
+            self.misses += 1
+            return False
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        # LRU判定のため最終利用時刻を更新する（コピー後に削除された場合は何もしない）
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return True
+
+    def store(self, key: str, pdf_path: str) -> None:
+        """
+        Copies a freshly rendered PDF into the cache and evicts old entries if needed.
+        """
+        entry = self._entry_path(key, Path(pdf_path).suffix)
+        # 他プロセスが同じキャッシュを読んでいても壊れないよう、一時ファイルに書いてから置き換える
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(pdf_path, temp_path)
+            os.replace(temp_path, entry)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        total_bytes = 0
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total_bytes += stat.st_size
+
+        entries.sort()
+        for _, size, entry in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+                logger.info(f"キャッシュエントリを削除しました: {entry.name}")
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the current cache size.
+        """
+        entries = list(self._entries())
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "bytes": sum(entry.stat().st_size for entry in entries if entry.exists()),
+            "max_bytes": self.max_bytes,
+        }
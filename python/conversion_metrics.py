@@ -0,0 +1,229 @@
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+# 設定するとメトリクスをJSON Lines形式でこのファイルに追記する
+METRICS_PATH_ENV = "EXCEL_CONVERTER_METRICS"
+
+# Prometheus形式で出力する分位点
+QUANTILES = (0.5, 0.9, 0.99)
+
+def pdf_page_count(pdf_path: str) -> Optional[int]:
+    """
+    Returns the number of pages of a PDF, or None if it cannot be read.
+    """
+    try:
+        from pypdf import PdfReader
+        return len(PdfReader(pdf_path).pages)
+    except Exception:
+        return None
+
+def current_rss_bytes() -> Optional[int]:
+    """
+    Returns the current resident set size of this process, or None where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class ConversionMetrics:
+    """
+    Records monotonic per-phase timings and input/output facts of one conversion.
+    フェーズ（load, inspect, save, fallback など）ごとの所要時間を time.perf_counter で計測し、
+    finish() で環境変数 EXCEL_CONVERTER_METRICS のファイルにJSON Linesとして書き出します。
+    """
+
+    def __init__(self, engine: str, excel_file: str):
+        self.engine = engine
+        self.excel_file = excel_file
+        try:
+            self.input_bytes = os.path.getsize(excel_file)
+        except OSError:
+            self.input_bytes = None
+        self.sheet_count: Optional[int] = None
+        self.page_count: Optional[int] = None
+        self.fallback_attempts = 0
+        self.cache_hit = False
+        self.status = "running"
+        self.error: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self.extra: Dict[str, object] = {}
+        self.total_duration: Optional[float] = None
+        self._finish_hooks: List[Callable[["ConversionMetrics"], None]] = []
+        self._timestamp = time.time()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        with ブロックの所要時間をフェーズ name に加算する
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def duration(self, name: str) -> float:
+        return self.phases.get(name, 0.0)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def on_finish(self, hook: Callable[["ConversionMetrics"], None]) -> None:
+        """
+        finish() の直前に呼び出す関数を登録する（変換全体を通したピーク値などを extra に記録するため）
+        """
+        self._finish_hooks.append(hook)
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        """
+        Marks the conversion as finished and emits the record.
+        """
+        self.status = status
+        self.error = error
+        self.total_duration = self.elapsed()
+        for hook in self._finish_hooks:
+            hook(self)
+        self.emit()
+
+    def to_dict(self) -> dict:
+        record = {
+            "timestamp": self._timestamp,
+            "engine": self.engine,
+            "input": self.excel_file,
+            "input_bytes": self.input_bytes,
+            "sheet_count": self.sheet_count,
+            "page_count": self.page_count,
+            "status": self.status,
+            "cache_hit": self.cache_hit,
+            "fallback_attempts": self.fallback_attempts,
+            "phases": self.phases,
+            "total_duration": self.total_duration,
+        }
+        if self.error:
+            record["error"] = self.error
+        record.update(self.extra)
+        return record
+
+    def emit(self, path: Optional[str] = None) -> None:
+        path = path or os.environ.get(METRICS_PATH_ENV)
+        if not path:
+            return
+        line = json.dumps(self.to_dict(), ensure_ascii=False) + "\n"
+        # 複数プロセスから追記しても行が混ざらないよう、1回のwriteで書き込む
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+def load_records(path: str) -> List[dict]:
+    """
+    Reads metric records from a JSON Lines file.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def render_prometheus(records: Iterable[dict]) -> str:
+    """
+    Renders metric records in Prometheus text exposition format.
+    エンジンごとの変換時間・フェーズ時間を分位点付きのsummaryとして出力します。
+    """
+    totals = defaultdict(list)
+    phases = defaultdict(list)
+    statuses = defaultdict(int)
+    input_bytes = defaultdict(int)
+    fallbacks = defaultdict(int)
+    save_paths = defaultdict(int)
+    for record in records:
+        engine = record.get("engine", "unknown")
+        statuses[(engine, record.get("status", "unknown"))] += 1
+        fallbacks[engine] += record.get("fallback_attempts") or 0
+        if record.get("save_path"):
+            save_paths[(engine, record["save_path"])] += 1
+        input_bytes[engine] += record.get("input_bytes") or 0
+        if record.get("total_duration") is not None:
+            totals[engine].append(record["total_duration"])
+        for phase, seconds in (record.get("phases") or {}).items():
+            phases[(engine, phase)].append(seconds)
+
+    lines = [
+        "# HELP excel_converter_conversions_total Number of conversions by engine and status.",
+        "# TYPE excel_converter_conversions_total counter",
+    ]
+    for (engine, status), count in sorted(statuses.items()):
+        lines.append(f'excel_converter_conversions_total{{engine="{_escape_label(engine)}",status="{_escape_label(status)}"}} {count}')
+
+    lines += [
+        "# HELP excel_converter_conversion_seconds End-to-end conversion latency.",
+        "# TYPE excel_converter_conversion_seconds summary",
+    ]
+    for engine, values in sorted(totals.items()):
+        values.sort()
+        label = f'engine="{_escape_label(engine)}"'
+        for q in QUANTILES:
+            lines.append(f'excel_converter_conversion_seconds{{{label},quantile="{q}"}} {_quantile(values, q):.6f}')
+        lines.append(f"excel_converter_conversion_seconds_sum{{{label}}} {sum(values):.6f}")
+        lines.append(f"excel_converter_conversion_seconds_count{{{label}}} {len(values)}")
+
+    lines += [
+        "# HELP excel_converter_phase_seconds Latency of each conversion phase.",
+        "# TYPE excel_converter_phase_seconds summary",
+    ]
+    for (engine, phase), values in sorted(phases.items()):
+        values.sort()
+        label = f'engine="{_escape_label(engine)}",phase="{_escape_label(phase)}"'
+        for q in QUANTILES:
+            lines.append(f'excel_converter_phase_seconds{{{label},quantile="{q}"}} {_quantile(values, q):.6f}')
+        lines.append(f"excel_converter_phase_seconds_sum{{{label}}} {sum(values):.6f}")
+        lines.append(f"excel_converter_phase_seconds_count{{{label}}} {len(values)}")
+
+    lines += [
+        "# HELP excel_converter_input_bytes_total Total size of converted inputs.",
+        "# TYPE excel_converter_input_bytes_total counter",
+    ]
+    for engine, total in sorted(input_bytes.items()):
+        lines.append(f'excel_converter_input_bytes_total{{engine="{_escape_label(engine)}"}} {total}')
+
+    lines += [
+        "# HELP excel_converter_fallback_attempts_total Number of fallback save attempts.",
+        "# TYPE excel_converter_fallback_attempts_total counter",
+    ]
+    for engine, total in sorted(fallbacks.items()):
+        lines.append(f'excel_converter_fallback_attempts_total{{engine="{_escape_label(engine)}"}} {total}')
+
+    lines += [
+        "# HELP excel_converter_save_path_total Number of conversions by the save path that produced the PDF.",
+        "# TYPE excel_converter_save_path_total counter",
+    ]
+    for (engine, path), count in sorted(save_paths.items()):
+        lines.append(f'excel_converter_save_path_total{{engine="{_escape_label(engine)}",path="{_escape_label(path)}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="変換メトリクス（JSON Lines）をPrometheus形式で出力します")
+    parser.add_argument("metrics_file", nargs="?", default=os.environ.get(METRICS_PATH_ENV),
+                        help=f"メトリクスファイル（既定: 環境変数 {METRICS_PATH_ENV}）")
+    args = parser.parse_args()
+    if not args.metrics_file or not Path(args.metrics_file).exists():
+        parser.error("メトリクスファイルが見つかりません")
+
+    print(render_prometheus(load_records(args.metrics_file)), end="")
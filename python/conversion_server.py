@@ -0,0 +1,227 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+from aiohttp import web
+
+from engines import ENGINES, Converter, get_converter
+from multi_sheet import parse_page_range
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_UPLOAD_BYTES = 100 * 1024 * 1024  # 100MB
+ALLOWED_SUFFIXES = (".xlsx", ".xlsm", ".xls", ".xlsb")
+
+logger = logging.getLogger(__name__)
+
+# ワーカープロセスごとのコンバーター（_init_workerで設定）
+_converters: Dict[str, Converter] = {}
+
+def _init_worker(engine_names: Sequence[str]) -> None:
+    """
+    ワーカープロセスの起動時に各エンジンを一度だけ初期化する（JVMの起動など）
+    """
+    for name in engine_names:
+        converter = get_converter(name)
+        converter.setup()
+        _converters[name] = converter
+
+def _convert_in_worker(engine: str, excel_file: str, work_dir: str, options: Optional[dict] = None) -> Optional[str]:
+    # 変換結果は作業ディレクトリの output/ に書き出される
+    os.chdir(work_dir)
+    try:
+        output_pdf = _converters[engine].convert(excel_file, **(options or {}))
+    except Exception as e:
+        logger.error(f"変換中にエラーが発生しました: {e}")
+        return None
+    return str(Path(work_dir) / output_pdf) if output_pdf else None
+
+class ConversionService:
+    """
+    HTTP service that accepts workbook uploads and streams back the converted PDF.
+    同時変換数は concurrency、待ち行列の長さは queue_size で制限し、
+    上限を超えたリクエストには 429 Too Many Requests を返します。
+    ワーカープロセスが異常終了した場合はプロセスプールを作り直し、影響を受けたリクエストには 503 を返します。
+    """
+
+    def __init__(self, engines: Sequence[str] = ("aspose", "spire"), concurrency: int = 2, queue_size: int = 8,
+                 max_upload_bytes: int = DEFAULT_MAX_UPLOAD_BYTES):
+        self.engines = list(engines)
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_upload_bytes = max_upload_bytes
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._executor_lock = asyncio.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.concurrency, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(self.engines,))
+
+    async def _replace_executor(self, broken: ProcessPoolExecutor) -> None:
+        """
+        壊れたプロセスプールを一度だけ作り直す（同じプールで失敗した他のリクエストは作り直し済みのプールを使う）
+        """
+        async with self._executor_lock:
+            if self._executor is not broken:
+                return
+            logger.error("変換ワーカーが異常終了しました。プロセスプールを作り直します")
+            self._executor = self._new_executor()
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def application(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/convert", self.handle_convert)
+        app.router.add_get("/healthz", self.handle_health)
+        app.on_cleanup.append(self._shutdown)
+        return app
+
+    async def _shutdown(self, app: web.Application) -> None:
+        self._executor.shutdown(wait=True)
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "pending": self.pending,
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+        })
+
+    async def handle_convert(self, request: web.Request) -> web.StreamResponse:
+        """
+        POST /convert?engine=aspose[&pages=1-3][&region=Print_Area]
+        本文にワークブックそのもの、またはmultipart/form-dataのファイルを送信すると、PDFを返します。
+        pages（1から始まるページ範囲）と region（セル範囲または名前付き範囲）は aspose / spire エンジンで指定できます。
+        """
+        engine = request.query.get("engine", self.engines[0])
+        if engine not in self.engines:
+            raise web.HTTPBadRequest(text=f"利用できないエンジンです: {engine}（利用可能: {', '.join(self.engines)}）")
+        options = {}
+        try:
+            if request.query.get("pages"):
+                options["page_range"] = parse_page_range(request.query["pages"])
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        if request.query.get("region"):
+            options["region"] = request.query["region"]
+        if options and engine in ("pdfkit", "reportlab"):
+            raise web.HTTPBadRequest(text=f"{engine}エンジンでは pages・region を指定できません")
+
+        # 変換中と待機中の合計が上限に達していれば受け付けない（アップロードも読まない）
+        if self.pending >= self.concurrency + self.queue_size:
+            self.rejected += 1
+            raise web.HTTPTooManyRequests(text="変換キューが満杯です。しばらくしてから再試行してください。",
+                                          headers={"Retry-After": "1"})
+
+        self.pending += 1
+        work_dir = tempfile.mkdtemp(prefix="excel-converter-")
+        try:
+            excel_file = await self._receive_upload(request, work_dir)
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                executor = self._executor
+                try:
+                    output_pdf = await loop.run_in_executor(executor, _convert_in_worker, engine, excel_file, work_dir,
+                                                            options)
+                except BrokenProcessPool:
+                    await self._replace_executor(executor)
+                    raise web.HTTPServiceUnavailable(text="変換プロセスが異常終了しました。しばらくしてから再試行してください。",
+                                                     headers={"Retry-After": "1"})
+            if output_pdf is None:
+                raise web.HTTPUnprocessableEntity(text="PDFへの変換に失敗しました。")
+            response = await self._stream_file(request, output_pdf)
+            self.completed += 1
+            return response
+        finally:
+            self.pending -= 1
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    async def _receive_upload(self, request: web.Request, work_dir: str) -> str:
+        """
+        アップロードされたワークブックを少しずつ一時ファイルに書き出す
+        """
+        if request.content_type.startswith("multipart/"):
+            reader = await request.multipart()
+            part = await reader.next()
+            while part is not None and not part.filename:
+                part = await reader.next()
+            if part is None:
+                raise web.HTTPBadRequest(text="ファイルが含まれていません。")
+            filename = part.filename
+            read_chunk = lambda: part.read_chunk(CHUNK_SIZE)
+        else:
+            filename = request.query.get("filename", "upload.xlsx")
+            read_chunk = lambda: request.content.read(CHUNK_SIZE)
+
+        suffix = Path(filename).suffix.lower()
+        if suffix not in ALLOWED_SUFFIXES:
+            raise web.HTTPBadRequest(text=f"対応していないファイル形式です: {suffix or filename}")
+
+        # 出力ファイル名が衝突しないよう、一意な名前で保存する
+        excel_file = str(Path(work_dir) / f"{uuid.uuid4().hex}{suffix}")
+        received = 0
+        with open(excel_file, "wb") as f:
+            while True:
+                chunk = await read_chunk()
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > self.max_upload_bytes:
+                    raise web.HTTPRequestEntityTooLarge(max_size=self.max_upload_bytes, actual_size=received)
+                f.write(chunk)
+        if received == 0:
+            raise web.HTTPBadRequest(text="ファイルが空です。")
+        return excel_file
+
+    async def _stream_file(self, request: web.Request, pdf_path: str) -> web.StreamResponse:
+        """
+        PDFをメモリに読み込まず、チャンクごとにクライアントへ送る
+        """
+        response = web.StreamResponse(headers={
+            "Content-Type": "application/pdf",
+            "Content-Disposition": f'attachment; filename="{Path(pdf_path).name}"',
+        })
+        response.content_length = os.path.getsize(pdf_path)
+        await response.prepare(request)
+        loop = asyncio.get_running_loop()
+        with open(pdf_path, "rb") as f:
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                await response.write(chunk)
+        await response.write_eof()
+        return response
+
+async def _create_app(engines: Sequence[str], concurrency: int, queue_size: int, max_upload_bytes: int) -> web.Application:
+    service = ConversionService(engines, concurrency, queue_size, max_upload_bytes)
+    return service.application()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Excel→PDF変換HTTPサービス")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--engines", nargs="+", default=["aspose", "spire"], choices=list(ENGINES))
+    parser.add_argument("--concurrency", type=int, default=multiprocessing.cpu_count(), help="同時に実行する変換の数")
+    parser.add_argument("--queue-size", type=int, default=16, help="変換待ちとして受け付けるリクエストの数")
+    parser.add_argument("--max-upload-mb", type=int, default=DEFAULT_MAX_UPLOAD_BYTES // (1024 * 1024))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    web.run_app(_create_app(args.engines, args.concurrency, args.queue_size, args.max_upload_mb * 1024 * 1024),
+                host=args.host, port=args.port)
@@ -0,0 +1,120 @@
+import io
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Type
+
+from stream_io import WorkbookSource
+
+class Converter:
+    """
+    Common interface of the Excel to PDF engines.
+    エンジン固有のモジュールは重い依存関係（JVM、.NETランタイム、pandas）を読み込むため、
+    各メソッドの中で遅延インポートします。
+    """
+    name = ""
+
+    def setup(self) -> None:
+        """
+        プロセスごとに一度だけ必要な初期化（JVMの起動など）を行う
+        """
+
+    def convert(self, excel_file: str, **kwargs) -> Optional[str]:
+        """
+        Converts `excel_file` to PDF and returns the output path, or None on failure.
+        kwargs（cache, sheets, workers, metrics など）はそのままエンジンに渡されます。
+        """
+        raise NotImplementedError
+
+    def convert_stream(self, source: WorkbookSource, output: BinaryIO, **kwargs) -> None:
+        """
+        Converts a workbook given as bytes or a binary stream and writes the PDF to `output`.
+        ファイルを読み書きしないため、読み取り専用のコンテナでも使えます。失敗した場合は例外を送出します。
+        """
+        raise NotImplementedError
+
+    def convert_bytes(self, source: WorkbookSource, **kwargs) -> bytes:
+        """
+        Converts a workbook given as bytes or a binary stream and returns the PDF as bytes.
+        """
+        output = io.BytesIO()
+        self.convert_stream(source, output, **kwargs)
+        return output.getvalue()
+
+class AsposeConverter(Converter):
+    name = "aspose"
+
+    def setup(self) -> None:
+        from aspose_excel_to_pdf import start_jvm
+        start_jvm()
+
+    def convert(self, excel_file: str, **kwargs) -> Optional[str]:
+        from aspose_excel_to_pdf import excel_to_pdf_aspose
+        return excel_to_pdf_aspose(excel_file, **kwargs)
+
+    def convert_stream(self, source: WorkbookSource, output: BinaryIO, **kwargs) -> None:
+        from aspose_excel_to_pdf import excel_stream_to_pdf_aspose
+        excel_stream_to_pdf_aspose(source, output, **kwargs)
+
+class SpireConverter(Converter):
+    name = "spire"
+
+    def convert(self, excel_file: str, **kwargs) -> Optional[str]:
+        from spirexls_excel_to_pdf import excel_to_pdf_spire
+        return excel_to_pdf_spire(excel_file, **kwargs)
+
+    def convert_stream(self, source: WorkbookSource, output: BinaryIO, **kwargs) -> None:
+        from spirexls_excel_to_pdf import excel_stream_to_pdf_spire
+        excel_stream_to_pdf_spire(source, output, **kwargs)
+
+class PdfkitConverter(Converter):
+    name = "pdfkit"
+
+    def __init__(self, output_dir: str = "output"):
+        self.output_dir = output_dir
+
+    def convert(self, excel_file: str, **kwargs) -> Optional[str]:
+        from excel_to_pdf import excel_to_pdf
+        Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+        kwargs.setdefault("output_dir", self.output_dir)
+        try:
+            return excel_to_pdf(excel_file, **kwargs)
+        except Exception as e:
+            print(f"PDF変換に失敗しました: {e}")
+            return None
+
+    def convert_stream(self, source: WorkbookSource, output: BinaryIO, **kwargs) -> None:
+        from excel_to_pdf import excel_stream_to_pdf
+        excel_stream_to_pdf(source, output, **kwargs)
+
+class ReportlabConverter(Converter):
+    name = "reportlab"
+
+    def __init__(self, output_dir: str = "output"):
+        self.output_dir = output_dir
+
+    def setup(self) -> None:
+        # 日本語フォントの検索と登録を最初の変換から外す
+        from reportlab_excel_to_pdf import register_cjk_font
+        register_cjk_font()
+
+    def convert(self, excel_file: str, **kwargs) -> Optional[str]:
+        from reportlab_excel_to_pdf import excel_to_pdf_reportlab
+        kwargs.setdefault("output_dir", self.output_dir)
+        return excel_to_pdf_reportlab(excel_file, **kwargs)
+
+    def convert_stream(self, source: WorkbookSource, output: BinaryIO, **kwargs) -> None:
+        from reportlab_excel_to_pdf import excel_stream_to_pdf_reportlab
+        excel_stream_to_pdf_reportlab(source, output, **kwargs)
+
+ENGINES: Dict[str, Type[Converter]] = {
+    converter.name: converter
+    for converter in (AsposeConverter, SpireConverter, PdfkitConverter, ReportlabConverter)
+}
+
+def get_converter(name: str) -> Converter:
+    """
+    Returns a converter instance for the engine `name`.
+    """
+    try:
+        return ENGINES[name]()
+    except KeyError:
+        raise ValueError(f"不明なエンジンです: {name}（利用可能: {', '.join(ENGINES)}）") from None
@@ -1,61 +1,474 @@
+import functools
+import html
+import io
+import logging
+import os
+import subprocess
+import time
+import tempfile
 import pandas as pd
 import pdfkit
 from pathlib import Path
+from typing import BinaryIO, List, Optional, Sequence, TextIO, Tuple, Union
 
-def excel_to_pdf(excel_file):
-    # Excelファイルを読み込む
-    df = pd.read_excel(excel_file)
-    
-    # HTMLに変換
-    html_content = df.to_html(index=False)
-    
-    # スタイルを追加
-    styled_html = f"""
+from conversion_cache import ConversionCache
+from conversion_metrics import ConversionMetrics, pdf_page_count
+from incremental import render_incremental
+from multi_sheet import (SheetSelection, merge_pdfs_with_bookmarks, parse_sheet_selection, render_parts_parallel,
+                         resolve_sheet_indices, split_pdf_by_outline)
+from output_profiles import OUTPUT_PROFILES, PDFKIT_PROFILE_OPTIONS, check_output_profile
+from stream_io import WorkbookSource, as_binary_stream, stream_metrics
+
+# 出力先ディレクトリ（Dockerコンテナ内の/app/output）
+OUTPUT_DIR = "/app/output"
+
+# ストリーミングモードで一度に書き出す行数
+STREAMING_CHUNK_ROWS = 1000
+
+# バッチモードで1回のwkhtmltopdfに渡す文書数
+RENDER_BATCH_SIZE = 20
+
+# PDFに変換する際のオプション（フォントを指定）
+PDFKIT_OPTIONS = {
+    'encoding': "UTF-8",
+    'custom-header': [
+        ('Content-Encoding', 'utf-8')
+    ],
+}
+
+# 表の前後に置くHTML（スタイル、見出し、フッター）
+HTML_HEADER = """
     <html>
         <head>
             <style>
-                table {{
+                table {
                     border-collapse: collapse;
                     width: 100%;
-                }}
-                th, td {{
+                }
+                th, td {
                     border: 1px solid black;
                     padding: 8px;
                     text-align: left;
-                }}
-                th {{
+                }
+                th {
                     background-color: #f2f2f2;
-                }}
+                }
             </style>
             <meta charset="UTF-8">
         </head>
         <body style="font-family: IPAGothic, IPA Mincho;">
             <h1 style="text-align: center;">従業員情報一覧</h1>
             <p style="text-align: right;">作成日: 2025年2月22日</p>
-            {html_content}
+            """
+
+HTML_FOOTER = """
             <p style="margin-top: 20px;">※この文書は自動生成されています。</p>
         </body>
     </html>
     """
 
-    # 出力ファイル名を設定（/app/outputディレクトリに保存）
-    output_pdf = f"/app/output/{Path(excel_file).stem}.pdf"
+def _format_cell(value) -> str:
+    if value is None:
+        return ""
+    return html.escape(str(value))
+
+def write_streaming_table(excel_file: Union[str, BinaryIO], out: TextIO, chunk_rows: int = STREAMING_CHUNK_ROWS,
+                          sheet_index: int = 0) -> int:
+    """
+    Writes a sheet (the first one by default) as an HTML table to `out`, reading rows in chunks.
+    openpyxlの読み取り専用モードで1行ずつ読み込むため、シート全体をメモリに載せません。
+    書き出したデータ行数を返します。
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[sheet_index].iter_rows(values_only=True)
+        header = next(rows, None)
+
+        out.write('<table border="1" class="dataframe">\n')
+        if header is not None:
+            out.write("<thead><tr>")
+            out.write("".join(f"<th>{_format_cell(value)}</th>" for value in header))
+            out.write("</tr></thead>\n")
+        out.write("<tbody>\n")
+
+        row_count = 0
+        chunk = []
+        for row in rows:
+            chunk.append("<tr>" + "".join(f"<td>{_format_cell(value)}</td>" for value in row) + "</tr>")
+            if len(chunk) >= chunk_rows:
+                out.write("\n".join(chunk) + "\n")
+                row_count += len(chunk)
+                chunk.clear()
+        if chunk:
+            out.write("\n".join(chunk) + "\n")
+            row_count += len(chunk)
+
+        out.write("</tbody>\n</table>")
+        return row_count
+    finally:
+        workbook.close()
+
+# HTMLエスケープの変換表（html.escape と同じ5文字）
+_HTML_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})
+
+def _column_cells(column: pd.Series) -> list:
+    """
+    列全体を Series.astype(str) で文字列に変換し、Series.str.translate でまとめてHTMLエスケープする（欠損値は空欄）
+    """
+    cells = column.astype(str)
+    # 数値・日付・真偽値の列はエスケープが必要な文字を含まない
+    if column.dtype.kind not in "biufcmM" and cells.str.contains(r"[&<>\"']", regex=True).any():
+        cells = cells.str.translate(_HTML_ESCAPES)
+    return cells.where(column.notna(), "").tolist()
+
+def write_dataframe_table(df: pd.DataFrame, out: TextIO, chunk_rows: int = STREAMING_CHUNK_ROWS) -> int:
+    """
+    Writes a DataFrame as an HTML table to `out`, converting and escaping one whole column at a time.
+    DataFrame.to_html と違いセルごとの書式処理を行わないため、行数・列数の多い表でも高速です。
+    chunk_rows 行ずつ書き出し、書き出したデータ行数を返します。
+    """
+    out.write('<table border="1" class="dataframe">\n')
+    out.write("<thead><tr>")
+    out.write("".join(f"<th>{_format_cell(name)}</th>" for name in df.columns))
+    out.write("</tr></thead>\n<tbody>\n")
+
+    if df.shape[1] > 0:
+        columns = [_column_cells(df.iloc[:, i]) for i in range(df.shape[1])]
+        for start in range(0, len(df), chunk_rows):
+            rows = zip(*(column[start:start + chunk_rows] for column in columns))
+            out.write("<tr><td>" + "</td></tr>\n<tr><td>".join(map("</td><td>".join, rows)) + "</td></tr>\n")
+
+    out.write("</tbody>\n</table>")
+    return len(df)
+
+def _write_sheet_html(excel_file: str, html_file: str, streaming: bool, sheet_index: int,
+                      metrics: ConversionMetrics) -> None:
+    """
+    1シートを見出し・フッター付きのHTMLファイルに書き出す（HTML全体を1つの文字列にしない）
+    """
+    df = None
+    if not streaming:
+        # Excelファイルを読み込む
+        with metrics.phase("load"):
+            df = pd.read_excel(excel_file, sheet_name=sheet_index)
+
+    with metrics.phase("render_html"):
+        with open(html_file, "w", encoding="utf-8") as out:
+            out.write(HTML_HEADER)
+            if streaming:
+                # 読み込みとHTML生成は同時に行われる
+                write_streaming_table(excel_file, out, sheet_index=sheet_index)
+            else:
+                write_dataframe_table(df, out)
+            out.write(HTML_FOOTER)
+
+def _render_sheet_pdf(excel_file: str, output_pdf: str, streaming: bool, sheet_index: int = 0,
+                      metrics: Optional[ConversionMetrics] = None, pdfkit_options: dict = PDFKIT_OPTIONS) -> str:
+    """
+    1シートをHTML経由でPDFに変換する
+    """
+    metrics = metrics or ConversionMetrics("pdfkit", excel_file)
+    # HTMLを一時ファイルに少しずつ書き出してwkhtmltopdfに渡す
+    fd, html_file = tempfile.mkstemp(suffix=".html")
+    os.close(fd)
+    try:
+        _write_sheet_html(excel_file, html_file, streaming, sheet_index, metrics)
+        with metrics.phase("save"):
+            pdfkit.from_file(html_file, output_pdf, options=pdfkit_options)
+    finally:
+        os.unlink(html_file)
+    return output_pdf
+
+def _render_sheet_task(task: Tuple[str, str, bool, int, dict]) -> str:
+    excel_file, output_pdf, streaming, sheet_index, pdfkit_options = task
+    return _render_sheet_pdf(excel_file, output_pdf, streaming, sheet_index, pdfkit_options=pdfkit_options)
 
-    # PDFに変換（オプションでフォントを指定）
-    options = {
-        'encoding': "UTF-8",
-        'custom-header': [
-            ('Content-Encoding', 'utf-8')
-        ],
-    }
-    pdfkit.from_string(styled_html, output_pdf, options=options)
+def profile_pdfkit_options(output_profile: str) -> dict:
+    """
+    Returns the wkhtmltopdf options for an output profile ("archive" is not supported).
+    """
+    check_output_profile(output_profile)
+    if output_profile not in PDFKIT_PROFILE_OPTIONS:
+        raise ValueError(f"pdfkit（wkhtmltopdf）は出力プロファイル {output_profile} に対応していません")
+    return {**PDFKIT_OPTIONS, **PDFKIT_PROFILE_OPTIONS[output_profile]}
+
+def excel_to_pdf(excel_file, cache: Optional[ConversionCache] = None, streaming: bool = False,
+                 output_dir: str = OUTPUT_DIR, sheets: Optional[SheetSelection] = None,
+                 workers: Optional[int] = None, metrics: Optional[ConversionMetrics] = None, incremental: bool = False,
+                 output_profile: str = "default"):
+    """
+    Converts the first sheet of an Excel file to PDF via HTML and wkhtmltopdf.
+    streaming=True の場合は行を分割して読み込み、HTMLを一時ファイルに書き出してからwkhtmltopdfに渡します。
+    巨大なシートでもメモリ使用量がほぼ一定になります。
+    sheets に "all" またはシート名／インデックスの並びを指定すると、シートごとに並列で変換して1つのPDFに結合します。
+    フェーズごとの所要時間は metrics（省略時は新規作成）に記録されます。
+    incremental=True では、表示されているすべてのシート（または sheets で指定したシート）のうち
+    前回から変更されたシートだけを変換し、変更のないシートはキャッシュ済みの断片を結合します。
+    output_profile に "fast" または "min-size" を指定すると、対応するwkhtmltopdfのオプションを追加します
+    （wkhtmltopdfはPDF/Aを出力できないため "archive" は指定できません）。
+    """
+    metrics = metrics or ConversionMetrics("pdfkit", excel_file)
+    metrics.extra["output_profile"] = output_profile
+    pdfkit_options = profile_pdfkit_options(output_profile)
+    render_options = {**pdfkit_options, "streaming": True} if streaming else pdfkit_options
+
+    # 出力ファイル名を設定（既定では/app/outputディレクトリに保存）
+    output_pdf = f"{output_dir}/{Path(excel_file).stem}.pdf"
+
+    # 入力内容が変わっていなければキャッシュ済みPDFを使う
+    cache_key = None
+    if cache is not None:
+        cache_options = render_options
+        if sheets is not None:
+            cache_options = {**cache_options, "sheets": sheets}
+        if incremental:
+            cache_options = {**cache_options, "incremental": True}
+        with metrics.phase("cache_lookup"):
+            cache_key = cache.key(excel_file, "pdfkit", cache_options)
+            metrics.cache_hit = cache.fetch(cache_key, output_pdf)
+        if metrics.cache_hit:
+            print(f"Created PDF (cached): {output_pdf}")
+            metrics.finish("cached")
+            return output_pdf
+
+    try:
+        created_pdf = None
+        if incremental:
+            # 変更されたシートだけを変換し、変更のないシートは前回の断片を使う
+            created_pdf = render_incremental(
+                excel_file, output_pdf, "pdfkit", _render_sheet_task,
+                lambda index, part_pdf: (excel_file, part_pdf, streaming, index, pdfkit_options),
+                cache, sheets, workers, render_options, use_processes=False, metrics=metrics,
+            )
+        if created_pdf is None and sheets is None:
+            _render_sheet_pdf(excel_file, output_pdf, streaming, metrics=metrics, pdfkit_options=pdfkit_options)
+            metrics.sheet_count = 1
+        elif created_pdf is None:
+            # シートごとにwkhtmltopdfを並列で実行し、しおり付きで結合する
+            sheet_names = pd.ExcelFile(excel_file).sheet_names
+            indices = resolve_sheet_indices(sheet_names, sheets)
+            metrics.sheet_count = len(indices)
+            with metrics.phase("save"), tempfile.TemporaryDirectory() as temp_dir:
+                tasks = [(excel_file, str(Path(temp_dir) / f"sheet_{index}.pdf"), streaming, index, pdfkit_options)
+                         for index in indices]
+                part_pdfs = render_parts_parallel(_render_sheet_task, tasks, workers, use_processes=False)
+                merge_pdfs_with_bookmarks(
+                    [(sheet_names[index], part_pdf) for index, part_pdf in zip(indices, part_pdfs)], output_pdf
+                )
+    except Exception as e:
+        metrics.finish("error", str(e))
+        raise
+
+    if cache_key is not None:
+        cache.store(cache_key, output_pdf)
+    metrics.page_count = pdf_page_count(output_pdf)
+    metrics.finish("success")
     print(f"Created PDF: {output_pdf}")
+    return output_pdf
+
+@functools.lru_cache(maxsize=1)
+def wkhtmltopdf_supports_outline() -> bool:
+    """
+    Returns True when the installed wkhtmltopdf is built with patched Qt and can write an outline.
+    ディストリビューションのパッケージなど patched Qt でないビルドは --outline を警告だけで無視するため、
+    まとめて描画したPDFを文書ごとに分けられません。確認は1プロセスにつき1回だけ行います。
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        executable = pdfkit.configuration().wkhtmltopdf
+        executable = executable.decode("utf-8") if isinstance(executable, bytes) else executable
+        version = subprocess.run([executable, "--version"], capture_output=True, text=True, timeout=30).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"wkhtmltopdfのバージョンを確認できないため、1件ずつ描画します: {e}")
+        return False
+    if "with patched qt" not in version.lower():
+        logger.warning(f"wkhtmltopdfが patched Qt 版でないため（{version.strip()}）、しおりで文書を分けられません。"
+                       "まとめて描画せず1件ずつ描画します")
+        return False
+    return True
+
+def _batch_pdfkit_options(pdfkit_options: dict) -> dict:
+    """
+    まとめて描画したPDFを文書ごとに分けるため、各文書の見出し（h1）をトップレベルのしおりとして出力させる
+    """
+    options = {name: value for name, value in pdfkit_options.items() if name != "no-outline"}
+    options.update({"outline": None, "outline-depth": "1"})
+    return options
+
+def _render_each(excel_files: Sequence[str], output_pdfs: Sequence[str], html_files: Sequence[str],
+                 metrics_list: Sequence[ConversionMetrics], batch: Sequence[int], pdfkit_options: dict,
+                 created: List[Optional[str]]) -> None:
+    """
+    batch の文書を1回のwkhtmltopdfにつき1件ずつ描画する
+    """
+    for index in batch:
+        metrics = metrics_list[index]
+        try:
+            with metrics.phase("save"):
+                pdfkit.from_file(html_files[index], output_pdfs[index], options=pdfkit_options)
+        except Exception as render_error:
+            print(f"PDF変換に失敗しました: {excel_files[index]}: {render_error}")
+            metrics.finish("error", str(render_error))
+            continue
+        created[index] = output_pdfs[index]
+        metrics.sheet_count = 1
+        metrics.page_count = pdf_page_count(output_pdfs[index])
+        metrics.finish("success")
+
+def _render_batch(excel_files: Sequence[str], output_pdfs: Sequence[str], streaming: bool, pdfkit_options: dict,
+                  temp_dir: str, combine: bool = True) -> List[Optional[str]]:
+    """
+    複数の文書のHTMLを1回のwkhtmltopdfで描画し、しおりの位置で文書ごとのPDFに分ける
+    combine=False の場合（しおりを出力できないwkhtmltopdf）は、HTMLを作った後に1件ずつ描画する
+    """
+    logger = logging.getLogger(__name__)
+    metrics_list = [ConversionMetrics("pdfkit", excel_file) for excel_file in excel_files]
+    html_files: List[Optional[str]] = []
+    for index, (excel_file, metrics) in enumerate(zip(excel_files, metrics_list)):
+        html_file = str(Path(temp_dir) / f"document_{index}.html")
+        try:
+            _write_sheet_html(excel_file, html_file, streaming, 0, metrics)
+            html_files.append(html_file)
+        except Exception as e:
+            print(f"PDF変換に失敗しました: {excel_file}: {e}")
+            metrics.finish("error", str(e))
+            html_files.append(None)
+
+    # HTMLを作れた文書だけを描画する
+    batch = [index for index, html_file in enumerate(html_files) if html_file is not None]
+    created: List[Optional[str]] = [None] * len(excel_files)
+    if len(batch) <= 1 or not combine:
+        _render_each(excel_files, output_pdfs, html_files, metrics_list, batch, pdfkit_options, created)
+        return created
+    combined_pdf = str(Path(temp_dir) / "batch.pdf")
+    start_time = time.perf_counter()
+    try:
+        pdfkit.from_file([html_files[index] for index in batch], combined_pdf, options=_batch_pdfkit_options(pdfkit_options))
+        page_counts = split_pdf_by_outline(combined_pdf, [output_pdfs[index] for index in batch])
+    except Exception as e:
+        # 1つの文書のせいでまとめて描画・分割できない場合は、1件ずつ描画して失敗した文書だけを特定する
+        logger.warning(f"{len(batch)}件をまとめて描画できないため、1件ずつ描画します: {e}")
+        _render_each(excel_files, output_pdfs, html_files, metrics_list, batch, pdfkit_options, created)
+        return created
+
+    # wkhtmltopdfの起動と描画の時間は、まとめた文書で均等に分ける
+    shared_duration = (time.perf_counter() - start_time) / len(batch)
+    for index, page_count in zip(batch, page_counts):
+        metrics = metrics_list[index]
+        metrics.phases["save"] = shared_duration
+        metrics.sheet_count = 1
+        metrics.page_count = page_count
+        metrics.extra["render_batch_size"] = len(batch)
+        metrics.finish("success")
+        created[index] = output_pdfs[index]
+    return created
+
+def excel_files_to_pdf(excel_files: Sequence[str], cache: Optional[ConversionCache] = None, streaming: bool = False,
+                       output_dir: str = OUTPUT_DIR, batch_size: int = RENDER_BATCH_SIZE,
+                       output_profile: str = "default") -> List[Optional[str]]:
+    """
+    Converts the first sheet of many Excel files, rendering up to `batch_size` documents per wkhtmltopdf run.
+    wkhtmltopdfの起動（Qt/WebKitの初期化とフォントの読み込み）は1回の実行ごとに一度だけなので、
+    小さな文書を大量に変換する場合は1件あたりの時間が起動時間ではなく描画時間で決まるようになります。
+    まとめて描画したPDFは各文書の見出しのしおりの位置で分け、excel_to_pdf と同じ出力先に保存します。
+    まとめて描画できなかった場合は、その回の文書を1件ずつ描画し直します。
+    しおりの出力には patched Qt 版のwkhtmltopdfが必要で、そうでない場合は警告を1回出して最初から1件ずつ描画します。
+    入力と同じ順序で、作成したPDFのパス（失敗した場合はNone）のリストを返します。
+    """
+    pdfkit_options = profile_pdfkit_options(output_profile)
+    render_options = {**pdfkit_options, "streaming": True} if streaming else pdfkit_options
+    output_pdfs = [f"{output_dir}/{Path(excel_file).stem}.pdf" for excel_file in excel_files]
+    created: List[Optional[str]] = [None] * len(excel_files)
+
+    # キャッシュ済みのファイルは描画しない（キーは excel_to_pdf と共通）
+    to_render = []
+    cache_keys = {}
+    for index, excel_file in enumerate(excel_files):
+        if cache is not None:
+            cache_keys[index] = cache.key(excel_file, "pdfkit", render_options)
+            if cache.fetch(cache_keys[index], output_pdfs[index]):
+                print(f"Created PDF (cached): {output_pdfs[index]}")
+                created[index] = output_pdfs[index]
+                continue
+        to_render.append(index)
+
+    # patched Qt 版でないwkhtmltopdfはしおりを出力できず、まとめて描画しても分けられないため1件ずつ描画する
+    combine = batch_size > 1 and len(to_render) > 1 and wkhtmltopdf_supports_outline()
+    for start in range(0, len(to_render), max(batch_size, 1)):
+        batch = to_render[start:start + max(batch_size, 1)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results = _render_batch([excel_files[index] for index in batch], [output_pdfs[index] for index in batch],
+                                    streaming, pdfkit_options, temp_dir, combine)
+        for index, output_pdf in zip(batch, results):
+            created[index] = output_pdf
+            if output_pdf is not None:
+                if index in cache_keys:
+                    cache.store(cache_keys[index], output_pdf)
+                print(f"Created PDF: {output_pdf}")
+    return created
+
+def excel_stream_to_pdf(source: WorkbookSource, output: BinaryIO, streaming: bool = False,
+                        metrics: Optional[ConversionMetrics] = None, output_profile: str = "default") -> None:
+    """
+    Converts the first sheet of a workbook given as bytes or a binary stream and writes the PDF to `output`.
+    HTMLはメモリ上で組み立ててwkhtmltopdfの標準入力に渡し、PDFは標準出力から受け取るため、ディスクには書き込みません。
+    streaming=True の場合はDataFrameを作らずにopenpyxlで1行ずつHTMLにします（HTML全体はメモリに載ります）。
+    変換に失敗した場合は例外を送出します。
+    """
+    metrics = metrics or stream_metrics("pdfkit", source)
+    metrics.extra["output_profile"] = output_profile
+    try:
+        pdfkit_options = profile_pdfkit_options(output_profile)
+        stream = as_binary_stream(source)
+        page = io.StringIO()
+        df = None
+        if not streaming:
+            with metrics.phase("load"):
+                df = pd.read_excel(stream)
+        with metrics.phase("render_html"):
+            page.write(HTML_HEADER)
+            if streaming:
+                write_streaming_table(stream, page)
+            else:
+                write_dataframe_table(df, page)
+            page.write(HTML_FOOTER)
+        with metrics.phase("save"):
+            # 出力先に False を指定すると、PDFをバイト列で返す
+            output.write(pdfkit.from_string(page.getvalue(), False, options=pdfkit_options))
+    except Exception as e:
+        metrics.finish("error", str(e))
+        raise
+    metrics.sheet_count = 1
+    metrics.finish("success")
 
 if __name__ == "__main__":
+    import argparse
     import sys
-    if len(sys.argv) != 2:
-        print("Usage: python excel_to_pdf.py <excel_file>")
-        sys.exit(1)
-    
-    excel_file = sys.argv[1]
-    excel_to_pdf(excel_file)
+
+    parser = argparse.ArgumentParser(usage="python excel_to_pdf.py <excel_file>... [--streaming] [--sheets all|NAME,...]")
+    parser.add_argument("excel_files", nargs="+", help="変換するExcelファイル（複数指定するとバッチモードで描画する）")
+    parser.add_argument("--streaming", action="store_true", help="行を分割して読み込み、メモリ使用量を抑えて変換する")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help=f"出力先ディレクトリ（既定: {OUTPUT_DIR}）")
+    parser.add_argument("--sheets", type=parse_sheet_selection, default=None,
+                        help="変換するシート（all またはカンマ区切りのシート名／0から始まる番号）")
+    parser.add_argument("--workers", type=int, default=None, help="シートを並列で変換する数")
+    parser.add_argument("--incremental", action="store_true", help="前回から変更されたシートだけを変換する")
+    parser.add_argument("--cache-dir", default=None, help="変換結果キャッシュのディレクトリ（--incremental の既定: cache）")
+    parser.add_argument("--output-profile", choices=[profile for profile in OUTPUT_PROFILES if profile in PDFKIT_PROFILE_OPTIONS],
+                        default="default", help="出力プロファイル（fast: 速度優先、min-size: サイズ優先）")
+    parser.add_argument("--batch-size", type=int, default=RENDER_BATCH_SIZE,
+                        help=f"バッチモードで1回のwkhtmltopdfに渡す文書数（既定: {RENDER_BATCH_SIZE}）")
+    args = parser.parse_args()
+
+    cache = ConversionCache(args.cache_dir) if args.cache_dir else None
+    if len(args.excel_files) > 1:
+        if args.sheets is not None or args.incremental:
+            parser.error("複数のファイルを指定した場合は --sheets・--incremental を使えません")
+        created = excel_files_to_pdf(args.excel_files, cache=cache, streaming=args.streaming, output_dir=args.output_dir,
+                                     batch_size=args.batch_size, output_profile=args.output_profile)
+        sys.exit(0 if all(created) else 1)
+    excel_to_pdf(args.excel_files[0], cache=cache, streaming=args.streaming, output_dir=args.output_dir,
+                 sheets=args.sheets, workers=args.workers, incremental=args.incremental,
+                 output_profile=args.output_profile)
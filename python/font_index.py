@@ -0,0 +1,219 @@
+import functools
+import json
+import logging
+import os
+import struct
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 走査するフォントディレクトリ（環境変数 EXCEL_CONVERTER_FONT_DIRS で上書き可能、区切りは os.pathsep）
+DEFAULT_FONT_DIRS = [
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    "~/.fonts",
+    "~/.local/share/fonts",
+]
+DEFAULT_INDEX_PATH = "~/.cache/excel-converter/font_index.json"
+
+# ワークブックのフォントが見つからない場合に使う日本語フォント（優先順）
+FALLBACK_FAMILIES = [
+    "IPAGothic",
+    "IPAMincho",
+    "IPAexGothic",
+    "IPAexMincho",
+    "VL Gothic",
+    "Noto Sans CJK JP",
+]
+
+FONT_SUFFIXES = (".ttf", ".otf", ".ttc")
+
+# OS/2テーブルの ulCodePageRange1 のビット（17: 日本語JIS, 18: 簡体字, 19: 韓国語, 20: 繁体字）
+_CJK_CODEPAGE_BITS = (17, 18, 19, 20)
+# OS/2テーブルの ulUnicodeRange のビット（49: カタカナ, 59: CJK統合漢字）
+_CJK_UNICODE_BITS = (49, 59)
+
+@dataclass
+class FontEntry:
+    """
+    One font face found on disk.
+    """
+    path: str
+    families: List[str] = field(default_factory=list)
+    cjk: bool = False
+
+def _read_tables(data: bytes, offset: int) -> Dict[bytes, tuple]:
+    num_tables = struct.unpack_from(">H", data, offset + 4)[0]
+    tables = {}
+    for i in range(num_tables):
+        tag, _, table_offset, length = struct.unpack_from(">4sIII", data, offset + 12 + i * 16)
+        tables[tag] = (table_offset, length)
+    return tables
+
+def _read_family_names(data: bytes, table_offset: int) -> List[str]:
+    _, count, string_offset = struct.unpack_from(">HHH", data, table_offset)
+    names = []
+    for i in range(count):
+        platform_id, _, _, name_id, length, offset = struct.unpack_from(">HHHHHH", data, table_offset + 6 + i * 12)
+        # 1: フォントファミリー名, 16: タイポグラフィックファミリー名
+        if name_id not in (1, 16):
+            continue
+        raw = data[table_offset + string_offset + offset:table_offset + string_offset + offset + length]
+        try:
+            name = raw.decode("utf-16-be") if platform_id in (0, 3) else raw.decode("mac_roman")
+        except UnicodeDecodeError:
+            continue
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def _is_cjk(data: bytes, table_offset: int, length: int) -> bool:
+    version = struct.unpack_from(">H", data, table_offset)[0]
+    unicode_ranges = struct.unpack_from(">IIII", data, table_offset + 42)
+    for bit in _CJK_UNICODE_BITS:
+        if unicode_ranges[bit // 32] & (1 << (bit % 32)):
+            return True
+    if version >= 1 and length >= 82:
+        code_page_range = struct.unpack_from(">I", data, table_offset + 78)[0]
+        return any(code_page_range & (1 << bit) for bit in _CJK_CODEPAGE_BITS)
+    return False
+
+def read_font_file(path: str) -> List[FontEntry]:
+    """
+    Reads the family names and CJK coverage of every face in a TTF/OTF/TTC file.
+    名前テーブルとOS/2テーブルだけを読むため、グリフデータは解析しません。
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if data[:4] == b"ttcf":
+        num_fonts = struct.unpack_from(">I", data, 8)[0]
+        offsets = struct.unpack_from(f">{num_fonts}I", data, 12)
+    else:
+        offsets = (0,)
+
+    entries = []
+    for offset in offsets:
+        tables = _read_tables(data, offset)
+        families = _read_family_names(data, tables[b"name"][0]) if b"name" in tables else []
+        cjk = _is_cjk(data, *tables[b"OS/2"]) if b"OS/2" in tables else False
+        entries.append(FontEntry(path, families, cjk))
+    return entries
+
+def _directory_signature(font_dirs: Iterable[str]) -> Dict[str, float]:
+    """
+    フォントディレクトリ（サブディレクトリを含む）の更新時刻。フォントの追加・削除でディレクトリの更新時刻が変わる
+    """
+    signature = {}
+    for font_dir in font_dirs:
+        for root, _, _ in os.walk(font_dir):
+            signature[root] = os.stat(root).st_mtime
+    return signature
+
+class FontIndex:
+    """
+    Index of the fonts installed in the configured directories.
+    一度走査した結果はディレクトリの更新時刻をキーとしてJSONに保存し、変化がなければ次回以降のプロセスでも再利用します。
+    """
+
+    def __init__(self, fonts: List[FontEntry]):
+        self.fonts = fonts
+        self._by_family: Dict[str, List[FontEntry]] = {}
+        for entry in fonts:
+            for family in entry.families:
+                self._by_family.setdefault(family.lower(), []).append(entry)
+
+    @classmethod
+    def load_or_build(cls, font_dirs: Optional[Iterable[str]] = None, index_path: str = DEFAULT_INDEX_PATH) -> "FontIndex":
+        font_dirs = [str(Path(d).expanduser()) for d in (font_dirs or DEFAULT_FONT_DIRS)]
+        font_dirs = [d for d in font_dirs if Path(d).is_dir()]
+        signature = _directory_signature(font_dirs)
+        index_file = Path(index_path).expanduser()
+
+        try:
+            with open(index_file, encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("signature") == signature:
+                return cls([FontEntry(**entry) for entry in saved["fonts"]])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        fonts = []
+        for font_dir in font_dirs:
+            for root, _, files in os.walk(font_dir):
+                for name in sorted(files):
+                    if not name.lower().endswith(FONT_SUFFIXES):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        fonts.extend(read_font_file(path))
+                    except (OSError, struct.error, KeyError) as e:
+                        logger.warning(f"フォントファイルを読み込めません: {path}: {e}")
+        logger.info(f"フォントインデックスを作成しました: {len(fonts)}個のフォント")
+
+        try:
+            index_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = index_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump({"signature": signature, "fonts": [asdict(entry) for entry in fonts]}, f, ensure_ascii=False)
+            os.replace(temp_file, index_file)
+        except OSError as e:
+            logger.warning(f"フォントインデックスを保存できません: {e}")
+        return cls(fonts)
+
+    def find(self, family: str) -> List[FontEntry]:
+        return self._by_family.get(family.lower(), [])
+
+    def fallback_font(self) -> Optional[FontEntry]:
+        """
+        Returns the preferred CJK font used when a workbook's own fonts are missing.
+        """
+        for family in FALLBACK_FAMILIES:
+            entries = self.find(family)
+            if entries:
+                return entries[0]
+        return next((entry for entry in self.fonts if entry.cjk), None)
+
+    def font_paths_for(self, families: Optional[Iterable[str]]) -> List[str]:
+        """
+        Returns the font files for the given families plus one CJK fallback font.
+        families が None（参照フォントが不明）の場合は、優先リストにある日本語フォントをすべて返します。
+        """
+        if families is None:
+            entries = [entry for family in FALLBACK_FAMILIES for entry in self.find(family)]
+        else:
+            entries = [entry for family in families for entry in self.find(family)]
+            fallback = self.fallback_font()
+            if fallback is not None:
+                entries.append(fallback)
+
+        paths = []
+        for entry in entries:
+            if entry.path not in paths:
+                paths.append(entry.path)
+        return paths
+
+@functools.lru_cache(maxsize=1)
+def get_font_index() -> FontIndex:
+    """
+    Returns the process-wide font index, building or loading it on first use.
+    """
+    font_dirs = os.environ.get("EXCEL_CONVERTER_FONT_DIRS")
+    return FontIndex.load_or_build(font_dirs.split(os.pathsep) if font_dirs else None)
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    index = get_font_index()
+    print(f"フォント数: {len(index.fonts)} (日本語・CJK対応: {sum(1 for entry in index.fonts if entry.cjk)})")
+    for entry in index.fonts:
+        print(f"  {'CJK' if entry.cjk else '   '} {', '.join(entry.families)}: {entry.path}")
+    if len(sys.argv) > 1:
+        from xlsx_package import referenced_font_names
+
+        families = referenced_font_names(sys.argv[1])
+        print(f"\n{sys.argv[1]} が参照するフォント: {sorted(families) if families is not None else '不明'}")
+        print(f"使用するフォントファイル: {index.font_paths_for(families)}")
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+from conversion_cache import ConversionCache
+from conversion_metrics import ConversionMetrics
+from multi_sheet import SheetSelection, merge_pdfs_with_bookmarks, render_parts_parallel, resolve_sheet_indices
+from xlsx_package import sheet_fingerprints
+
+def fragment_key(fingerprint: str, engine: str, options: Optional[dict] = None) -> str:
+    """
+    Builds the cache key of one sheet's PDF fragment.
+    """
+    digest = hashlib.sha256(b"fragment")
+    digest.update(fingerprint.encode("ascii"))
+    digest.update(engine.encode("utf-8"))
+    digest.update(json.dumps(options or {}, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+def render_incremental(excel_file: str, output_pdf: str, engine: str, render: Callable,
+                       make_task: Callable[[int, str], tuple], cache: Optional[ConversionCache] = None,
+                       sheets: Optional[SheetSelection] = None, workers: Optional[int] = None,
+                       options: Optional[dict] = None, use_processes: bool = True,
+                       initializer: Optional[Callable] = None,
+                       metrics: Optional[ConversionMetrics] = None) -> Optional[str]:
+    """
+    Renders only the sheets whose fingerprint changed since a previous run and splices in the cached fragments of the rest.
+    シートごとのPDF断片は cache（省略時は既定のキャッシュディレクトリ）に、シートのフィンガープリントをキーとして保存します。
+    sheets を省略すると表示されているすべてのシートが対象です。結合したPDFにはシートごとのしおりが付きます。
+    フィンガープリントを計算できない形式（.xls など）の場合は None を返すので、呼び出し側で通常の変換を行ってください。
+    """
+    metrics = metrics or ConversionMetrics(engine, excel_file)
+    with metrics.phase("fingerprint"):
+        fingerprints = sheet_fingerprints(excel_file)
+    if fingerprints is None:
+        print("この形式のファイルはシートごとの差分を判定できないため、全体を変換します。")
+        return None
+
+    cache = cache if cache is not None else ConversionCache()
+    indices = resolve_sheet_indices([sheet.name for sheet in fingerprints], sheets if sheets is not None else "all")
+    indices = [index for index in indices if fingerprints[index].visible]
+    metrics.sheet_count = len(fingerprints)
+    if not indices:
+        print("出力対象のシートがありません。")
+        return None
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        parts = []
+        tasks = []
+        changed = []
+        with metrics.phase("cache_lookup"):
+            for index in indices:
+                part_pdf = str(Path(temp_dir) / f"sheet_{index}.pdf")
+                key = fragment_key(fingerprints[index].fingerprint, engine, options)
+                if not cache.fetch(key, part_pdf):
+                    tasks.append(make_task(index, part_pdf))
+                    changed.append((key, part_pdf))
+                parts.append((fingerprints[index].name, part_pdf))
+
+        print(f"{len(indices)}シート中{len(tasks)}シートが変更されています。変更されたシートのみ変換します...")
+        with metrics.phase("save"):
+            render_parts_parallel(render, tasks, workers, use_processes, initializer)
+        for key, part_pdf in changed:
+            cache.store(key, part_pdf)
+
+        with metrics.phase("merge"):
+            page_count = merge_pdfs_with_bookmarks(parts, output_pdf)
+    metrics.extra["sheets_rendered"] = len(tasks)
+    metrics.extra["sheets_reused"] = len(indices) - len(tasks)
+    print(f"PDFファイルが作成されました: {output_pdf} ({len(indices)}シート, {page_count}ページ, 再変換 {len(tasks)}シート)")
+    return output_pdf
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from batch_jobs import BatchResult
+from conversion_cache import file_sha256
+
+DEFAULT_MANIFEST_PATH = "output/manifest.sqlite3"
+
+# ジョブの状態: running は変換待ち・変換中（途中で中断された場合もこのまま残る）、success / failed は完了
+# started_at は変換待ちに入った時刻、duration はワーカーでの変換時間
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    input_path TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    options TEXT NOT NULL,
+    input_sha256 TEXT,
+    input_size INTEGER,
+    input_mtime_ns INTEGER,
+    status TEXT NOT NULL,
+    output_pdf TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    started_at REAL,
+    finished_at REAL,
+    duration REAL,
+    PRIMARY KEY (input_path, engine, options)
+)
+"""
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def _snapshot(path: str) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """
+    入力の (SHA-256, 大きさ, 更新日時) を返す。読んでいる間に書き換えられた場合は、次の実行で必ず変換し直すよう None を返す
+    """
+    signature = _signature(path)
+    try:
+        sha256 = file_sha256(path)
+    except OSError:
+        return None, None, None
+    if signature is None or _signature(path) != signature:
+        return None, None, None
+    return (sha256, *signature)
+
+class JobManifest:
+    """
+    Durable record of every file converted by a batch run, stored in SQLite.
+    入力ファイル・エンジン・変換オプションの組ごとに、入力のハッシュ・状態・所要時間・出力先を記録します。
+    1件終わるごとにコミットするため、プロセスやノードが途中で止まっても完了分は失われません。
+    書き込むのはバッチの親プロセスだけです（ワーカーは結果を返すだけ）。
+    """
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH, engine: str = "", options: Optional[dict] = None):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.engine = engine
+        self.options = json.dumps(options or {}, sort_keys=True, default=str)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "JobManifest":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _is_complete(self, excel_file: str) -> bool:
+        row = self._db.execute(
+            "SELECT input_sha256, input_size, input_mtime_ns, output_pdf FROM jobs "
+            "WHERE input_path = ? AND engine = ? AND options = ? AND status = 'success'",
+            (excel_file, self.engine, self.options),
+        ).fetchone()
+        if row is None or not row[3] or not Path(row[3]).exists():
+            return False
+        signature = _signature(excel_file)
+        if signature is None:
+            return False
+        if signature == (row[1], row[2]):
+            return True
+        # 更新日時だけが変わった場合（コピーやtouch）は、内容が同じなら完了のままにする
+        if file_sha256(excel_file) != row[0]:
+            return False
+        with self._db:
+            self._db.execute(
+                "UPDATE jobs SET input_size = ?, input_mtime_ns = ? WHERE input_path = ? AND engine = ? AND options = ?",
+                (*signature, excel_file, self.engine, self.options),
+            )
+        return True
+
+    def pending(self, excel_files: List[str]) -> List[str]:
+        """
+        Returns the files that still need converting: new, changed, failed or interrupted ones.
+        成功として記録されていて、入力が変わっておらず出力PDFも残っているファイルだけを除きます。
+        入力の大きさと更新日時が記録と同じなら、ファイルの内容は読みません。
+        """
+        return [excel_file for excel_file in excel_files if not self._is_complete(excel_file)]
+
+    def resume(self, excel_files: List[str]) -> List[str]:
+        """
+        Returns the pending files and marks them as running.
+        変換待ちにする時点では入力の大きさと更新日時だけを記録し（内容は読まない）、ハッシュは完了時に record で計算します。
+        途中で止まった実行で running のまま残ったファイルも、次の実行で変換し直します。
+        """
+        pending = self.pending(excel_files)
+        if len(pending) < len(excel_files):
+            print(f"ジョブ記録 {self.path}: 完了済みの{len(excel_files) - len(pending)}件をスキップします")
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO jobs (input_path, engine, options, input_sha256, input_size, input_mtime_ns, status, "
+                "attempts, started_at) VALUES (?, ?, ?, NULL, ?, ?, 'running', 1, ?) "
+                "ON CONFLICT (input_path, engine, options) DO UPDATE SET input_sha256 = NULL, "
+                "input_size = excluded.input_size, input_mtime_ns = excluded.input_mtime_ns, status = 'running', "
+                "error = NULL, attempts = attempts + 1, started_at = excluded.started_at, finished_at = NULL, duration = NULL",
+                [(excel_file, self.engine, self.options, *(_signature(excel_file) or (None, None)), now)
+                 for excel_file in pending],
+            )
+        return pending
+
+    def record(self, result: BatchResult) -> None:
+        """
+        Records the outcome of one file.
+        成功した場合は、入力の大きさと更新日時が resume で記録した変換前のものと同じときだけハッシュを計算して残します。
+        変換中に入力が置き換えられていた場合は記録を消し、新しい内容を変換済みとして扱わないようにします。
+        """
+        key = (result.excel_file, self.engine, self.options)
+        snapshot = (None, None, None)
+        if result.ok:
+            queued = self._db.execute(
+                "SELECT input_size, input_mtime_ns FROM jobs WHERE input_path = ? AND engine = ? AND options = ?", key
+            ).fetchone()
+            if queued is not None and queued[0] is not None and _signature(result.excel_file) == tuple(queued):
+                snapshot = _snapshot(result.excel_file)
+                if snapshot[1:] != tuple(queued):
+                    snapshot = (None, None, None)
+        with self._db:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, output_pdf = ?, error = ?, finished_at = ?, duration = ?, "
+                "input_sha256 = ?, input_size = ?, input_mtime_ns = ? "
+                "WHERE input_path = ? AND engine = ? AND options = ?",
+                ("success" if result.ok else "failed", result.output_pdf, result.error,
+                 time.time(), result.duration, *snapshot, *key),
+            )
+
+    def summary(self) -> dict:
+        """
+        Returns the number of jobs in each status for this engine and options.
+        """
+        rows = self._db.execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE engine = ? AND options = ? GROUP BY status",
+            (self.engine, self.options),
+        ).fetchall()
+        return dict(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="バッチ変換のジョブ記録を表示します")
+    parser.add_argument("manifest", nargs="?", default=DEFAULT_MANIFEST_PATH)
+    args = parser.parse_args()
+
+    db = sqlite3.connect(args.manifest)
+    for engine, options, status, count in db.execute(
+            "SELECT engine, options, status, COUNT(*) FROM jobs GROUP BY engine, options, status ORDER BY engine, options"):
+        print(f"{engine:<8} {options:<40} {status:<8} {count:>8}")
+    for input_path, engine, error, attempts in db.execute(
+            "SELECT input_path, engine, error, attempts FROM jobs WHERE status = 'failed' ORDER BY input_path"):
+        print(f"[失敗] {engine} {input_path} ({attempts}回): {error}")
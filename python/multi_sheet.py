@@ -0,0 +1,154 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+# シートの指定: "all"（全シート）、またはシート名／0から始まるインデックスの並び
+SheetSelection = Union[str, Sequence[Union[str, int]]]
+
+# ページ範囲: (0から始まる先頭ページ番号, ページ数)
+PageRange = Tuple[int, int]
+
+# セル範囲（"A1:F40"、"$A$1:$F$40"、"Sheet2!A1:F40"、"'売上 2025'!B2:H30"）
+_CELL_REGION = re.compile(
+    r"^(?:(?P<sheet>'(?:[^']|'')+'|[^!'\s]+)!)?(?P<area>\$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?)$"
+)
+
+def parse_sheet_selection(value: str) -> SheetSelection:
+    """
+    Parses a command-line sheet selection such as "all" or "Sheet1,Sheet3,5".
+    数字のみの要素は0から始まるインデックスとして扱います。
+    """
+    if value.strip().lower() == "all":
+        return "all"
+    selection = []
+    for item in value.split(","):
+        item = item.strip()
+        if item:
+            selection.append(int(item) if item.isdigit() else item)
+    return selection
+
+def resolve_sheet_indices(sheet_names: Sequence[str], selection: SheetSelection) -> List[int]:
+    """
+    Resolves a sheet selection against the workbook's sheet names.
+    存在しないシートが指定された場合は ValueError を送出します。
+    """
+    if isinstance(selection, str):
+        if selection.lower() == "all":
+            return list(range(len(sheet_names)))
+        selection = [selection]
+
+    indices = []
+    for item in selection:
+        if isinstance(item, int):
+            if not 0 <= item < len(sheet_names):
+                raise ValueError(f"シート番号 {item} は範囲外です（シート数: {len(sheet_names)}）")
+            index = item
+        elif item in sheet_names:
+            index = list(sheet_names).index(item)
+        else:
+            raise ValueError(f"シート '{item}' が見つかりません")
+        if index not in indices:
+            indices.append(index)
+    return indices
+
+def parse_page_range(value: str) -> PageRange:
+    """
+    Parses a 1-based page range such as "3" or "1-5" into (page_index, page_count).
+    """
+    first, _, last = value.strip().partition("-")
+    try:
+        first_page = int(first)
+        last_page = int(last) if last else first_page
+    except ValueError:
+        raise ValueError(f"無効なページ範囲です: {value}") from None
+    if first_page < 1 or last_page < first_page:
+        raise ValueError(f"無効なページ範囲です: {value}")
+    return first_page - 1, last_page - first_page + 1
+
+def split_cell_region(region: str) -> Optional[Tuple[Optional[str], str]]:
+    """
+    Splits a cell range such as "A1:F40" or "Sheet2!A1:F40" into (sheet name or None, area).
+    セル範囲の形式でない場合（名前付き範囲など）は None を返します。
+    """
+    match = _CELL_REGION.match(region.strip())
+    if match is None:
+        return None
+    sheet = match.group("sheet")
+    if sheet is not None and sheet.startswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+    return sheet, match.group("area").replace("$", "").upper()
+
+def trim_pdf_pages(pdf_path: str, page_range: PageRange) -> int:
+    """
+    Keeps only the pages of `page_range` in a PDF, in place, and returns the resulting page count.
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    page_index, page_count = page_range
+    reader = PdfReader(pdf_path)
+    writer = PdfWriter()
+    for page in reader.pages[page_index:page_index + page_count]:
+        writer.add_page(page)
+    temp_path = f"{pdf_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        writer.write(f)
+    os.replace(temp_path, pdf_path)
+    return len(writer.pages)
+
+def render_parts_parallel(render: Callable, tasks: Sequence[tuple], workers: Optional[int] = None,
+                          use_processes: bool = True, initializer: Optional[Callable] = None) -> list:
+    """
+    Runs `render(task)` for every task in parallel and returns the results in task order.
+    JVMや.NETランタイムを使うエンジンはプロセス（spawn）で、外部コマンドを呼ぶだけのエンジンはスレッドで並列化します。
+    """
+    if not tasks:
+        return []
+    workers = min(workers or multiprocessing.cpu_count(), len(tasks))
+    if use_processes:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=initializer)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers, initializer=initializer)
+    with executor:
+        return list(executor.map(render, tasks))
+
+def merge_pdfs_with_bookmarks(parts: Sequence[Tuple[str, str]], output_pdf: str) -> int:
+    """
+    Merges (title, pdf_path) parts into one PDF with a bookmark per part.
+    結合後のページ数を返します。
+    """
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for title, pdf_path in parts:
+        writer.append(pdf_path, outline_item=title)
+    with open(output_pdf, "wb") as f:
+        writer.write(f)
+    return len(writer.pages)
+
+def split_pdf_by_outline(pdf_path: str, output_pdfs: Sequence[str]) -> List[int]:
+    """
+    Splits a PDF at its top-level outline entries into `output_pdfs`, one part per entry, and returns the page counts.
+    トップレベルのしおりの数が出力先の数と合わない場合や、しおりのページが昇順でない場合は ValueError を送出します。
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(pdf_path)
+    # 入れ子のしおり（list）は飛ばし、トップレベルの項目だけを使う
+    starts = [reader.get_destination_page_number(item) for item in reader.outline if not isinstance(item, list)]
+    if len(starts) != len(output_pdfs):
+        raise ValueError(f"しおりの数（{len(starts)}）が文書の数（{len(output_pdfs)}）と一致しません")
+    if not starts or starts[0] != 0 or any(later <= earlier for earlier, later in zip(starts, starts[1:])):
+        raise ValueError(f"しおりのページ番号から文書の境界を決められません: {starts}")
+
+    page_counts = []
+    for start, end, output_pdf in zip(starts, starts[1:] + [len(reader.pages)], output_pdfs):
+        writer = PdfWriter()
+        for page in reader.pages[start:end]:
+            writer.add_page(page)
+        with open(output_pdf, "wb") as f:
+            writer.write(f)
+        page_counts.append(end - start)
+    return page_counts
@@ -0,0 +1,33 @@
+from typing import Dict
+
+# 出力プロファイル: PDFの最適化・画像圧縮・フォント埋め込み・準拠規格の組み合わせ
+#   default  : 各エンジンの既定値
+#   fast     : 描画速度を優先（最適化・圧縮を最小限にし、標準フォントは埋め込まない）
+#   min-size : ファイルサイズを優先（画像を再サンプリング・JPEG圧縮し、標準フォントは埋め込まない）
+#   archive  : 長期保存用のPDF/A（すべてのフォントを埋め込む）
+OUTPUT_PROFILES = ("default", "fast", "min-size", "archive")
+
+# min-size で画像を再サンプリングする解像度とJPEG品質
+MIN_SIZE_IMAGE_DPI = 150
+MIN_SIZE_JPEG_QUALITY = 60
+
+# wkhtmltopdf に追加するオプション（PDF/Aには対応していないため archive はない）
+PDFKIT_PROFILE_OPTIONS: Dict[str, dict] = {
+    "default": {},
+    "fast": {"no-pdf-compression": None, "no-outline": None, "disable-javascript": None},
+    "min-size": {"lowquality": None, "image-dpi": str(MIN_SIZE_IMAGE_DPI), "image-quality": str(MIN_SIZE_JPEG_QUALITY)},
+}
+
+def check_output_profile(profile: str) -> None:
+    """
+    Raises ValueError for an unknown output profile name.
+    """
+    if profile not in OUTPUT_PROFILES:
+        raise ValueError(f"不明な出力プロファイルです: {profile}（利用可能: {', '.join(OUTPUT_PROFILES)}）")
+
+def check_mergeable(profile: str) -> None:
+    """
+    シートごとの断片をpypdfで結合するとPDF/Aの準拠が失われるため、archive では複数シート・差分変換を使えない
+    """
+    if profile == "archive":
+        raise ValueError("出力プロファイル archive（PDF/A）は sheets・incremental と同時に指定できません")
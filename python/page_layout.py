@@ -0,0 +1,442 @@
+import argparse
+import json
+import multiprocessing
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from batch_jobs import collect_input_files
+from multi_sheet import split_cell_region
+from xlsx_package import MAIN_NS, is_ooxml_package, worksheet_parts
+
+# 用紙サイズ（pageSetup の paperSize）→ (幅, 高さ) ポイント。一覧にないサイズはA4とみなす
+PAPER_SIZES = {
+    1: (612, 792),     # Letter
+    3: (792, 1224),    # Tabloid
+    5: (612, 1008),    # Legal
+    8: (842, 1191),    # A3
+    9: (595, 842),     # A4
+    11: (420, 595),    # A5
+    12: (729, 1032),   # B4 (JIS)
+    13: (516, 729),    # B5 (JIS)
+}
+DEFAULT_PAPER_SIZE = 9
+
+# Excelの既定値（余白はインチ、行の高さはポイント、列幅は標準フォントの文字数）
+DEFAULT_MARGINS = {"left": 0.7, "right": 0.7, "top": 0.75, "bottom": 0.75}
+DEFAULT_ROW_HEIGHT = 15.0
+DEFAULT_COLUMN_WIDTH = 8.43
+# 列幅（文字数）→ ポイント: 標準フォント（11pt）の数字1文字を7ピクセルとし、96dpiでポイントに換算する
+POINTS_PER_CHARACTER = 7 * 0.75
+MIN_SCALE = 10
+
+_CELL = re.compile(r"^\$?([A-Z]{1,3})?\$?(\d+)?$")
+
+@dataclass
+class SheetLayout:
+    """
+    Page setup, manual page breaks and estimated page count of one worksheet.
+    horizontal_breaks / vertical_breaks は改ページの直前の行・列番号（1から始まる）です。
+    fit_to_pages_wide / fit_to_pages_tall は「次のページ数に合わせて印刷」が無効の場合 None、自動の場合 0 です。
+    """
+    name: str
+    visible: bool
+    paper_size: int = DEFAULT_PAPER_SIZE
+    orientation: str = "portrait"
+    scale: int = 100
+    fit_to_pages_wide: Optional[int] = None
+    fit_to_pages_tall: Optional[int] = None
+    margins: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MARGINS))
+    used_range: Optional[str] = None
+    print_area: Optional[str] = None
+    print_titles: Optional[str] = None
+    horizontal_breaks: List[int] = field(default_factory=list)
+    vertical_breaks: List[int] = field(default_factory=list)
+    estimated_pages: int = 0
+
+@dataclass
+class WorkbookLayout:
+    """
+    Layout of every sheet of a workbook, in workbook order.
+    """
+    excel_file: str
+    sheets: List[SheetLayout]
+
+    @property
+    def estimated_pages(self) -> int:
+        """
+        表示されているシートの推定ページ数の合計
+        """
+        return sum(sheet.estimated_pages for sheet in self.sheets if sheet.visible)
+
+    def to_dict(self) -> dict:
+        result = asdict(self)
+        result["estimated_pages"] = self.estimated_pages
+        return result
+
+def _local_name(tag: str) -> str:
+    return tag[len(MAIN_NS) + 2:] if tag.startswith(f"{{{MAIN_NS}}}") else tag
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index
+
+def _parse_area(area: str) -> Optional[Tuple[int, int, int, int]]:
+    """
+    "B2:H30"、"A:C"、"1:3" を (先頭行, 先頭列, 最終行, 最終列)（1から始まる、省略部分は0）に変換する
+    """
+    bounds = []
+    for reference in area.split(":"):
+        match = _CELL.match(reference.strip().upper())
+        if match is None or not any(match.groups()):
+            return None
+        column, row = match.groups()
+        bounds.append((int(row) if row else 0, _column_index(column) if column else 0))
+    (first_row, first_column), (last_row, last_column) = bounds[0], bounds[-1]
+    return first_row, first_column, last_row, last_column
+
+def _defined_names(workbook: ET.Element) -> Dict[Tuple[str, int], str]:
+    """
+    (組み込みの名前, シート番号) → 参照先。印刷範囲と印刷タイトルだけを対象にする
+    """
+    names = {}
+    element = workbook.find(f"{{{MAIN_NS}}}definedNames")
+    for defined_name in (element if element is not None else []):
+        name = defined_name.get("name", "")
+        if name in ("_xlnm.Print_Area", "_xlnm.Print_Titles") and defined_name.get("localSheetId") is not None:
+            names[(name, int(defined_name.get("localSheetId")))] = (defined_name.text or "").strip()
+    return names
+
+def _areas(reference: Optional[str]) -> List[Tuple[int, int, int, int]]:
+    areas = []
+    for item in (reference or "").split(","):
+        region = split_cell_region(item) or (None, item.rsplit("!", 1)[-1])
+        area = _parse_area(region[1])
+        if area is not None:
+            areas.append(area)
+    return areas
+
+def _count_pages(sizes: Iterable[float], length: float, breaks: Iterable[int] = ()) -> int:
+    """
+    行の高さ（または列幅）を先頭から順に詰め、printable な長さに収まらなくなるごとに改ページした場合のページ数
+    breaks は、その位置（sizes の0から始まる番号）から新しいページを始める手動改ページ
+    """
+    breaks = set(breaks)
+    pages, used = 0, 0.0
+    for index, size in enumerate(sizes):
+        if index in breaks and used > 0:
+            pages, used = pages + 1, 0.0
+        if size <= 0:
+            continue
+        if used > 0 and used + size > length:
+            pages, used = pages + 1, 0.0
+        used += size
+    return pages + (1 if used > 0 else 0)
+
+class _SheetReader:
+    """
+    Reads one worksheet part with iterparse, keeping only what pagination needs.
+    セルの値は読まず、行の高さ・非表示と、行データ以外の要素（印刷設定・列幅・改ページ）だけを取り出します。
+    """
+
+    def __init__(self, archive: zipfile.ZipFile, part: str):
+        self.row_heights: Dict[int, float] = {}
+        self.columns: List[Tuple[int, int, float]] = []
+        self.elements: Dict[str, ET.Element] = {}
+        self.last_row = 0
+        self.last_column = 0
+        self.default_row_height = DEFAULT_ROW_HEIGHT
+        self.default_column_width = DEFAULT_COLUMN_WIDTH
+        self.rows_hidden_by_default = False
+
+        depth = 0
+        with archive.open(part) as f:
+            for event, element in ET.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    continue
+                depth -= 1
+                tag = _local_name(element.tag)
+                if tag == "row":
+                    self._read_row(element)
+                    element.clear()
+                elif depth == 1 and tag != "sheetData":
+                    self.elements[tag] = element
+        self._read_format()
+
+    def _read_row(self, row: ET.Element) -> None:
+        index = int(row.get("r", self.last_row + 1))
+        if len(row):
+            self.last_row = max(self.last_row, index)
+            spans = row.get("spans")
+            if spans and ":" in spans:
+                self.last_column = max(self.last_column, int(spans.split(":")[1]))
+            else:
+                for cell in row:
+                    reference = cell.get("r")
+                    if reference:
+                        self.last_column = max(self.last_column, _column_index(reference.rstrip("0123456789")))
+        if row.get("hidden") in ("1", "true"):
+            self.row_heights[index] = 0.0
+        elif row.get("ht") is not None and row.get("customHeight") in ("1", "true"):
+            self.row_heights[index] = float(row.get("ht"))
+
+    def _read_format(self) -> None:
+        sheet_format = self.elements.get("sheetFormatPr")
+        if sheet_format is not None:
+            self.default_row_height = float(sheet_format.get("defaultRowHeight", DEFAULT_ROW_HEIGHT))
+            self.rows_hidden_by_default = sheet_format.get("zeroHeight") in ("1", "true")
+            if sheet_format.get("defaultColWidth") is not None:
+                self.default_column_width = float(sheet_format.get("defaultColWidth"))
+            elif sheet_format.get("baseColWidth") is not None:
+                self.default_column_width = float(sheet_format.get("baseColWidth")) + 5 / 7
+        columns = self.elements.get("cols")
+        for column in (columns if columns is not None else []):
+            width = 0.0 if column.get("hidden") in ("1", "true") else float(column.get("width", self.default_column_width))
+            self.columns.append((int(column.get("min", 1)), int(column.get("max", 1)), width))
+
+    def row_height(self, row: int) -> float:
+        if row in self.row_heights:
+            return self.row_heights[row]
+        return 0.0 if self.rows_hidden_by_default else self.default_row_height
+
+    def column_width(self, column: int) -> float:
+        for first, last, width in self.columns:
+            if first <= column <= last:
+                return width * POINTS_PER_CHARACTER
+        return self.default_column_width * POINTS_PER_CHARACTER
+
+def _read_page_setup(layout: SheetLayout, elements: Dict[str, ET.Element]) -> None:
+    """
+    シート直下の要素（pageSetup・sheetPr・pageMargins・dimension・改ページ）から印刷設定を読む
+    """
+    page_setup = elements.get("pageSetup")
+    page_setup = page_setup if page_setup is not None else ET.Element("pageSetup")
+    layout.paper_size = int(page_setup.get("paperSize", DEFAULT_PAPER_SIZE))
+    layout.orientation = "landscape" if page_setup.get("orientation") == "landscape" else "portrait"
+    layout.scale = int(page_setup.get("scale", 100))
+    sheet_properties = elements.get("sheetPr")
+    fit_to_page = sheet_properties is not None and any(
+        child.get("fitToPage") in ("1", "true") for child in sheet_properties if child.tag == f"{{{MAIN_NS}}}pageSetUpPr")
+    if fit_to_page:
+        layout.fit_to_pages_wide = int(page_setup.get("fitToWidth", 1))
+        layout.fit_to_pages_tall = int(page_setup.get("fitToHeight", 1))
+    margins = elements.get("pageMargins")
+    if margins is not None:
+        layout.margins = {side: float(margins.get(side, default)) for side, default in DEFAULT_MARGINS.items()}
+    dimension = elements.get("dimension")
+    layout.used_range = dimension.get("ref") if dimension is not None else None
+    layout.horizontal_breaks = _breaks(elements.get("rowBreaks"))
+    layout.vertical_breaks = _breaks(elements.get("colBreaks"))
+
+def _breaks(element: Optional[ET.Element]) -> List[int]:
+    return sorted(int(brk.get("id")) for brk in (element if element is not None else []) if brk.get("id"))
+
+def _inspect_sheet(archive: zipfile.ZipFile, layout: SheetLayout, part: str) -> None:
+    reader = _SheetReader(archive, part)
+    _read_page_setup(layout, reader.elements)
+    layout.estimated_pages = _estimate_pages(layout, reader)
+
+def _estimate_pages(layout: SheetLayout, reader: _SheetReader) -> int:
+    """
+    行の高さ・列幅・用紙・余白・拡大縮小率から、Excelと同じ手順でページ数を見積もる
+    （印刷タイトルの行・列は各ページで繰り返されるため、その分だけ印刷可能な領域を狭める）
+    """
+    width, height = PAPER_SIZES.get(layout.paper_size, PAPER_SIZES[DEFAULT_PAPER_SIZE])
+    if layout.orientation == "landscape":
+        width, height = height, width
+    printable_width = width - (layout.margins["left"] + layout.margins["right"]) * 72
+    printable_height = height - (layout.margins["top"] + layout.margins["bottom"]) * 72
+
+    for first_row, first_column, last_row, last_column in _areas(layout.print_titles):
+        if first_row and not first_column:
+            printable_height -= sum(reader.row_height(row) for row in range(first_row, last_row + 1))
+        elif first_column and not first_row:
+            printable_width -= sum(reader.column_width(column) for column in range(first_column, last_column + 1))
+    if printable_width <= 0 or printable_height <= 0:
+        return 1
+
+    areas = _areas(layout.print_area)
+    if not areas:
+        if reader.last_row == 0 or reader.last_column == 0:
+            return 0
+        areas = [(1, 1, reader.last_row, reader.last_column)]
+
+    pages = 0
+    for first_row, first_column, last_row, last_column in areas:
+        first_row, first_column = first_row or 1, first_column or 1
+        last_row, last_column = last_row or reader.last_row, last_column or reader.last_column
+        heights = [reader.row_height(row) for row in range(first_row, last_row + 1)]
+        widths = [reader.column_width(column) for column in range(first_column, last_column + 1)]
+
+        if layout.fit_to_pages_wide is not None:
+            # 「次のページ数に合わせて印刷」では手動改ページは無視され、指定のページ数に収まるまで縮小される
+            scale = 1.0
+            if layout.fit_to_pages_wide and sum(widths):
+                scale = min(scale, printable_width * layout.fit_to_pages_wide / sum(widths))
+            if layout.fit_to_pages_tall and sum(heights):
+                scale = min(scale, printable_height * layout.fit_to_pages_tall / sum(heights))
+            scale = max(scale, MIN_SCALE / 100)
+            row_breaks, column_breaks = (), ()
+        else:
+            scale = max(layout.scale, MIN_SCALE) / 100
+            row_breaks = [brk - first_row + 1 for brk in layout.horizontal_breaks if first_row <= brk < last_row]
+            column_breaks = [brk - first_column + 1 for brk in layout.vertical_breaks if first_column <= brk < last_column]
+
+        pages_down = _count_pages(heights, printable_height / scale, row_breaks)
+        pages_across = _count_pages(widths, printable_width / scale, column_breaks)
+        pages += pages_down * pages_across
+    return pages
+
+def inspect_workbook(excel_file: str) -> Optional[WorkbookLayout]:
+    """
+    Returns the page setup, page breaks and estimated page count of every sheet, read directly from the package XML.
+    エンジンを起動せず、セルの値も読まないため、描画の前に大量のブックを振り分ける用途に使えます。
+    推定ページ数は行の高さ・列幅からの見積もりで、フォントによる自動調整や図形は考慮しません。
+    .xls など zip 形式でないファイルは解析できないため None を返します。
+    """
+    if not is_ooxml_package(excel_file):
+        return None
+
+    with zipfile.ZipFile(excel_file) as archive:
+        with archive.open("xl/workbook.xml") as f:
+            workbook = ET.parse(f).getroot()
+        defined_names = _defined_names(workbook)
+        parts = set(archive.namelist())
+
+        sheets = []
+        for index, (name, visible, part) in enumerate(worksheet_parts(archive, workbook)):
+            layout = SheetLayout(name, visible, print_area=defined_names.get(("_xlnm.Print_Area", index)),
+                                 print_titles=defined_names.get(("_xlnm.Print_Titles", index)))
+            if part in parts and part.startswith("xl/worksheets/"):
+                _inspect_sheet(archive, layout, part)
+            sheets.append(layout)
+    return WorkbookLayout(excel_file, sheets)
+
+# シートのXMLで行データを囲む要素（名前空間の接頭辞付きで書かれることもある）
+_SHEET_DATA_START = re.compile(rb"<([A-Za-z_][\w.-]*:)?sheetData(\s[^>]*)?(/?)>")
+
+def _sheet_without_data(archive: zipfile.ZipFile, part: str, chunk_size: int = 1024 * 1024) -> bytes:
+    """
+    シートのXMLから sheetData の中身（行とセル）を取り除いたバイト列を返す
+    行データはXMLとして解析せず、終了タグをバイト列のまま探して読み飛ばすため、行数が多くても時間がかからない
+    （印刷設定や改ページの要素は sheetData の後に、dimension は前に書かれる）
+    """
+    head, tail = b"", []
+    end_tag = None
+    carry = b""
+    with archive.open(part) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            if end_tag is None:
+                head += chunk
+                match = _SHEET_DATA_START.search(head)
+                if match is None:
+                    continue
+                if match.group(3):
+                    # 空のシート（<sheetData/>）は取り除くものがない
+                    return head + f.read()
+                end_tag = b"</" + (match.group(1) or b"") + b"sheetData>"
+                chunk, head = head[match.end():], head[:match.end()]
+            if tail:
+                tail.append(chunk)
+                continue
+            data = carry + chunk
+            position = data.find(end_tag)
+            if position < 0:
+                carry = data[-len(end_tag):]
+                continue
+            tail.append(data[position:])
+    return head + b"".join(tail)
+
+def first_sheet_layout(excel_file: str) -> Optional[SheetLayout]:
+    """
+    Returns the page setup and manual page breaks of the first sheet, or None when the file cannot be read without an engine.
+    変換時の情報表示用で、行データは読まないため推定ページ数は計算しません（estimated_pages は 0 のまま）。
+    ページ数の見積もりが必要な場合は inspect_workbook を使ってください。
+    """
+    try:
+        if not is_ooxml_package(excel_file):
+            return None
+        with zipfile.ZipFile(excel_file) as archive:
+            with archive.open("xl/workbook.xml") as f:
+                workbook = ET.parse(f).getroot()
+            sheets = worksheet_parts(archive, workbook)
+            if not sheets:
+                return None
+            name, visible, part = sheets[0]
+            defined_names = _defined_names(workbook)
+            layout = SheetLayout(name, visible, print_area=defined_names.get(("_xlnm.Print_Area", 0)),
+                                 print_titles=defined_names.get(("_xlnm.Print_Titles", 0)))
+            if part in archive.namelist() and part.startswith("xl/worksheets/"):
+                root = ET.fromstring(_sheet_without_data(archive, part))
+                _read_page_setup(layout, {_local_name(child.tag): child for child in root})
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile, ET.ParseError):
+        return None
+    return layout
+
+def print_sheet_layout(layout: SheetLayout) -> None:
+    """
+    変換時の情報表示用に、シートの印刷設定と改ページを表示する
+    """
+    print(f"印刷設定 - 用紙サイズ: {layout.paper_size}")
+    print(f"印刷設定 - 向き: {'横' if layout.orientation == 'landscape' else '縦'}")
+    print(f"印刷設定 - フィット設定: 幅={layout.fit_to_pages_wide}, 高さ={layout.fit_to_pages_tall}")
+    print("\n既存の改ページ情報:")
+    if layout.horizontal_breaks:
+        print("水平改ページ: " + ", ".join(f"行 {row} の後" for row in layout.horizontal_breaks))
+    else:
+        print("水平改ページはありません")
+    if layout.vertical_breaks:
+        print("垂直改ページ: " + ", ".join(f"列 {column} の後" for column in layout.vertical_breaks))
+    else:
+        print("垂直改ページはありません")
+
+def _inspect_for_report(excel_file: str) -> dict:
+    try:
+        layout = inspect_workbook(excel_file)
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile, ET.ParseError) as e:
+        return {"excel_file": excel_file, "error": str(e)}
+    if layout is None:
+        return {"excel_file": excel_file, "error": "zip形式でないため解析できません（.xls など）"}
+    return layout.to_dict()
+
+def inspect_files(excel_files: List[str], workers: Optional[int] = None) -> Iterator[dict]:
+    """
+    Inspects many workbooks on a process pool and yields one JSON-serialisable dict per file, in input order.
+    解析できなかったファイルは {"excel_file": ..., "error": ...} になります。
+    """
+    if len(excel_files) <= 1 or workers == 1:
+        yield from map(_inspect_for_report, excel_files)
+        return
+    with multiprocessing.Pool(processes=workers) as pool:
+        yield from pool.imap(_inspect_for_report, excel_files, chunksize=16)
+
+if __name__ == "__main__":
+    import sys
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Excelファイルを描画せずに、印刷設定・改ページ・推定ページ数を調べます")
+    parser.add_argument("source", nargs="?", default="input", help="入力ファイル、ディレクトリまたはglobパターン（既定: input）")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="ワーカープロセス数（既定: CPUコア数）")
+    parser.add_argument("--json", action="store_true", help="1ファイル1行のJSON（JSON Lines）で出力する")
+    args = parser.parse_args()
+
+    excel_files = [args.source] if Path(args.source).is_file() else collect_input_files(args.source)
+    failed = 0
+    for report in inspect_files(excel_files, args.workers):
+        failed += "error" in report
+        if args.json:
+            print(json.dumps(report, ensure_ascii=False))
+        elif "error" in report:
+            print(f"[失敗] {report['excel_file']}: {report['error']}")
+        else:
+            print(f"{report['excel_file']}: 推定 {report['estimated_pages']}ページ")
+            for sheet in report["sheets"]:
+                hidden = "" if sheet["visible"] else "（非表示）"
+                print(f"  {sheet['name']}{hidden}: {sheet['estimated_pages']}ページ, 用紙 {sheet['paper_size']}, "
+                      f"{sheet['orientation']}, 改ページ 行{len(sheet['horizontal_breaks'])}/列{len(sheet['vertical_breaks'])}")
+    sys.exit(0 if excel_files and failed == 0 else 1)
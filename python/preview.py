@@ -0,0 +1,175 @@
+import argparse
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from conversion_cache import DEFAULT_MAX_BYTES, ConversionCache
+from conversion_metrics import ConversionMetrics
+
+PREVIEW_FORMATS = ("png", "webp")
+PREVIEW_ENGINES = ("aspose", "spire")
+DEFAULT_DPI = 96
+WEBP_QUALITY = 80
+
+# Spire.XLS はページ単位で画像にできないため、改ページがなければこの行数・列数をプレビューの範囲とする
+SPIRE_PREVIEW_ROWS = 50
+SPIRE_PREVIEW_COLUMNS = 12
+
+logger = logging.getLogger(__name__)
+
+def _first_visible_sheet(sheets, is_visible) -> int:
+    return next((index for index, sheet in enumerate(sheets) if is_visible(sheet)), 0)
+
+def render_preview_aspose(excel_file: str, output_png: str, dpi: int = DEFAULT_DPI) -> None:
+    """
+    Renders the first page of the first visible sheet to PNG with Aspose.Cells' SheetRender.
+    ImageOrPrintOptions の page_index/page_count で1ページ目だけを描画します。
+    """
+    from aspose import cells
+    from aspose_excel_to_pdf import load_workbook
+
+    workbook = load_workbook(excel_file, "lean")
+    worksheets = [workbook.worksheets[i] for i in range(len(workbook.worksheets))]
+    worksheet = worksheets[_first_visible_sheet(worksheets, lambda sheet: sheet.is_visible)]
+
+    options = cells.rendering.ImageOrPrintOptions()
+    options.image_type = cells.drawing.ImageType.PNG
+    options.horizontal_resolution = dpi
+    options.vertical_resolution = dpi
+    try:
+        options.page_index = 0
+        options.page_count = 1
+    except Exception as e:
+        logger.warning(f"描画するページを限定できません。シート全体をレイアウトします: {e}")
+    cells.rendering.SheetRender(worksheet, options).to_image(0, output_png)
+
+def render_preview_spire(excel_file: str, output_png: str, dpi: int = DEFAULT_DPI) -> None:
+    """
+    Renders the top-left region of the first visible sheet to PNG with Spire.XLS' Worksheet.ToImage.
+    印刷範囲・最初の改ページがあればそこまで、なければ SPIRE_PREVIEW_ROWS 行 x SPIRE_PREVIEW_COLUMNS 列を描画します。
+    """
+    from spire.xls import Workbook
+    from spirexls_excel_to_pdf import apply_custom_fonts
+
+    workbook = Workbook()
+    apply_custom_fonts(workbook, excel_file)
+    workbook.LoadFromFile(excel_file)
+    try:
+        workbook.ConverterSetting.XDpi = dpi
+        workbook.ConverterSetting.YDpi = dpi
+    except Exception as e:
+        logger.warning(f"解像度を設定できません: {e}")
+
+    worksheets = [workbook.Worksheets[i] for i in range(workbook.Worksheets.Count)]
+    worksheet = worksheets[_first_visible_sheet(worksheets, lambda sheet: sheet.Visibility == 0)]
+    first_row, first_column = worksheet.FirstRow, worksheet.FirstColumn
+    last_row, last_column = worksheet.LastRow, worksheet.LastColumn
+    if worksheet.PageSetup.PrintArea:
+        # 印刷範囲がある場合は最初の範囲だけを対象にする
+        print_range = worksheet.Range[worksheet.PageSetup.PrintArea.split(",")[0]]
+        first_row, first_column = print_range.Row, print_range.Column
+        last_row, last_column = print_range.LastRow, print_range.LastColumn
+    last_row = min(last_row, first_row + SPIRE_PREVIEW_ROWS - 1)
+    last_column = min(last_column, first_column + SPIRE_PREVIEW_COLUMNS - 1)
+    if worksheet.HPageBreaks.Count > 0:
+        last_row = min(last_row, worksheet.HPageBreaks[0].Location.Row - 1)
+    if worksheet.VPageBreaks.Count > 0:
+        last_column = min(last_column, worksheet.VPageBreaks[0].Location.Column - 1)
+
+    image = worksheet.ToImage(first_row, first_column, max(first_row, last_row), max(first_column, last_column))
+    image.Save(output_png)
+
+def _encode_webp(png_file: str, output_webp: str) -> None:
+    from PIL import Image
+
+    with Image.open(png_file) as image:
+        image.save(output_webp, "WEBP", quality=WEBP_QUALITY)
+
+def render_preview(excel_file: str, engine: str = "aspose", dpi: int = DEFAULT_DPI, image_format: str = "png",
+                   output_dir: str = "output", cache: Optional[ConversionCache] = None,
+                   metrics: Optional[ConversionMetrics] = None) -> Optional[str]:
+    """
+    Renders a first-page preview image of a workbook without converting it to PDF.
+    cache を指定すると、入力内容・エンジン・解像度・形式が同じプレビューはキャッシュから返します。
+    WebPはエンジンが出力したPNGをPillowで変換します。作成した画像のパスを返し、失敗した場合はNoneを返します。
+    """
+    if engine not in PREVIEW_ENGINES:
+        raise ValueError(f"プレビューに対応していないエンジンです: {engine}（利用可能: {', '.join(PREVIEW_ENGINES)}）")
+    if image_format not in PREVIEW_FORMATS:
+        raise ValueError(f"対応していない画像形式です: {image_format}（利用可能: {', '.join(PREVIEW_FORMATS)}）")
+
+    metrics = metrics or ConversionMetrics(engine, excel_file)
+    metrics.extra["kind"] = "preview"
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    output_image = str(Path(output_dir) / f"{Path(excel_file).stem}_{engine}_preview.{image_format}")
+
+    cache_key = None
+    if cache is not None:
+        with metrics.phase("cache_lookup"):
+            cache_key = cache.key(excel_file, f"{engine}-preview", {"dpi": dpi, "format": image_format})
+            metrics.cache_hit = cache.fetch(cache_key, output_image)
+        if metrics.cache_hit:
+            metrics.finish("cached")
+            return output_image
+
+    fd, png_file = tempfile.mkstemp(suffix=".png")
+    os.close(fd)
+    try:
+        with metrics.phase("render"):
+            if engine == "aspose":
+                render_preview_aspose(excel_file, png_file, dpi)
+            else:
+                render_preview_spire(excel_file, png_file, dpi)
+        with metrics.phase("encode"):
+            if image_format == "webp":
+                _encode_webp(png_file, output_image)
+            else:
+                os.replace(png_file, output_image)
+    except Exception as e:
+        logger.error(f"プレビューの作成に失敗しました: {excel_file}: {e}")
+        metrics.finish("error", str(e))
+        return None
+    finally:
+        if os.path.exists(png_file):
+            os.unlink(png_file)
+
+    if cache_key is not None:
+        cache.store(cache_key, output_image)
+    metrics.finish("success")
+    return output_image
+
+if __name__ == "__main__":
+    import sys
+
+    from batch_jobs import collect_input_files
+
+    parser = argparse.ArgumentParser(description="Excelファイルの1ページ目のプレビュー画像を作成します")
+    parser.add_argument("source", nargs="?", default="input", help="入力ファイル、ディレクトリまたはglobパターン（既定: input）")
+    parser.add_argument("--engine", choices=PREVIEW_ENGINES, default="aspose")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI, help="解像度（既定: 96）")
+    parser.add_argument("--format", choices=PREVIEW_FORMATS, default="png", help="画像形式")
+    parser.add_argument("--output-dir", default="output", help="出力先ディレクトリ")
+    parser.add_argument("--cache-dir", default=None, help="プレビューキャッシュのディレクトリ（省略時はキャッシュしない）")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="キャッシュの最大サイズ（MB）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.engine == "aspose":
+        from aspose_excel_to_pdf import start_jvm
+        start_jvm()
+
+    cache = ConversionCache(args.cache_dir, args.cache_max_mb * 1024 * 1024) if args.cache_dir else None
+    excel_files = [args.source] if Path(args.source).is_file() else collect_input_files(args.source)
+    failed = 0
+    for excel_file in excel_files:
+        metrics = ConversionMetrics(args.engine, excel_file)
+        output_image = render_preview(excel_file, args.engine, args.dpi, args.format, args.output_dir, cache, metrics)
+        if output_image is None:
+            failed += 1
+            print(f"[失敗] {excel_file}: {metrics.error}")
+        else:
+            source_label = "キャッシュ" if metrics.cache_hit else "作成"
+            print(f"[成功] {excel_file} -> {output_image} ({source_label}, {metrics.total_duration:.2f}秒)")
+    sys.exit(0 if excel_files and failed == 0 else 1)
@@ -0,0 +1,273 @@
+import argparse
+import logging
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from openpyxl.utils.cell import coordinate_to_tuple
+
+from batch_jobs import BatchResult
+from conversion_metrics import ConversionMetrics
+from output_profiles import OUTPUT_PROFILES, check_output_profile
+
+REPORT_ENGINES = ("aspose", "spire")
+
+# 差し込むデータ: 行のリスト、または pandas.DataFrame
+ReportRows = Union[Sequence[Sequence[Any]], "pandas.DataFrame"]
+
+def _python_value(value: Any) -> Any:
+    """
+    pandas の日時（Timestamp）・時間差（Timedelta）をPythonの datetime・timedelta にする（NaTは空欄）
+    """
+    if hasattr(value, "to_pydatetime"):
+        return None if value != value else value.to_pydatetime()
+    if hasattr(value, "to_pytimedelta"):
+        return None if value != value else value.to_pytimedelta()
+    return value
+
+def _rows_to_lists(rows: ReportRows, include_header: bool = False) -> List[List[Any]]:
+    """
+    行データを一括取り込み用の2次元リストにする
+    （DataFrameの欠損値は空欄、NumPyの型はPythonの型、pandasの日時は datetime に変換）
+    """
+    if hasattr(rows, "itertuples"):
+        values = rows.astype(object).where(rows.notna(), None).values.tolist()
+        # 日時・時間差の値は astype(object) の後も pandas のオブジェクトのまま残る（object型の列に混在する場合も）
+        positions = [position for position, dtype in enumerate(rows.dtypes) if dtype.kind in "mMO"]
+        if positions:
+            for row in values:
+                for position in positions:
+                    row[position] = _python_value(row[position])
+        return [list(map(str, rows.columns))] + values if include_header else values
+    return [list(row) for row in rows]
+
+class ReportTemplate:
+    """
+    A styled template workbook loaded once and cloned for every report.
+    テンプレートは最初に一度だけ読み込み、未変更の状態をメモリ上に保持します。レポートごとにその複製へ
+    差し込みデータを一括で取り込み、PDFに描画します（セルを1つずつ書き込むとエンジンの呼び出しが行数×列数回になるため）。
+    データ行の書式は、テンプレートの該当範囲にあらかじめ設定しておいてください。
+    """
+    engine = ""
+
+    def __init__(self, template_file: str, data_start: str = "A2", sheet_index: int = 0):
+        self.template_file = template_file
+        self.sheet_index = sheet_index
+        # 差し込みを始めるセル（1から始まる行・列番号）
+        self.first_row, self.first_column = coordinate_to_tuple(data_start)
+
+    def render(self, rows: ReportRows, output: Union[str, BinaryIO], fields: Optional[Dict[str, Any]] = None,
+               include_header: bool = False, output_profile: str = "default",
+               metrics: Optional[ConversionMetrics] = None) -> None:
+        """
+        Fills a fresh copy of the template and writes the PDF to `output` (a path or a binary stream).
+        fields には単独のセルに入れる値（{"B2": "山田太郎"} など）を、rows には data_start から一括で取り込む行を指定します。
+        DataFrame を渡して include_header=True とすると、列名を見出し行として先に取り込みます。
+        失敗した場合は例外を送出します。
+        """
+        check_output_profile(output_profile)
+        metrics = metrics or ConversionMetrics(self.engine, output if isinstance(output, str) else "<stream>")
+        metrics.extra["output_profile"] = output_profile
+        try:
+            with metrics.phase("clone"):
+                workbook = self._clone()
+            with metrics.phase("fill"):
+                values = _rows_to_lists(rows, include_header)
+                self._fill(workbook, values, fields or {})
+            metrics.extra["rows"] = len(values)
+            with metrics.phase("save"):
+                self._save(workbook, output, output_profile)
+        except Exception as e:
+            metrics.finish("error", str(e))
+            raise
+        metrics.finish("success")
+
+    def _clone(self):
+        raise NotImplementedError
+
+    def _fill(self, workbook, values: List[List[Any]], fields: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _save(self, workbook, output: Union[str, BinaryIO], output_profile: str) -> None:
+        raise NotImplementedError
+
+class AsposeReportTemplate(ReportTemplate):
+    """
+    Aspose.Cells: Workbook.copy でテンプレートを複製し、Cells.import_two_dimension_array で行を取り込みます。
+    """
+    engine = "aspose"
+
+    def __init__(self, template_file: str, data_start: str = "A2", sheet_index: int = 0, load_profile: str = "full"):
+        from aspose_excel_to_pdf import load_workbook, start_jvm
+
+        super().__init__(template_file, data_start, sheet_index)
+        start_jvm()
+        self._pristine = load_workbook(template_file, load_profile)
+
+    def _clone(self):
+        from aspose import cells
+
+        workbook = cells.Workbook()
+        workbook.copy(self._pristine)
+        return workbook
+
+    def _fill(self, workbook, values: List[List[Any]], fields: Dict[str, Any]) -> None:
+        worksheet = workbook.worksheets[self.sheet_index]
+        for address, value in fields.items():
+            worksheet.cells.get(address).put_value(value)
+        if values:
+            # 文字列と数値が混在する行を取り込むため、object型の2次元配列として渡す（Aspose.Cellsの行・列は0から）
+            worksheet.cells.import_two_dimension_array(values, self.first_row - 1, self.first_column - 1)
+
+    def _save(self, workbook, output: Union[str, BinaryIO], output_profile: str) -> None:
+        from aspose import cells
+        from aspose_excel_to_pdf import build_pdf_save_options
+
+        save_options = build_pdf_save_options(output_profile=output_profile)
+        workbook.save(output, save_options if save_options is not None else cells.SaveFormat.PDF)
+
+class SpireReportTemplate(ReportTemplate):
+    """
+    Spire.XLS: テンプレートのバイト列をメモリに保持して LoadFromStream で複製し、Worksheet.InsertArray で行を取り込みます。
+    Spire.XLS にはワークブックを複製するAPIがないため、複製のたびにメモリ上のテンプレートを読み込み直します（ディスクは読みません）。
+    """
+    engine = "spire"
+
+    def __init__(self, template_file: str, data_start: str = "A2", sheet_index: int = 0):
+        super().__init__(template_file, data_start, sheet_index)
+        self._pristine = Path(template_file).read_bytes()
+
+    def _clone(self):
+        from spire.xls import Workbook
+        from spire.xls.common import Stream
+        from spirexls_excel_to_pdf import apply_custom_fonts
+
+        workbook = Workbook()
+        apply_custom_fonts(workbook, self.template_file)
+        workbook.LoadFromStream(Stream(self._pristine))
+        return workbook
+
+    def _fill(self, workbook, values: List[List[Any]], fields: Dict[str, Any]) -> None:
+        worksheet = workbook.Worksheets[self.sheet_index]
+        for address, value in fields.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                worksheet.Range[address].NumberValue = value
+            else:
+                worksheet.Range[address].Text = "" if value is None else str(value)
+        if values:
+            # Spire.XLS の行・列は1から
+            worksheet.InsertArray(values, self.first_row, self.first_column)
+
+    def _save(self, workbook, output: Union[str, BinaryIO], output_profile: str) -> None:
+        from spire.xls import FileFormat
+        from spire.xls.common import Stream
+        from spirexls_excel_to_pdf import apply_output_profile
+
+        apply_output_profile(workbook, output_profile)
+        if isinstance(output, str):
+            workbook.SaveToFile(output, FileFormat.PDF)
+            return
+        pdf_stream = Stream()
+        workbook.SaveToStream(pdf_stream, FileFormat.PDF)
+        output.write(pdf_stream.ToArray())
+
+def load_template(template_file: str, engine: str = "aspose", data_start: str = "A2",
+                  sheet_index: int = 0) -> ReportTemplate:
+    """
+    Loads `template_file` once for the given engine.
+    """
+    if engine == "aspose":
+        return AsposeReportTemplate(template_file, data_start, sheet_index)
+    if engine == "spire":
+        return SpireReportTemplate(template_file, data_start, sheet_index)
+    raise ValueError(f"テンプレートに対応していないエンジンです: {engine}（利用可能: {', '.join(REPORT_ENGINES)}）")
+
+# ワーカープロセスごとのテンプレート（_init_workerで読み込む）
+_template: Optional[ReportTemplate] = None
+_output_profile = "default"
+
+def _init_worker(template_file: str, engine: str, data_start: str, sheet_index: int, output_profile: str) -> None:
+    global _template, _output_profile
+    _template = load_template(template_file, engine, data_start, sheet_index)
+    _output_profile = output_profile
+
+def _render_one(task: Tuple[str, str, List[List[Any]], Dict[str, Any]]) -> BatchResult:
+    name, output_pdf, rows, fields = task
+    start_time = time.perf_counter()
+    try:
+        _template.render(rows, output_pdf, fields, output_profile=_output_profile)
+        error = None
+    except Exception as e:
+        error = str(e)
+    return BatchResult(name, output_pdf if error is None else None, time.perf_counter() - start_time, error)
+
+def generate_reports(template_file: str, reports: Iterable[Tuple[str, ReportRows, Dict[str, Any]]], output_dir: str,
+                     engine: str = "aspose", data_start: str = "A2", sheet_index: int = 0,
+                     workers: Optional[int] = None, output_profile: str = "default") -> List[BatchResult]:
+    """
+    Renders many reports from one template on a pool of worker processes.
+    reports は (出力ファイル名の元になる名前, 行データ, 単独セルの値) の並びです。
+    各ワーカーは起動時にテンプレートを一度だけ読み込み、レポートごとにメモリ上で複製して使います。
+    """
+    check_output_profile(output_profile)
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    tasks = ((name, str(Path(output_dir) / f"{name}.pdf"), _rows_to_lists(rows), fields) for name, rows, fields in reports)
+
+    results = []
+    # JVM・.NETランタイムはforkに対応していないため、ワーカーはspawnで起動する
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers, initializer=_init_worker,
+                      initargs=(template_file, engine, data_start, sheet_index, output_profile)) as pool:
+        for result in pool.imap_unordered(_render_one, tasks, chunksize=16):
+            results.append(result)
+            if result.error:
+                logging.getLogger(__name__).error(f"{result.excel_file}: {result.error}")
+    return results
+
+def reports_from_table(data_file: str, group_by: str, field_cells: Dict[str, str]) -> Iterable[Tuple[str, ReportRows, Dict[str, Any]]]:
+    """
+    Splits a CSV or Excel table into one report per value of `group_by`.
+    field_cells は {"列名": "セル"} の対応で、各グループの先頭行の値を単独のセルに入れます。
+    取り込む行からは group_by と field_cells の列を除きます。
+    """
+    import pandas as pd
+
+    table = pd.read_csv(data_file) if data_file.lower().endswith(".csv") else pd.read_excel(data_file)
+    detail_columns = [column for column in table.columns if column != group_by and column not in field_cells]
+    for key, group in table.groupby(group_by, sort=False):
+        first = group.iloc[0]
+        fields = {cell: first[column].item() if hasattr(first[column], "item") else _python_value(first[column])
+                  for column, cell in field_cells.items()}
+        yield str(key), group[detail_columns], fields
+
+def _parse_field(value: str) -> Tuple[str, str]:
+    column, separator, cell = value.partition("=")
+    if not separator or not column or not cell:
+        raise argparse.ArgumentTypeError(f"列名=セル の形式で指定してください: {value}")
+    return column, cell
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="テンプレートのワークブックにデータを差し込んで、グループごとにPDFを作成します")
+    parser.add_argument("template_file", help="書式設定済みのテンプレート（.xlsx）")
+    parser.add_argument("data_file", help="差し込むデータ（.csv または .xlsx）")
+    parser.add_argument("--group-by", required=True, help="この列の値ごとに1つのPDFを作成する（例: 社員番号）")
+    parser.add_argument("--field", type=_parse_field, action="append", default=[],
+                        help="単独のセルに入れる列（列名=セル、例: 氏名=B2）。複数指定可")
+    parser.add_argument("--data-start", default="A5", help="明細行を取り込み始めるセル（既定: A5）")
+    parser.add_argument("--sheet-index", type=int, default=0, help="差し込むシート（0から始まる番号）")
+    parser.add_argument("--engine", choices=REPORT_ENGINES, default="aspose")
+    parser.add_argument("--workers", type=int, default=None, help="ワーカープロセス数（既定: CPUコア数）")
+    parser.add_argument("--output-dir", default="output/reports", help="出力先ディレクトリ")
+    parser.add_argument("--output-profile", choices=OUTPUT_PROFILES, default="default")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    results = generate_reports(args.template_file, reports_from_table(args.data_file, args.group_by, dict(args.field)),
+                               args.output_dir, args.engine, args.data_start, args.sheet_index, args.workers,
+                               args.output_profile)
+    elapsed = time.perf_counter() - start_time
+    failed = sum(1 for result in results if result.error)
+    print(f"{len(results)}件のレポートを作成しました（失敗: {failed}件, {elapsed:.1f}秒, "
+          f"{len(results) / elapsed if elapsed > 0 else 0:.1f}件/秒）")
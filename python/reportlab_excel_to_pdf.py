@@ -0,0 +1,314 @@
+import functools
+import logging
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Sequence, Union
+
+from openpyxl import load_workbook
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfbase.ttfonts import TTFError, TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from conversion_cache import ConversionCache
+from conversion_metrics import ConversionMetrics
+from font_index import FALLBACK_FAMILIES, get_font_index
+from multi_sheet import SheetSelection, parse_sheet_selection, resolve_sheet_indices
+from stream_io import WorkbookSource, as_binary_stream, stream_metrics
+
+logger = logging.getLogger(__name__)
+
+# excel_to_pdf の HTML_HEADER / HTML_FOOTER と同じ見出し・作成日・フッター
+TITLE_TEXT = "従業員情報一覧"
+DATE_TEXT = "作成日: 2025年2月22日"
+FOOTER_TEXT = "※この文書は自動生成されています。"
+
+# 登録するフォント名と、埋め込める日本語フォントが見つからない場合のCIDフォント（埋め込まない）
+CJK_FONT_NAME = "ExcelConverterCJK"
+CID_FALLBACK_FONT = "HeiseiKakuGo-W5"
+
+# レイアウト（単位はポイント）
+MARGIN = 42.5  # 15mm
+TITLE_FONT_SIZE = 18
+DATE_FONT_SIZE = 10
+FONT_SIZE = 9
+ROW_HEIGHT = FONT_SIZE * 2
+CELL_PADDING = 4
+HEADER_FILL = (0xF2 / 255, 0xF2 / 255, 0xF2 / 255)
+
+# 列数がこれを超えるシートは横向きのページに出力する
+PORTRAIT_MAX_COLUMNS = 8
+# 列幅を決めるために先読みする行数（この行数だけがメモリに載る）
+WIDTH_SAMPLE_ROWS = 200
+# 1列の最小幅・最大幅（ポイント）
+MIN_COLUMN_WIDTH = 30
+MAX_COLUMN_WIDTH = 240
+
+@functools.lru_cache(maxsize=1)
+def register_cjk_font() -> str:
+    """
+    Registers a Japanese TrueType font with reportlab and returns its name.
+    フォントインデックスの優先リストにあるフォントを順に試し、使用する文字だけを埋め込みます。
+    reportlab はCFF形式（.otf や Noto CJK の .ttc）を埋め込めないため、読み込めないフォントは飛ばします。
+    埋め込めるフォントがない場合は、ビューアー側のフォントで表示されるCIDフォントを使います。
+    """
+    index = get_font_index()
+    candidates = [entry for family in FALLBACK_FAMILIES for entry in index.find(family)]
+    candidates += [entry for entry in index.fonts if entry.cjk and entry not in candidates]
+    for entry in candidates:
+        try:
+            pdfmetrics.registerFont(TTFont(CJK_FONT_NAME, entry.path))
+            return CJK_FONT_NAME
+        except (TTFError, OSError) as e:
+            logger.debug(f"フォントを埋め込めません: {entry.path}: {e}")
+
+    logger.warning(f"埋め込める日本語フォントが見つからないため {CID_FALLBACK_FONT} を使用します（フォントは埋め込まれません）")
+    pdfmetrics.registerFont(UnicodeCIDFont(CID_FALLBACK_FONT))
+    return CID_FALLBACK_FONT
+
+def _format_cell(value) -> str:
+    return "" if value is None else str(value)
+
+def _fit_text(text: str, width: float, font_name: str) -> str:
+    """
+    列幅に収まらない文字列を末尾で切り詰める
+    """
+    # 全角文字でも1文字の幅はフォントサイズを超えないため、短い文字列は測らずに済む
+    if len(text) * FONT_SIZE <= width or stringWidth(text, font_name, FONT_SIZE) <= width:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if stringWidth(text[:middle] + "…", font_name, FONT_SIZE) <= width:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + "…"
+
+def _column_widths(rows: Sequence[Sequence[str]], column_count: int, table_width: float, font_name: str) -> List[float]:
+    """
+    先読みした行の文字幅から列幅を決め、表の幅に合わせて拡大・縮小する
+    """
+    widths = [MIN_COLUMN_WIDTH] * column_count
+    for row in rows:
+        for column, text in enumerate(row[:column_count]):
+            if text:
+                width = min(stringWidth(text, font_name, FONT_SIZE) + CELL_PADDING * 2, MAX_COLUMN_WIDTH)
+                widths[column] = max(widths[column], width)
+    scale = table_width / sum(widths)
+    return [width * scale for width in widths]
+
+class _TableWriter:
+    """
+    Lays out rows on reportlab canvas pages, repeating the header row on every page.
+    行は受け取った順にページへ描画するため、保持するのは現在のページの行の位置だけです。
+    """
+
+    def __init__(self, canvas, font_name: str, header: Sequence[str], widths: List[float], top: float,
+                 page_height: float):
+        self.canvas = canvas
+        self.font_name = font_name
+        self.header = header
+        self.widths = widths
+        self.xs = [MARGIN]
+        for width in widths:
+            self.xs.append(self.xs[-1] + width)
+        self.page_height = page_height
+        self.top = top
+        self.y = top
+        self.row_count = 0
+        self._draw_header()
+
+    def _draw_row(self, texts: Sequence[str]) -> None:
+        # 1ページの文字は1つのテキストオブジェクトにまとめ、セルの間は相対移動（Td）だけを出力する
+        baseline = self.y - ROW_HEIGHT + (ROW_HEIGHT - FONT_SIZE) / 2 + FONT_SIZE * 0.15
+        for x, width, text in zip(self.xs, self.widths, texts):
+            if text:
+                self.text.moveCursor(x + CELL_PADDING - self.cursor[0], self.cursor[1] - baseline)
+                self.cursor = (x + CELL_PADDING, baseline)
+                self.text.textOut(_fit_text(text, width - CELL_PADDING * 2, self.font_name))
+        self.y -= ROW_HEIGHT
+
+    def _draw_header(self) -> None:
+        self.canvas.setFillColorRGB(*HEADER_FILL)
+        self.canvas.rect(self.xs[0], self.y - ROW_HEIGHT, self.xs[-1] - self.xs[0], ROW_HEIGHT, stroke=0, fill=1)
+        self.canvas.setFillColorRGB(0, 0, 0)
+        self.text = self.canvas.beginText(0, 0)
+        self.text.setFont(self.font_name, FONT_SIZE)
+        self.cursor = (0, 0)
+        self._draw_row(self.header)
+
+    def _close_page(self) -> None:
+        self.canvas.drawText(self.text)
+        # 罫線はページごとにまとめて引く
+        rows = round((self.top - self.y) / ROW_HEIGHT)
+        self.canvas.grid(self.xs, [self.top - ROW_HEIGHT * i for i in range(rows + 1)])
+
+    def add_row(self, texts: Sequence[str]) -> None:
+        if self.y - ROW_HEIGHT < MARGIN:
+            self._close_page()
+            self.canvas.showPage()
+            self.top = self.y = self.page_height - MARGIN
+            self._draw_header()
+        self._draw_row(texts)
+        self.row_count += 1
+
+    def close(self) -> float:
+        """
+        最後のページの文字と罫線を描画し、表の下端のy座標を返す
+        """
+        self._close_page()
+        return self.y
+
+def _row_texts(row: Sequence, column_count: int) -> List[str]:
+    texts = [_format_cell(value) for value in row[:column_count]]
+    return texts + [""] * (column_count - len(texts))
+
+def write_sheet(canvas, worksheet, title: str, font_name: str) -> int:
+    """
+    Writes one worksheet as a table starting on a new page and returns the number of data rows.
+    openpyxlの読み取り専用モードで1行ずつ読み込み、列幅を決めるための先頭 WIDTH_SAMPLE_ROWS 行だけを保持します。
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header_values = next(rows, None) or ()
+    column_count = len(header_values)
+    # 見出し行より長いデータ行がある場合に備えて、最大列数はシートの寸法から取る
+    if worksheet.max_column:
+        column_count = max(column_count, worksheet.max_column)
+    column_count = max(column_count, 1)
+    header = _row_texts(header_values, column_count)
+
+    sample = []
+    for row in rows:
+        sample.append(_row_texts(row, column_count))
+        if len(sample) >= WIDTH_SAMPLE_ROWS:
+            break
+
+    page_size = landscape(A4) if column_count > PORTRAIT_MAX_COLUMNS else A4
+    canvas.setPageSize(page_size)
+    page_width, page_height = page_size
+    widths = _column_widths([header] + sample, column_count, page_width - MARGIN * 2, font_name)
+
+    # 見出しと作成日は最初のページにだけ描画する
+    canvas.bookmarkPage(title)
+    canvas.addOutlineEntry(title, title, level=0)
+    canvas.setFont(font_name, TITLE_FONT_SIZE)
+    y = page_height - MARGIN - TITLE_FONT_SIZE
+    canvas.drawCentredString(page_width / 2, y, TITLE_TEXT)
+    canvas.setFont(font_name, DATE_FONT_SIZE)
+    y -= TITLE_FONT_SIZE + DATE_FONT_SIZE
+    canvas.drawRightString(page_width - MARGIN, y, DATE_TEXT)
+
+    table = _TableWriter(canvas, font_name, header, widths, y - DATE_FONT_SIZE, page_height)
+    for texts in sample:
+        table.add_row(texts)
+    # 先読みした行の続きから読み進める
+    for row in rows:
+        table.add_row(_row_texts(row, column_count))
+    y = table.close()
+
+    if y - DATE_FONT_SIZE * 3 < MARGIN:
+        canvas.showPage()
+        y = page_height - MARGIN
+    canvas.setFont(font_name, DATE_FONT_SIZE)
+    canvas.drawString(MARGIN, y - DATE_FONT_SIZE * 2.5, FOOTER_TEXT)
+    canvas.showPage()
+    return table.row_count
+
+def write_workbook_pdf(source: Union[str, BinaryIO], output: Union[str, BinaryIO], sheets: Optional[SheetSelection],
+                       metrics: ConversionMetrics) -> None:
+    """
+    Renders the selected sheets of `source` (a path or a seekable binary stream) to `output` (a path or a binary stream).
+    """
+    with metrics.phase("load"):
+        font_name = register_cjk_font()
+        workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        # グラフシートは描画しない。sheetnames はグラフシートも含むため、ワークシートの名前だけで番号を決める
+        sheet_names = [worksheet.title for worksheet in workbook.worksheets]
+        indices = resolve_sheet_indices(sheet_names, sheets) if sheets is not None else [0]
+        metrics.sheet_count = len(indices)
+        # 読み込みと描画は同時に行われる
+        with metrics.phase("save"):
+            canvas = Canvas(output, pageCompression=1)
+            canvas.setTitle(TITLE_TEXT)
+            row_count = 0
+            for index in indices:
+                worksheet = workbook.worksheets[index]
+                row_count += write_sheet(canvas, worksheet, sheet_names[index], font_name)
+            metrics.page_count = canvas.getPageNumber() - 1
+            canvas.save()
+        metrics.extra["rows"] = row_count
+    finally:
+        workbook.close()
+
+def excel_to_pdf_reportlab(excel_file: str, cache: Optional[ConversionCache] = None, output_dir: str = "output",
+                           sheets: Optional[SheetSelection] = None,
+                           metrics: Optional[ConversionMetrics] = None) -> Optional[str]:
+    """
+    Converts plain tabular sheets of an xlsx file to PDF in pure Python (openpyxl + reportlab).
+    excel_to_pdf と同じ見出し・作成日・フッターを付けた表を、HTMLやwkhtmltopdfを経由せずに直接PDFへ描画します。
+    セルは1行ずつ読み込んで描画するため、シートの行数によらず読み込み側のメモリ使用量はほぼ一定です
+    （描画済みのページは圧縮した状態で保存まで保持されます）。
+    印刷設定・書式・結合セルは反映しないため、単純な表のワークブック向けです。
+    sheets を省略すると先頭のシートを、"all" またはシート名／インデックスの並びを指定するとそれらを順に出力し、
+    シートごとにしおりを付けます（グラフシートは対象外で、インデックスはグラフシートを除いた番号です）。
+    作成したPDFのパスを返し、変換に失敗した場合はNoneを返します。
+    """
+    metrics = metrics or ConversionMetrics("reportlab", excel_file)
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    output_pdf = f"{output_dir}/{Path(excel_file).stem}_reportlab.pdf"
+
+    # 入力内容が変わっていなければキャッシュ済みPDFを使う
+    cache_key = None
+    if cache is not None:
+        with metrics.phase("cache_lookup"):
+            cache_key = cache.key(excel_file, "reportlab", {"sheets": sheets} if sheets is not None else {})
+            metrics.cache_hit = cache.fetch(cache_key, output_pdf)
+        if metrics.cache_hit:
+            print(f"Created PDF (cached): {output_pdf}")
+            metrics.finish("cached")
+            return output_pdf
+
+    try:
+        write_workbook_pdf(excel_file, output_pdf, sheets, metrics)
+    except Exception as e:
+        print(f"PDF変換に失敗しました: {e}")
+        metrics.finish("error", str(e))
+        return None
+
+    if cache_key is not None:
+        cache.store(cache_key, output_pdf)
+    metrics.finish("success")
+    print(f"Created PDF: {output_pdf}")
+    return output_pdf
+
+def excel_stream_to_pdf_reportlab(source: WorkbookSource, output: BinaryIO, sheets: Optional[SheetSelection] = None,
+                                  metrics: Optional[ConversionMetrics] = None) -> None:
+    """
+    Converts a workbook given as bytes or a seekable binary stream and writes the PDF to `output`, without touching the disk.
+    変換に失敗した場合は例外を送出します。
+    """
+    metrics = metrics or stream_metrics("reportlab", source)
+    try:
+        write_workbook_pdf(as_binary_stream(source), output, sheets, metrics)
+    except Exception as e:
+        metrics.finish("error", str(e))
+        raise
+    metrics.finish("success")
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="openpyxl と reportlab だけで単純な表のExcelファイルをPDFに変換します")
+    parser.add_argument("excel_file")
+    parser.add_argument("--output-dir", default="output", help="出力先ディレクトリ（既定: output）")
+    parser.add_argument("--sheets", type=parse_sheet_selection, default=None,
+                        help="変換するシート（all またはカンマ区切りのシート名／0から始まる番号）")
+    parser.add_argument("--cache-dir", default=None, help="変換結果キャッシュのディレクトリ")
+    args = parser.parse_args()
+
+    cache = ConversionCache(args.cache_dir) if args.cache_dir else None
+    excel_to_pdf_reportlab(args.excel_file, cache=cache, output_dir=args.output_dir, sheets=args.sheets)
@@ -0,0 +1,304 @@
+import argparse
+import logging
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from batch_jobs import BatchResult, collect_input_files, reject_output_name_collisions
+from conversion_cache import DEFAULT_MAX_BYTES, ConversionCache
+from conversion_metrics import current_rss_bytes
+from job_manifest import JobManifest
+
+# ワーカーを入れ替えるまでのジョブ数・RSSの上限と、1ジョブのタイムアウト（いずれも0で無効）
+DEFAULT_MAX_JOBS_PER_WORKER = 200
+DEFAULT_MAX_RSS_BYTES = 1536 * 1024 * 1024  # 1.5GB
+DEFAULT_JOB_TIMEOUT = 300.0
+
+# この件数ごとに直近のスループットを表示する
+PROGRESS_INTERVAL = 100
+
+logger = logging.getLogger(__name__)
+
+def _worker_main(conn, cache_dir: Optional[str], cache_max_bytes: int) -> None:
+    """
+    ワーカープロセス側: Spire.XLSを一度だけ読み込み、親から受け取ったファイルを1件ずつ変換する
+    """
+    from spirexls_excel_to_pdf import excel_to_pdf_spire
+
+    cache = ConversionCache(cache_dir, cache_max_bytes) if cache_dir else None
+    while True:
+        try:
+            excel_file = conn.recv()
+        except EOFError:
+            break
+        if excel_file is None:
+            break
+
+        hits_before = cache.hits if cache else 0
+        try:
+            output_pdf = excel_to_pdf_spire(excel_file, cache=cache)
+            error = None if output_pdf else "PDFが作成されませんでした"
+        except Exception as e:
+            output_pdf = None
+            error = str(e)
+        cached = cache is not None and cache.hits > hits_before
+        conn.send((output_pdf, error, cached, current_rss_bytes()))
+
+class _Worker:
+    """
+    One Spire worker process and the job it is currently running.
+    """
+
+    def __init__(self, context, worker_main: Callable, cache_dir: Optional[str], cache_max_bytes: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child_conn, cache_dir, cache_max_bytes), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.excel_file: Optional[str] = None
+        self.started_at = 0.0
+
+    def submit(self, excel_file: str) -> None:
+        self.excel_file = excel_file
+        self.started_at = time.perf_counter()
+        self.jobs += 1
+        self.conn.send(excel_file)
+
+    def stop(self) -> None:
+        """
+        終了を指示し、応答がなければ強制終了する
+        """
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class SpireWorkerPool:
+    """
+    Fixed-size pool of Spire.XLS worker processes that are recycled to bound native memory growth.
+    Spire.XLS（.NET / libgdiplus）は変換後もネイティブメモリを解放しないため、
+    各ワーカーは max_jobs_per_worker 件の変換後、または RSS が max_rss_bytes を超えた時点で新しいプロセスに入れ替えます。
+    job_timeout 秒を超えたジョブのワーカーは強制終了し、そのファイルは失敗として扱います。
+    worker_main（conn, cache_dir, cache_max_bytes を受け取る関数）を差し替えると、同じ手順で他のエンジンのワーカーを動かせます。
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER,
+                 max_rss_bytes: int = DEFAULT_MAX_RSS_BYTES, job_timeout: float = DEFAULT_JOB_TIMEOUT,
+                 cache_dir: Optional[str] = None, cache_max_bytes: int = DEFAULT_MAX_BYTES,
+                 worker_main: Callable = _worker_main):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_rss_bytes = max_rss_bytes
+        self.job_timeout = job_timeout
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.worker_main = worker_main
+        self.recycled = 0
+        self.timed_out = 0
+        self.crashed = 0
+        # Spireのランタイムはforkした子プロセスで動作が不安定なため、ワーカーはspawnで起動する
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: List[_Worker] = []
+        self._busy = {}
+
+    def __enter__(self) -> "SpireWorkerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context, self.worker_main, self.cache_dir, self.cache_max_bytes)
+
+    def _needs_recycle(self, worker: _Worker, rss: Optional[int]) -> bool:
+        if self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker:
+            return True
+        return bool(self.max_rss_bytes and rss is not None and rss >= self.max_rss_bytes)
+
+    @property
+    def busy(self) -> int:
+        return len(self._busy)
+
+    def submit(self, excel_file: str) -> None:
+        """
+        Starts converting `excel_file` on an idle worker. Call only while fewer than `workers` jobs are running.
+        """
+        if len(self._busy) >= self.workers:
+            raise RuntimeError("空いているワーカーがありません")
+        worker = self._idle.pop() if self._idle else self._spawn()
+        worker.submit(excel_file)
+        self._busy[worker.conn] = worker
+
+    def collect(self, timeout: Optional[float] = None) -> List[BatchResult]:
+        """
+        Waits up to `timeout` seconds and returns a BatchResult for every job that finished, crashed or timed out.
+        timeout が None の場合は、いずれかのジョブが終わるかタイムアウトするまで待ちます。
+        """
+        if not self._busy:
+            return []
+        if self.job_timeout:
+            earliest = min(worker.started_at for worker in self._busy.values())
+            until_deadline = max(0.0, earliest + self.job_timeout - time.perf_counter())
+            timeout = until_deadline if timeout is None else min(timeout, until_deadline)
+
+        results = []
+        for conn in wait(list(self._busy), timeout):
+            worker = self._busy.pop(conn)
+            excel_file = worker.excel_file
+            duration = time.perf_counter() - worker.started_at
+            try:
+                output_pdf, error, cached, rss = conn.recv()
+            except (EOFError, OSError):
+                # 変換中にプロセスが落ちた（ネイティブ側のクラッシュなど）
+                self.crashed += 1
+                logger.error(f"ワーカープロセスが異常終了しました: {excel_file}")
+                worker.kill()
+                self._idle.append(self._spawn())
+                results.append(BatchResult(excel_file, None, duration, "ワーカープロセスが異常終了しました"))
+                continue
+
+            if self._needs_recycle(worker, rss):
+                self.recycled += 1
+                logger.info(f"ワーカーを入れ替えます（{worker.jobs}件処理, RSS {(rss or 0) / (1024 * 1024):.0f}MB）")
+                worker.stop()
+                worker = self._spawn()
+            self._idle.append(worker)
+            results.append(BatchResult(excel_file, output_pdf, duration, error, cached))
+
+        now = time.perf_counter()
+        for conn, worker in list(self._busy.items()):
+            if self.job_timeout and now - worker.started_at >= self.job_timeout:
+                # 応答しないワーカーは強制終了して入れ替える
+                del self._busy[conn]
+                self.timed_out += 1
+                logger.error(f"変換がタイムアウトしました（{self.job_timeout:.0f}秒）: {worker.excel_file}")
+                worker.kill()
+                self._idle.append(self._spawn())
+                results.append(BatchResult(worker.excel_file, None, now - worker.started_at,
+                                           f"タイムアウトしました（{self.job_timeout:.0f}秒）"))
+        return results
+
+    def imap_unordered(self, excel_files: Iterable[str]) -> Iterator[BatchResult]:
+        """
+        Converts the files and yields a BatchResult for each one as it finishes.
+        """
+        pending = deque(excel_files)
+        while len(self._idle) + len(self._busy) < min(self.workers, len(pending)):
+            self._idle.append(self._spawn())
+
+        while pending or self._busy:
+            while pending and len(self._busy) < self.workers:
+                self.submit(pending.popleft())
+            yield from self.collect()
+
+    def close(self) -> None:
+        for worker in self._idle:
+            worker.stop()
+        for worker in self._busy.values():
+            worker.kill()
+        self._idle = []
+        self._busy = {}
+
+def convert_batch_spire(source: str, workers: Optional[int] = None,
+                        max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER,
+                        max_rss_bytes: int = DEFAULT_MAX_RSS_BYTES, job_timeout: float = DEFAULT_JOB_TIMEOUT,
+                        cache_dir: Optional[str] = None, cache_max_bytes: int = DEFAULT_MAX_BYTES,
+                        manifest_path: Optional[str] = None) -> List[BatchResult]:
+    """
+    Converts every Excel file matched by `source` with Spire.XLS on a recycling pool of worker processes.
+    PROGRESS_INTERVAL 件ごとに直近のスループットを表示するため、長時間の実行でも性能の劣化を確認できます。
+    manifest_path を指定すると各ファイルの結果をSQLiteのジョブ記録に残し、再実行時は成功済みのファイルを飛ばします。
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    excel_files = collect_input_files(source)
+    if not excel_files:
+        print(f"'{source}' に一致するExcelファイルが見つかりません。")
+        return []
+    excel_files, rejected = reject_output_name_collisions(excel_files)
+    for result in rejected:
+        print(f"[失敗] {result.excel_file}: {result.error}")
+    if not excel_files:
+        return rejected
+
+    manifest = None
+    if manifest_path:
+        manifest = JobManifest(manifest_path, "spire")
+        excel_files = manifest.resume(excel_files)
+        if not excel_files:
+            print("すべてのファイルが変換済みです。")
+            manifest.close()
+            return rejected
+
+    workers = workers or multiprocessing.cpu_count()
+    print(f"{len(excel_files)}個のファイルを{workers}プロセスで変換します（Spire.XLS）...")
+
+    results = []
+    start_time = time.perf_counter()
+    interval_start = start_time
+    with SpireWorkerPool(workers, max_jobs_per_worker, max_rss_bytes, job_timeout, cache_dir, cache_max_bytes) as pool:
+        for result in pool.imap_unordered(excel_files):
+            results.append(result)
+            if manifest is not None:
+                manifest.record(result)
+            if result.ok:
+                source_label = "キャッシュ" if result.cached else "変換"
+                print(f"[成功] {result.excel_file} -> {result.output_pdf} ({source_label}, {result.duration:.2f}秒)")
+            else:
+                print(f"[失敗] {result.excel_file}: {result.error} ({result.duration:.2f}秒)")
+                logger.error(f"変換に失敗しました: {result.excel_file}: {result.error}")
+
+            if len(results) % PROGRESS_INTERVAL == 0:
+                now = time.perf_counter()
+                print(f"[進捗] {len(results)}/{len(excel_files)}件, 直近{PROGRESS_INTERVAL}件: "
+                      f"{PROGRESS_INTERVAL / (now - interval_start):.2f}ファイル/秒")
+                interval_start = now
+        recycled, timed_out, crashed = pool.recycled, pool.timed_out, pool.crashed
+    total_duration = time.perf_counter() - start_time
+    results = rejected + results
+
+    succeeded = sum(1 for result in results if result.ok)
+    throughput = (len(results) - len(rejected)) / total_duration if total_duration > 0 else 0.0
+    print(f"\n成功: {succeeded}件, 失敗: {len(results) - succeeded}件")
+    print(f"ワーカーの入れ替え: {recycled}回, タイムアウト: {timed_out}件, 異常終了: {crashed}件")
+    if cache_dir:
+        hits = sum(1 for result in results if result.cached)
+        print(f"キャッシュ: ヒット {hits}件, ミス {len(results) - len(rejected) - hits}件")
+    print(f"総処理時間: {total_duration:.2f}秒, スループット: {throughput:.2f}ファイル/秒")
+    if manifest is not None:
+        print(f"ジョブ記録: {manifest.summary()}")
+        manifest.close()
+    return results
+
+if __name__ == "__main__":
+    import sys
+
+    parser = argparse.ArgumentParser(description="Excelファイルを一括でPDFに変換します（Spire.XLS、ワーカープロセスを定期的に入れ替え）")
+    parser.add_argument("source", nargs="?", default="input", help="入力ディレクトリまたはglobパターン（既定: input）")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="ワーカープロセス数（既定: CPUコア数）")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS_PER_WORKER,
+                        help="この件数を変換したワーカーを入れ替える（0で無効）")
+    parser.add_argument("--max-rss-mb", type=int, default=DEFAULT_MAX_RSS_BYTES // (1024 * 1024),
+                        help="RSSがこの値を超えたワーカーを入れ替える（MB、0で無効）")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_JOB_TIMEOUT,
+                        help="1ファイルあたりのタイムアウト（秒、0で無効）")
+    parser.add_argument("--cache-dir", default=None, help="変換結果キャッシュのディレクトリ（省略時はキャッシュしない）")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="キャッシュの最大サイズ（MB）")
+    parser.add_argument("--manifest", default=None,
+                        help="ジョブ記録（SQLite）のパス。指定すると再実行時に成功済みのファイルを飛ばす")
+    args = parser.parse_args()
+
+    results = convert_batch_spire(args.source, args.workers, args.max_jobs, args.max_rss_mb * 1024 * 1024,
+                                  args.timeout, args.cache_dir, args.cache_max_mb * 1024 * 1024, args.manifest)
+    # ジョブ記録を使う場合、変換するファイルが残っていないのは正常終了
+    sys.exit(0 if (results or args.manifest) and all(result.ok for result in results) else 1)
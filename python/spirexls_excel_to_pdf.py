@@ -1,16 +1,29 @@
 import logging
 from pathlib import Path
 from datetime import datetime
-import time
 import traceback
 import glob
 import sys
 import os
 import platform
+import tempfile
+from typing import BinaryIO, Optional, Tuple
+
+from conversion_cache import ConversionCache
+from conversion_metrics import ConversionMetrics, current_rss_bytes, pdf_page_count
+from font_index import get_font_index
+from incremental import render_incremental
+from multi_sheet import (PageRange, SheetSelection, merge_pdfs_with_bookmarks, render_parts_parallel,
+                         resolve_sheet_indices, split_cell_region, trim_pdf_pages)
+from output_profiles import MIN_SIZE_IMAGE_DPI, MIN_SIZE_JPEG_QUALITY, check_mergeable, check_output_profile
+from page_layout import first_sheet_layout, print_sheet_layout
+from stream_io import WorkbookSource, read_source, stream_metrics
+from xlsx_package import referenced_font_names
 
 # Spire.XLSのインポート（エラーハンドリング付き）
 try:
     from spire.xls import Workbook, FileFormat, PageOrientationType
+    from spire.xls.common import Stream
 except ImportError as e:
     print("Spire.XLSのインポートに失敗しました。")
     print(f"エラー: {e}")
@@ -29,6 +42,117 @@ except ImportError as e:
     
     sys.exit(1)
 
+def apply_custom_fonts(workbook, excel_file: Optional[str] = None) -> None:
+    """
+    Linux環境でのフォント問題対策として、ワークブックが参照するフォントと日本語の代替フォントを CustomFontFilePaths に設定する
+    フォントの一覧はプロセス内で一度だけ作成したフォントインデックスから引くため、変換ごとにファイルの存在確認は行いません。
+    """
+    if platform.system() != "Linux":
+        return
+
+    # 参照フォントが分からない場合（.xlsなど）は優先リストの日本語フォントをすべて使う
+    families = referenced_font_names(excel_file) if excel_file else None
+    font_paths = get_font_index().font_paths_for(families)
+    if font_paths:
+        print(f"カスタムフォントパスを設定: {len(font_paths)}個のフォントを使用")
+        workbook.CustomFontFilePaths = font_paths
+    else:
+        print("警告: システム上に適切なフォントが見つかりません。PDF変換が失敗する可能性があります。")
+
+def apply_output_profile(workbook, profile: str) -> None:
+    """
+    Applies an output profile to the workbook's ConverterSetting.
+    fast は数式の再計算を省略し、min-size はさらに画像の解像度とJPEG品質を下げます。
+    archive は PDF/A-1b で出力します（設定できない場合は例外を送出します）。
+    """
+    check_output_profile(profile)
+    if profile == "default":
+        return
+    if profile == "archive":
+        from spire.xls import PdfConformanceLevel
+        workbook.ConverterSetting.PdfConformanceLevel = PdfConformanceLevel.Pdf_A1B
+        return
+
+    try:
+        # 保存済みの計算結果をそのまま描画する
+        workbook.ConverterSetting.IsReCalculateOnConvert = False
+        if profile == "min-size":
+            workbook.ConverterSetting.XDpi = MIN_SIZE_IMAGE_DPI
+            workbook.ConverterSetting.YDpi = MIN_SIZE_IMAGE_DPI
+            workbook.ConverterSetting.JPEGQuality = MIN_SIZE_JPEG_QUALITY
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"出力プロファイル {profile} の一部を設定できません: {e}")
+
+def apply_export_region(workbook, region: str):
+    """
+    Sets a cell range or a named range (such as a print area) as the print area of its worksheet and returns the worksheet.
+    region にはセル範囲（"A1:F40"、"Sheet2!A1:F40"）または名前付き範囲を指定します。シート名のないセル範囲は最初のシートが対象です。
+    """
+    worksheets = [workbook.Worksheets[i] for i in range(workbook.Worksheets.Count)]
+    sheet_names = [worksheet.Name for worksheet in worksheets]
+    cell_region = split_cell_region(region)
+    if cell_region is not None:
+        sheet_name, area = cell_region
+    else:
+        sheet_name, _, name = region.rpartition("!")
+        sheet_name = sheet_name.strip("'") or None
+        if name.lower() == "print_area":
+            # 印刷範囲は名前定義ではなく、各シートの PageSetup.PrintArea として読み込まれる
+            worksheet = next((worksheet for worksheet in worksheets
+                              if worksheet.PageSetup.PrintArea and sheet_name in (None, worksheet.Name)), None)
+            if worksheet is None:
+                raise ValueError(f"印刷範囲 '{region}' が見つかりません")
+            sheet_name, area = worksheet.Name, worksheet.PageSetup.PrintArea
+        else:
+            names = workbook.NameRanges
+            named_range = next((names[i] for i in range(names.Count) if names[i].Name == region), None)
+            if named_range is None or named_range.RefersToRange is None:
+                raise ValueError(f"名前付き範囲 '{region}' が見つかりません")
+            sheet_name = named_range.RefersToRange.Worksheet.Name
+            area = named_range.RefersToRange.RangeAddressLocal
+
+    if sheet_name is not None and sheet_name not in sheet_names:
+        raise ValueError(f"シート '{sheet_name}' が見つかりません")
+    worksheet = worksheets[sheet_names.index(sheet_name) if sheet_name is not None else 0]
+    worksheet.PageSetup.PrintArea = area
+    return worksheet
+
+def _render_spire_sheet(task: Tuple[str, int, str, str]) -> str:
+    """
+    ワーカープロセスで1シートだけをPDFに保存する
+    """
+    excel_file, sheet_index, part_pdf, output_profile = task
+    workbook = Workbook()
+    apply_custom_fonts(workbook, excel_file)
+    workbook.LoadFromFile(excel_file)
+    apply_output_profile(workbook, output_profile)
+    workbook.Worksheets[sheet_index].SaveToPdf(part_pdf)
+    return part_pdf
+
+def save_sheets_spire(workbook, excel_file: str, sheets: SheetSelection, output_pdf: str,
+                      workers: Optional[int] = None, output_profile: str = "default") -> Optional[str]:
+    """
+    Exports the selected sheets in parallel and merges them into one PDF with a bookmark per sheet.
+    各シートはワーカープロセスで Worksheet.SaveToPdf を使って個別に出力します。非表示のシートは含めません。
+    """
+    worksheets = [workbook.Worksheets[i] for i in range(workbook.Worksheets.Count)]
+    sheet_names = [worksheet.Name for worksheet in worksheets]
+    # Visibility が 0（表示）以外のシートは全体を変換したときのPDFにも出力されない
+    indices = [index for index in resolve_sheet_indices(sheet_names, sheets) if worksheets[index].Visibility == 0]
+    if not indices:
+        print("出力対象のシートがありません。")
+        return None
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tasks = [(excel_file, index, str(Path(temp_dir) / f"sheet_{index}.pdf"), output_profile) for index in indices]
+        print(f"{len(tasks)}個のシートを並列でPDFに変換中...")
+        part_pdfs = render_parts_parallel(_render_spire_sheet, tasks, workers)
+        page_count = merge_pdfs_with_bookmarks(
+            [(sheet_names[index], part_pdf) for index, part_pdf in zip(indices, part_pdfs)], output_pdf
+        )
+    print(f"PDFファイルが作成されました: {output_pdf} ({len(indices)}シート, {page_count}ページ)")
+    return output_pdf
+
 def add_custom_page_breaks(worksheet):
     """
     ユーザーが指定したカスタム改ページを追加する
@@ -87,110 +211,180 @@ def add_custom_page_breaks(worksheet):
         for i in range(worksheet.VPageBreaks.Count):
             print(f"  列 {worksheet.VPageBreaks[i].Location.Column} の後")
 
-def excel_to_pdf_spire(excel_file: str) -> None:
+def excel_to_pdf_spire(excel_file: str, cache: Optional[ConversionCache] = None,
+                       sheets: Optional[SheetSelection] = None, workers: Optional[int] = None,
+                       metrics: Optional[ConversionMetrics] = None, incremental: bool = False,
+                       page_range: Optional[PageRange] = None, region: Optional[str] = None,
+                       output_profile: str = "default") -> Optional[str]:
     """
     Converts an Excel file to PDF using Spire.XLS for Python.
     Excel上の設定（改ページ、印刷設定など）をそのままPDFに反映します。
+    作成したPDFのパスを返し、変換に失敗した場合はNoneを返します。
+    cache を指定すると、入力内容が同じ場合はWorkbookを読み込まずにキャッシュ済みPDFを返します。
+    sheets に "all" またはシート名／インデックスの並びを指定すると、シートごとに並列で出力して1つのPDFに結合します。
+    フェーズごとの所要時間は metrics（省略時は新規作成）に記録されます。
+    incremental=True では、前回から変更されたシートだけを出力し、変更のないシートはキャッシュ済みの断片を結合します。
+    region にセル範囲または名前付き範囲を指定すると、その範囲だけを Worksheet.SaveToPdf で出力します。
+    page_range に (0から始まる先頭ページ, ページ数) を指定すると、出力後にそのページだけを残します
+    （Spire.XLS には描画するページを指定する方法がないため、描画時間は短くなりません）。
+    output_profile には "fast"・"min-size"・"archive"（PDF/A）を指定できます（apply_output_profile を参照）。
     """
     # Configure logging
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     logger = logging.getLogger(__name__)
     
     # 時間計測用
-    start_time = time.time()
+    metrics = metrics or ConversionMetrics("spire", excel_file)
+    created_pdf = None
 
     try:
+        if (page_range is not None or region is not None) and (sheets is not None or incremental):
+            raise ValueError("page_range・region は sheets・incremental と同時に指定できません")
+        check_output_profile(output_profile)
+        if sheets is not None or incremental:
+            check_mergeable(output_profile)
+        metrics.extra["output_profile"] = output_profile
+
         # 出力ディレクトリの確認と作成
         output_dir = Path("output")
         output_dir.mkdir(exist_ok=True)
     
+        # 出力ファイル名を設定
+        output_pdf = f"output/{Path(excel_file).stem}_spire.pdf"
+
+        # 入力内容が変わっていなければキャッシュ済みPDFを使う
+        cache_key = None
+        if cache is not None:
+            with metrics.phase("cache_lookup"):
+                cache_options = {"sheets": sheets} if sheets is not None else {}
+                if incremental:
+                    cache_options["incremental"] = True
+                if page_range is not None:
+                    cache_options["page_range"] = list(page_range)
+                if region is not None:
+                    cache_options["region"] = region
+                if output_profile != "default":
+                    cache_options["output_profile"] = output_profile
+                cache_key = cache.key(excel_file, "spire", cache_options)
+                metrics.cache_hit = cache.fetch(cache_key, output_pdf)
+            if metrics.cache_hit:
+                print(f"キャッシュからPDFを取得しました: {output_pdf} (処理時間: {metrics.elapsed():.2f}秒)")
+                metrics.finish("cached")
+                return output_pdf
+
+        # 変更されたシートだけを出力し、変更のないシートは前回の断片を使う
+        if incremental:
+            created_pdf = render_incremental(
+                excel_file, output_pdf, "spire", _render_spire_sheet,
+                lambda index, part_pdf: (excel_file, index, part_pdf, output_profile),
+                cache, sheets, workers, options={"output_profile": output_profile} if output_profile != "default" else None,
+                metrics=metrics,
+            )
+            if created_pdf is not None:
+                if cache_key is not None:
+                    cache.store(cache_key, created_pdf)
+                metrics.page_count = pdf_page_count(created_pdf)
+                print(f"\n総処理時間: {metrics.elapsed():.2f}秒")
+                metrics.finish("success")
+                return created_pdf
+
         print(f"Excelファイル '{excel_file}' をPDFに変換しています...")
         
         # Excelファイルを読み込む
-        load_start_time = time.time()
         workbook = Workbook()
-        
-        # フォントパスを設定（Linux環境でのフォント問題対策）
-        if platform.system() == "Linux":
-            # 一般的なLinux環境でのフォントパス
-            font_paths = [
-                "/usr/share/fonts/truetype/ipafont/ipag.ttf",  # IPAゴシック
-                "/usr/share/fonts/truetype/ipafont/ipam.ttf",  # IPA明朝
-                "/usr/share/fonts/truetype/ipaexfont/ipaexg.ttf",  # IPAexゴシック
-                "/usr/share/fonts/truetype/ipaexfont/ipaexm.ttf",  # IPAex明朝
-                "/usr/share/fonts/truetype/vlgothic/VL-Gothic-Regular.ttf",  # VLゴシック
-                "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",  # Noto Sans CJK
-            ]
-            
-            # 存在するフォントパスのみを設定
-            existing_font_paths = [path for path in font_paths if Path(path).exists()]
-            if existing_font_paths:
-                print(f"カスタムフォントパスを設定: {len(existing_font_paths)}個のフォントを使用")
-                workbook.CustomFontFilePaths = existing_font_paths
-            else:
-                print("警告: システム上に適切なフォントが見つかりません。PDF変換が失敗する可能性があります。")
-        
-        workbook.LoadFromFile(excel_file)
-        load_end_time = time.time()
-        load_duration = load_end_time - load_start_time
-        print(f"Excelファイルの読み込み完了: {load_duration:.2f}秒")
-        logger.info(f"Excelファイルの読み込み時間: {load_duration:.2f}秒")
+        with metrics.phase("font_setup"):
+            apply_custom_fonts(workbook, excel_file)
+        # Spire.XLS の LoadFromFile には読み込む部分を絞るオプションがないため、所要時間とメモリ増加量の記録のみ行う
+        rss_before = current_rss_bytes()
+        with metrics.phase("load"):
+            workbook.LoadFromFile(excel_file)
+        rss_after = current_rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            metrics.extra["load_rss_delta_bytes"] = rss_after - rss_before
+        metrics.sheet_count = workbook.Worksheets.Count
+        apply_output_profile(workbook, output_profile)
+        print(f"Excelファイルの読み込み完了: {metrics.duration('load'):.2f}秒")
+        logger.info(f"Excelファイルの読み込み時間: {metrics.duration('load'):.2f}秒")
 
-        # ワークシートを取得（ここでは最初のワークシート）
-        worksheet = workbook.Worksheets[0]
+        # 複数シートを指定された場合はシートごとに並列で出力して結合する
+        if sheets is not None:
+            with metrics.phase("save"):
+                created_pdf = save_sheets_spire(workbook, excel_file, sheets, output_pdf, workers, output_profile)
+            if cache_key is not None and created_pdf is not None:
+                cache.store(cache_key, created_pdf)
+            if created_pdf is not None:
+                metrics.page_count = pdf_page_count(created_pdf)
+            print(f"\n総処理時間: {metrics.elapsed():.2f}秒")
+            metrics.finish("success" if created_pdf else "failed")
+            return created_pdf
 
-        # 既存の印刷設定を表示（情報提供のため）
-        print(f"印刷設定 - 用紙サイズ: {worksheet.PageSetup.PaperSize}")
-        print(f"印刷設定 - 向き: {'横' if worksheet.PageSetup.Orientation == PageOrientationType.Landscape else '縦'}")
-        print(f"印刷設定 - フィット設定: 幅={worksheet.PageSetup.FitToPagesWide}, 高さ={worksheet.PageSetup.FitToPagesTall}")
+        # ワークシートを取得（出力範囲の指定がなければ最初のワークシート）
+        worksheet = workbook.Worksheets[0]
+        if region is not None:
+            # 指定された範囲を印刷範囲にして、そのシートだけを出力する
+            with metrics.phase("inspect"):
+                worksheet = apply_export_region(workbook, region)
+            print(f"出力範囲: {worksheet.Name}!{worksheet.PageSetup.PrintArea}")
 
-        # 改ページ情報を表示
-        print("\n既存の改ページ情報:")
-        try:
-            if worksheet.HPageBreaks.Count > 0:
-                print("水平改ページ:")
-                for i in range(worksheet.HPageBreaks.Count):
-                    print(f"  行 {worksheet.HPageBreaks[i].Location.Row} の後")
-            else:
-                print("水平改ページはありません")
-                
-            if worksheet.VPageBreaks.Count > 0:
-                print("垂直改ページ:")
-                for i in range(worksheet.VPageBreaks.Count):
-                    print(f"  列 {worksheet.VPageBreaks[i].Location.Column} の後")
+        with metrics.phase("inspect"):
+            # 既存の印刷設定を表示（情報提供のため）。xlsx は最初のシートのXMLから行データを読み飛ばして印刷設定だけを読み、要素ごとに.NETを呼び出さない
+            layout = first_sheet_layout(excel_file) if region is None else None
+            if layout is not None:
+                print_sheet_layout(layout)
             else:
-                print("垂直改ページはありません")
-        except Exception as page_break_error:
-            logger.error(f"改ページ情報の取得中にエラーが発生しました: {page_break_error}")
-            print("改ページ情報の取得に失敗しました。処理を続行します。")
+                # .xls や出力範囲を指定した場合はエンジンから読む
+                print(f"印刷設定 - 用紙サイズ: {worksheet.PageSetup.PaperSize}")
+                print(f"印刷設定 - 向き: {'横' if worksheet.PageSetup.Orientation == PageOrientationType.Landscape else '縦'}")
+                print(f"印刷設定 - フィット設定: 幅={worksheet.PageSetup.FitToPagesWide}, 高さ={worksheet.PageSetup.FitToPagesTall}")
 
-        # 出力ファイル名を設定
-        output_pdf = f"output/{Path(excel_file).stem}_spire.pdf"
+                # 改ページ情報を表示
+                print("\n既存の改ページ情報:")
+                try:
+                    if worksheet.HPageBreaks.Count > 0:
+                        print("水平改ページ:")
+                        for i in range(worksheet.HPageBreaks.Count):
+                            print(f"  行 {worksheet.HPageBreaks[i].Location.Row} の後")
+                    else:
+                        print("水平改ページはありません")
+                    
+                    if worksheet.VPageBreaks.Count > 0:
+                        print("垂直改ページ:")
+                        for i in range(worksheet.VPageBreaks.Count):
+                            print(f"  列 {worksheet.VPageBreaks[i].Location.Column} の後")
+                    else:
+                        print("垂直改ページはありません")
+                except Exception as page_break_error:
+                    logger.error(f"改ページ情報の取得中にエラーが発生しました: {page_break_error}")
+                    print("改ページ情報の取得に失敗しました。処理を続行します。")
 
-        # PDFの変換開始時間を記録
-        pdf_start_time = time.time()
-        
         # PDFに変換
         try:
             print("\nPDFに変換中...")
             logger.info("Spire.XLSでPDFに保存しています...")
-            save_start_time = time.time()
-            workbook.SaveToFile(output_pdf, FileFormat.PDF)
-            save_end_time = time.time()
-            save_duration = save_end_time - save_start_time
-            pdf_end_time = time.time()
-            pdf_duration = pdf_end_time - pdf_start_time
-            total_duration = pdf_end_time - start_time
-            print(f"PDFファイルが作成されました: {output_pdf} (保存時間: {save_duration:.2f}秒, PDF変換合計: {pdf_duration:.2f}秒, 総処理時間: {total_duration:.2f}秒)")
-            logger.info(f"PDF変換・保存時間: {save_duration:.2f}秒")
+            with metrics.phase("save"):
+                if region is not None:
+                    worksheet.SaveToPdf(output_pdf)
+                else:
+                    workbook.SaveToFile(output_pdf, FileFormat.PDF)
+            if page_range is not None:
+                with metrics.phase("trim"):
+                    page_count = trim_pdf_pages(output_pdf, page_range)
+                print(f"出力ページ: {page_range[0] + 1}ページ目から{page_count}ページ")
+            created_pdf = output_pdf
+            print(f"PDFファイルが作成されました: {output_pdf} (保存時間: {metrics.duration('save'):.2f}秒, 総処理時間: {metrics.elapsed():.2f}秒)")
+            logger.info(f"PDF変換・保存時間: {metrics.duration('save'):.2f}秒")
         except Exception as pdf_error:
             logger.error(f"PDF変換中にエラーが発生しました: {pdf_error}")
             print(f"PDF変換に失敗しました: {pdf_error}")
+
+        if cache_key is not None and created_pdf is not None:
+            cache.store(cache_key, created_pdf)
+        if created_pdf is not None:
+            metrics.page_count = pdf_page_count(created_pdf)
                 
         # 処理時間のサマリーを表示
-        end_time = time.time()
-        total_duration = end_time - start_time
-        print(f"\n総処理時間: {total_duration:.2f}秒")
+        print(f"\n総処理時間: {metrics.elapsed():.2f}秒")
+        metrics.finish("success" if created_pdf else "failed")
 
     except Exception as e:
         logger.error(f"Excel→PDF変換中にエラーが発生しました: {e}")
@@ -198,9 +392,45 @@ def excel_to_pdf_spire(excel_file: str) -> None:
         logger.error(traceback.format_exc())
         
         # エラー時も処理時間を表示
-        end_time = time.time()
-        error_duration = end_time - start_time
-        print(f"エラーが発生しました。エラーまでの処理時間: {error_duration:.2f}秒")
+        print(f"エラーが発生しました。エラーまでの処理時間: {metrics.elapsed():.2f}秒")
+        metrics.finish("error", str(e))
+
+    return created_pdf
+
+def excel_stream_to_pdf_spire(source: WorkbookSource, output: BinaryIO, metrics: Optional[ConversionMetrics] = None,
+                              region: Optional[str] = None, output_profile: str = "default") -> None:
+    """
+    Converts a workbook given as bytes or a binary stream and writes the PDF to `output`, without touching the disk.
+    Workbook.LoadFromStream と SaveToStream（region 指定時は Worksheet.SaveToPdfStream）を使い、一時ファイルを作りません。
+    ワークブックの参照フォントは分からないため、優先リストの日本語フォントをすべて CustomFontFilePaths に設定します。
+    変換に失敗した場合は例外を送出します。
+    """
+    check_output_profile(output_profile)
+    metrics = metrics or stream_metrics("spire", source)
+    metrics.extra["output_profile"] = output_profile
+    try:
+        workbook = Workbook()
+        with metrics.phase("font_setup"):
+            apply_custom_fonts(workbook)
+        with metrics.phase("load"):
+            workbook.LoadFromStream(Stream(read_source(source)))
+        metrics.sheet_count = workbook.Worksheets.Count
+        apply_output_profile(workbook, output_profile)
+        worksheet = None
+        if region is not None:
+            with metrics.phase("inspect"):
+                worksheet = apply_export_region(workbook, region)
+        with metrics.phase("save"):
+            pdf_stream = Stream()
+            if worksheet is not None:
+                worksheet.SaveToPdfStream(pdf_stream)
+            else:
+                workbook.SaveToStream(pdf_stream, FileFormat.PDF)
+            output.write(pdf_stream.ToArray())
+    except Exception as e:
+        metrics.finish("error", str(e))
+        raise
+    metrics.finish("success")
 
 def create_excel_file(filename: str) -> None:
     """
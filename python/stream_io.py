@@ -0,0 +1,33 @@
+import io
+from typing import BinaryIO, Union
+
+from conversion_metrics import ConversionMetrics
+
+# メモリ上の変換APIが受け付ける入力: ワークブックのバイト列、または読み込み可能なバイナリストリーム
+WorkbookSource = Union[bytes, bytearray, memoryview, BinaryIO]
+
+def as_binary_stream(source: WorkbookSource) -> BinaryIO:
+    """
+    Returns `source` as a readable binary stream, wrapping bytes in a BytesIO without copying to disk.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+def read_source(source: WorkbookSource) -> bytes:
+    """
+    Returns the whole workbook as bytes (for engines whose stream APIs take a byte array).
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    return source.read()
+
+def stream_metrics(engine: str, source: WorkbookSource) -> ConversionMetrics:
+    """
+    Creates the metrics of an in-memory conversion.
+    ファイル名がないため、ストリームの name 属性（なければ "<stream>"）を入力名として記録します。
+    """
+    metrics = ConversionMetrics(engine, str(getattr(source, "name", "<stream>")))
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        metrics.input_bytes = len(source)
+    return metrics
@@ -0,0 +1,105 @@
+import zipfile
+
+from xlsx_package import sheet_fingerprints
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+</Types>"""
+
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_SHEET_NAMES = ("A", "B", "C")
+
+def _write_workbook(path, sheets, shared_strings, cell_xfs):
+    """
+    sheets はシートごとの行（セル値のリスト）。文字列は shared_strings の並びで共有文字列として、
+    セル書式は cell_xfs の中から値 "styled" の位置にだけ最後の書式を使う
+    """
+    index = {text: i for i, text in enumerate(shared_strings)}
+    styled = len(cell_xfs) - 1
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", f'<workbook xmlns="{_MAIN}" xmlns:r="{_REL}"><sheets>' + "".join(
+            f'<sheet name="{name}" sheetId="{i + 1}" r:id="rId{i + 1}"/>' for i, name in enumerate(_SHEET_NAMES)
+        ) + "</sheets></workbook>")
+        archive.writestr("xl/_rels/workbook.xml.rels", f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">' + "".join(
+            f'<Relationship Id="rId{i + 1}" Type="{_REL}/worksheet" Target="worksheets/sheet{i + 1}.xml"/>'
+            for i in range(len(_SHEET_NAMES))
+        ) + f'<Relationship Id="rId9" Type="{_REL}/sharedStrings" Target="sharedStrings.xml"/></Relationships>')
+        archive.writestr("xl/sharedStrings.xml", f'<sst xmlns="{_MAIN}">' + "".join(
+            f"<si><t>{text}</t></si>" for text in shared_strings) + "</sst>")
+        archive.writestr("xl/styles.xml", f'<styleSheet xmlns="{_MAIN}">'
+                         '<fonts><font><sz val="11"/></font><font><b/><sz val="11"/></font></fonts>'
+                         "<cellXfs>" + "".join(cell_xfs) + "</cellXfs></styleSheet>")
+        for i, rows in enumerate(sheets):
+            cells = []
+            for row_number, row in enumerate(rows, 1):
+                cells.append(f'<row r="{row_number}" s="{styled}" customFormat="1">')
+                for column, value in zip("ABC", row):
+                    reference = f"{column}{row_number}"
+                    if value == "styled":
+                        cells.append(f'<c r="{reference}" s="{styled}"><v>1</v></c>')
+                    elif isinstance(value, str):
+                        cells.append(f'<c r="{reference}" t="s"><v>{index[value]}</v></c>')
+                    else:
+                        cells.append(f'<c r="{reference}"><v>{value}</v></c>')
+                cells.append("</row>")
+            archive.writestr(f"xl/worksheets/sheet{i + 1}.xml", f'<worksheet xmlns="{_MAIN}">'
+                             f'<cols><col min="1" max="1" width="20" style="{styled}"/></cols>'
+                             "<sheetData>" + "".join(cells) + "</sheetData></worksheet>")
+
+def _fingerprints(path):
+    return {sheet.name: sheet.fingerprint for sheet in sheet_fingerprints(str(path))}
+
+_PLAIN_XF = '<xf numFmtId="0" fontId="0"/>'
+_BOLD_XF = '<xf numFmtId="0" fontId="1" applyFont="1"/>'
+
+def test_prepended_shared_string_keeps_other_sheets(tmp_path):
+    sheets = [[["見出し", 1]], [["部署", "氏名"], ["営業", 2]], [["氏名", 3.5]]]
+    strings = ["見出し", "部署", "氏名", "営業"]
+    before = tmp_path / "before.xlsx"
+    _write_workbook(before, sheets, strings, [_PLAIN_XF])
+
+    # シートAに新しい文字列を追加すると、出現順で先頭の共有文字列になり、以降の番号がすべてずれる
+    sheets[0][0].append("新規")
+    after = tmp_path / "after.xlsx"
+    _write_workbook(after, sheets, ["見出し", "新規"] + strings[1:], [_PLAIN_XF])
+
+    old, new = _fingerprints(before), _fingerprints(after)
+    assert old["A"] != new["A"]
+    assert old["B"] == new["B"]
+    assert old["C"] == new["C"]
+
+def test_renumbered_style_keeps_other_sheets(tmp_path):
+    sheets = [[[1]], [["styled", 2]], [[3, "styled"]]]
+    before = tmp_path / "before.xlsx"
+    _write_workbook(before, sheets, [], [_PLAIN_XF, _BOLD_XF])
+
+    # 書式が1つ増えて番号が変わっても、指している書式の内容が同じなら変わらない
+    after = tmp_path / "after.xlsx"
+    _write_workbook(after, sheets, [], [_PLAIN_XF, '<xf numFmtId="14" fontId="0"/>', _BOLD_XF])
+
+    old, new = _fingerprints(before), _fingerprints(after)
+    assert old == new
+
+def test_changed_cell_changes_only_its_sheet(tmp_path):
+    sheets = [[["見出し", 1]], [["部署", 2]], [["氏名", 3]]]
+    strings = ["見出し", "部署", "氏名"]
+    before = tmp_path / "before.xlsx"
+    _write_workbook(before, sheets, strings, [_PLAIN_XF])
+    sheets[1][0][1] = 20
+    after = tmp_path / "after.xlsx"
+    _write_workbook(after, sheets, strings, [_PLAIN_XF])
+
+    old, new = _fingerprints(before), _fingerprints(after)
+    assert old["A"] == new["A"] and old["C"] == new["C"]
+    assert old["B"] != new["B"]
@@ -0,0 +1,351 @@
+import argparse
+import ctypes
+import ctypes.util
+import fnmatch
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import select
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from batch_jobs import BatchResult
+from conversion_cache import DEFAULT_MAX_BYTES
+from spire_pool import (DEFAULT_JOB_TIMEOUT, DEFAULT_MAX_JOBS_PER_WORKER, DEFAULT_MAX_RSS_BYTES, SpireWorkerPool,
+                        _worker_main as _spire_worker_main)
+
+WATCH_ENGINES = ("aspose", "spire")
+DEFAULT_PATTERN = "*.xls*"
+
+# サイズと更新日時がこの秒数変化しなければ書き込み完了とみなす
+DEFAULT_SETTLE_SECONDS = 2.0
+# inotifyが使えない場合のディレクトリ走査間隔（秒）
+DEFAULT_POLL_INTERVAL = 1.0
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+# FileSignature = (サイズ, 更新日時ns)
+FileSignature = Tuple[int, int]
+
+logger = logging.getLogger(__name__)
+
+class _Inotify:
+    """
+    Minimal ctypes binding of Linux inotify for a single directory.
+    """
+
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 に失敗しました")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch に失敗しました: {directory}")
+
+    def read(self, timeout: float) -> Tuple[List[Tuple[int, str]], bool]:
+        """
+        timeout 秒までイベントを待ち、(マスク, ファイル名) の一覧とキューがあふれたかどうかを返す
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return [], False
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+
+        events = []
+        overflowed = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                overflowed = True
+            elif name:
+                events.append((mask, name))
+        return events, overflowed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+def file_signature(path: str) -> Optional[FileSignature]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+@dataclass
+class _PendingFile:
+    signature: FileSignature
+    changed_at: float
+
+class FolderWatcher:
+    """
+    Watches a directory and reports each new or modified Excel file once its writes have settled.
+    inotify（ctypes経由）でイベントを受け取り、使えない環境ではディレクトリを定期的に走査します。
+    ファイルはサイズと更新日時が settle_seconds 秒変化しなくなった時点で報告し、
+    同じ内容（サイズ・更新日時が同じ）のファイルに対する重複イベントは一度だけ報告します。
+    """
+
+    def __init__(self, directory: str, pattern: str = DEFAULT_PATTERN, settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, use_inotify: bool = True):
+        self.directory = directory
+        self.pattern = pattern
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self._pending: Dict[str, _PendingFile] = {}
+        self._reported: Dict[str, FileSignature] = {}
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify(directory)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotifyを利用できないため、{poll_interval:.1f}秒間隔の走査で監視します: {e}")
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def __enter__(self) -> "FolderWatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _matches(self, name: str) -> bool:
+        # Excelが編集中に作る所有者ファイル（~$report.xlsx）は対象外
+        return fnmatch.fnmatch(name, self.pattern) and not name.startswith("~$")
+
+    def _touch(self, path: str, now: float) -> None:
+        """
+        変更があった可能性のあるファイルを安定待ちに加える
+        """
+        signature = file_signature(path)
+        if signature is None:
+            self._pending.pop(path, None)
+            return
+        if self._reported.get(path) == signature:
+            # 報告済みの内容と同じ（属性の変更や重複したイベント）
+            self._pending.pop(path, None)
+            return
+        pending = self._pending.get(path)
+        if pending is None or pending.signature != signature:
+            self._pending[path] = _PendingFile(signature, now)
+
+    def scan(self) -> None:
+        """
+        ディレクトリ全体を走査する（起動時、走査モード、inotifyのキューがあふれた場合）
+        """
+        now = time.monotonic()
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError as e:
+            logger.error(f"監視ディレクトリを読み込めません: {self.directory}: {e}")
+            return
+        present = set()
+        for entry in entries:
+            if entry.is_file() and self._matches(entry.name):
+                present.add(entry.path)
+                self._touch(entry.path, now)
+        for path in list(self._pending):
+            if path not in present:
+                del self._pending[path]
+
+    def _settled(self, now: float) -> List[Tuple[str, int]]:
+        settled = []
+        for path, pending in list(self._pending.items()):
+            signature = file_signature(path)
+            if signature is None:
+                del self._pending[path]
+            elif signature != pending.signature:
+                # まだ書き込み中
+                self._pending[path] = _PendingFile(signature, now)
+            elif now - pending.changed_at >= self.settle_seconds:
+                del self._pending[path]
+                self._reported[path] = signature
+                settled.append((path, signature[0]))
+        return settled
+
+    def poll(self, timeout: float) -> List[Tuple[str, int]]:
+        """
+        Waits up to `timeout` seconds and returns (path, size) for every file that has settled since the last call.
+        """
+        if self._inotify is None:
+            time.sleep(min(timeout, self.poll_interval))
+            self.scan()
+            return self._settled(time.monotonic())
+
+        # 安定待ちのファイルがある間は、イベントがなくても settle_seconds 経過を確認できるように待ち時間を短くする
+        if self._pending:
+            timeout = min(timeout, self.settle_seconds / 2)
+        events, overflowed = self._inotify.read(timeout)
+        now = time.monotonic()
+        if overflowed:
+            logger.warning("inotifyのイベントキューがあふれたため、ディレクトリを再走査します")
+            self.scan()
+        for mask, name in events:
+            if not self._matches(name):
+                continue
+            path = os.path.join(self.directory, name)
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                self._pending.pop(path, None)
+                self._reported.pop(path, None)
+            else:
+                self._touch(path, now)
+        return self._settled(now)
+
+class SizePriorityQueue:
+    """
+    Job queue that hands out the smallest file first, FIFO among files of equal size.
+    大量のファイルが一度に置かれても、小さいファイルが大きいファイルの後ろで待たされないようにします。
+    同じパスが待機中に再投入された場合は、最新のサイズで一件にまとめます。
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, int, str]] = []
+        self._queued: Dict[str, int] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def push(self, path: str, size: int) -> None:
+        sequence = next(self._counter)
+        self._queued[path] = sequence
+        heapq.heappush(self._heap, (size, sequence, path))
+
+    def pop(self) -> str:
+        while True:
+            _, sequence, path = heapq.heappop(self._heap)
+            # 再投入で置き換えられた古いエントリは読み飛ばす
+            if self._queued.get(path) == sequence:
+                del self._queued[path]
+                return path
+
+def _engine_worker(engine: str):
+    """
+    (ワーカープロセスの関数, ワーカーを入れ替えるまでの件数, RSSの上限) を返す
+    """
+    if engine == "aspose":
+        from aspose_batch import _pipe_worker_main
+        return _pipe_worker_main, 0, 0
+
+    # Spireはネイティブメモリが増え続けるため、一定件数・一定のRSSごとにワーカーを入れ替える
+    return _spire_worker_main, DEFAULT_MAX_JOBS_PER_WORKER, DEFAULT_MAX_RSS_BYTES
+
+def watch_and_convert(directory: str = "input", engine: str = "aspose", workers: Optional[int] = None,
+                      pattern: str = DEFAULT_PATTERN, settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+                      poll_interval: float = DEFAULT_POLL_INTERVAL, include_existing: bool = True,
+                      cache_dir: Optional[str] = None, cache_max_bytes: int = DEFAULT_MAX_BYTES,
+                      use_inotify: bool = True, max_jobs: Optional[int] = None,
+                      job_timeout: float = DEFAULT_JOB_TIMEOUT) -> List[BatchResult]:
+    """
+    Watches `directory` and converts every Excel file that lands there on a pool of worker processes.
+    ワーカーに渡すのは空いている数だけで、残りはサイズの小さい順に待たせるため、
+    大きなファイルが大量に置かれた後に届いた小さなファイルも先に変換されます。
+    ワーカーは SpireWorkerPool で管理するため、異常終了したジョブや job_timeout 秒を超えたジョブは失敗として記録し、
+    そのワーカーを入れ替えて監視を続けます。
+    max_jobs 件を変換したら終了します（省略時は Ctrl+C まで監視を続けます）。
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if engine not in WATCH_ENGINES:
+        raise ValueError(f"監視に対応していないエンジンです: {engine}（利用可能: {', '.join(WATCH_ENGINES)}）")
+    Path(directory).mkdir(parents=True, exist_ok=True)
+
+    workers = workers or multiprocessing.cpu_count()
+    queue = SizePriorityQueue()
+    in_flight = set()
+    results: List[BatchResult] = []
+
+    worker_main, max_jobs_per_worker, max_rss_bytes = _engine_worker(engine)
+    with FolderWatcher(directory, pattern, settle_seconds, poll_interval, use_inotify) as watcher, \
+            SpireWorkerPool(workers, max_jobs_per_worker, max_rss_bytes, job_timeout, cache_dir, cache_max_bytes,
+                            worker_main) as pool:
+        print(f"'{directory}' を監視しています（{watcher.mode}, {engine}, {workers}プロセス）。Ctrl+Cで終了します。")
+        if include_existing:
+            watcher.scan()
+        try:
+            while max_jobs is None or len(results) < max_jobs:
+                for path, size in watcher.poll(0.2 if in_flight else poll_interval):
+                    logger.info(f"変換待ちに追加しました: {path} ({size}バイト)")
+                    queue.push(path, size)
+
+                # 同じファイルの変換が実行中の場合は、終わるまで次の変換を待たせる
+                deferred = []
+                while queue and len(in_flight) < workers:
+                    path = queue.pop()
+                    if path in in_flight:
+                        deferred.append(path)
+                        continue
+                    pool.submit(path)
+                    in_flight.add(path)
+                for path in deferred:
+                    size = file_signature(path)
+                    queue.push(path, size[0] if size else 0)
+
+                for result in pool.collect(0):
+                    in_flight.discard(result.excel_file)
+                    results.append(result)
+                    if result.ok:
+                        source_label = "キャッシュ" if result.cached else "変換"
+                        print(f"[成功] {result.excel_file} -> {result.output_pdf} ({source_label}, {result.duration:.2f}秒)")
+                    else:
+                        print(f"[失敗] {result.excel_file}: {result.error} ({result.duration:.2f}秒)")
+                        logger.error(f"変換に失敗しました: {result.excel_file}: {result.error}")
+        except KeyboardInterrupt:
+            print(f"\n監視を終了します（待機中 {len(queue)}件, 実行中 {len(in_flight)}件は破棄されます）")
+        recycled, timed_out, crashed = pool.recycled, pool.timed_out, pool.crashed
+
+    succeeded = sum(1 for result in results if result.ok)
+    print(f"成功: {succeeded}件, 失敗: {len(results) - succeeded}件")
+    print(f"ワーカーの入れ替え: {recycled}回, タイムアウト: {timed_out}件, 異常終了: {crashed}件")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="入力フォルダを監視し、置かれたExcelファイルを順次PDFに変換します")
+    parser.add_argument("directory", nargs="?", default="input", help="監視するディレクトリ（既定: input）")
+    parser.add_argument("--engine", choices=WATCH_ENGINES, default="aspose")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="ワーカープロセス数（既定: CPUコア数）")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help="対象とするファイル名のパターン（既定: *.xls*）")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="サイズ・更新日時がこの秒数変化しなければ書き込み完了とみなす")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, help="走査モードの走査間隔（秒）")
+    parser.add_argument("--polling", action="store_true", help="inotifyを使わずに走査で監視する（ネットワークドライブ向け）")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_JOB_TIMEOUT,
+                        help="1ファイルあたりのタイムアウト（秒、0で無効）")
+    parser.add_argument("--skip-existing", action="store_true", help="起動時にすでにあるファイルは変換しない")
+    parser.add_argument("--cache-dir", default=None, help="変換結果キャッシュのディレクトリ（省略時はキャッシュしない）")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="キャッシュの最大サイズ（MB）")
+    args = parser.parse_args()
+
+    watch_and_convert(args.directory, args.engine, args.workers, args.pattern, args.settle, args.poll_interval,
+                      not args.skip_existing, args.cache_dir, args.cache_max_mb * 1024 * 1024, not args.polling,
+                      job_timeout=args.timeout)
@@ -0,0 +1,260 @@
+import hashlib
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+# SpreadsheetML / DrawingML / リレーションシップの名前空間
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+DRAWING_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PACKAGE_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# フィンガープリントの計算方法を変えたら上げる（古い断片を使わないようにするため）
+FINGERPRINT_VERSION = "2"
+
+def is_ooxml_package(excel_file: str) -> bool:
+    """
+    Returns True for zip-based workbooks (.xlsx/.xlsm), which can be read without an engine.
+    """
+    return zipfile.is_zipfile(excel_file)
+
+def _iter_elements(archive: zipfile.ZipFile, part: str, tag: str):
+    """
+    パーツ内の指定タグの要素を、パーツ全体をメモリに載せずに順に返す
+    """
+    with archive.open(part) as f:
+        for _, element in ET.iterparse(f, events=("end",)):
+            if element.tag == tag:
+                yield element
+            element.clear()
+
+def referenced_font_names(excel_file: str) -> Optional[Set[str]]:
+    """
+    Returns the font family names referenced by a workbook's styles, theme and rich text.
+    .xls など zip 形式でないファイルは解析できないため None を返します。
+    """
+    if not is_ooxml_package(excel_file):
+        return None
+
+    names = set()
+    with zipfile.ZipFile(excel_file) as archive:
+        parts = set(archive.namelist())
+
+        # セルのスタイルで使われているフォント
+        if "xl/styles.xml" in parts:
+            for element in _iter_elements(archive, "xl/styles.xml", f"{{{MAIN_NS}}}name"):
+                if element.get("val"):
+                    names.add(element.get("val"))
+
+        # テーマのフォント（既定の本文・見出しフォントと日本語用フォント）
+        for part in parts:
+            if part.startswith("xl/theme/") and part.endswith(".xml"):
+                for tag in ("latin", "ea", "font"):
+                    for element in _iter_elements(archive, part, f"{{{DRAWING_NS}}}{tag}"):
+                        if element.get("typeface") and (tag != "font" or element.get("script") in ("Jpan", "Hans", "Hant", "Hang")):
+                            names.add(element.get("typeface"))
+
+        # リッチテキストの書式で指定されたフォント
+        if "xl/sharedStrings.xml" in parts:
+            for element in _iter_elements(archive, "xl/sharedStrings.xml", f"{{{MAIN_NS}}}rFont"):
+                if element.get("val"):
+                    names.add(element.get("val"))
+    return names
+
+@dataclass
+class SheetFingerprint:
+    """
+    Name, visibility and content fingerprint of one worksheet.
+    """
+    name: str
+    visible: bool
+    fingerprint: str
+
+def _relationships(archive: zipfile.ZipFile, part: str) -> Dict[str, str]:
+    """
+    パーツのリレーションシップID → 参照先パーツ名（外部リンクは除く）
+    """
+    rels_part = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+    if rels_part not in archive.namelist():
+        return {}
+    relationships = {}
+    for element in _iter_elements(archive, rels_part, f"{{{PACKAGE_REL_NS}}}Relationship"):
+        if element.get("TargetMode") == "External":
+            continue
+        target = element.get("Target", "")
+        if target.startswith("/"):
+            relationships[element.get("Id")] = target.lstrip("/")
+        else:
+            relationships[element.get("Id")] = posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+    return relationships
+
+def _shared_string_digests(archive: zipfile.ZipFile) -> List[bytes]:
+    """
+    共有文字列（書式付きのリッチテキストを含む）ごとのダイジェスト
+    """
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    digests = []
+    with archive.open("xl/sharedStrings.xml") as f:
+        for _, element in ET.iterparse(f, events=("end",)):
+            if element.tag == f"{{{MAIN_NS}}}si":
+                digests.append(hashlib.sha1(ET.tostring(element)).digest())
+                element.clear()
+    return digests
+
+def _style_digests(archive: zipfile.ZipFile):
+    """
+    セル書式（cellXfs）ごとに、参照しているフォント・塗りつぶし・罫線・表示形式まで含めたダイジェストと、
+    条件付き書式の書式（dxfs）など全シート共通の部分のダイジェストを返す
+    """
+    if "xl/styles.xml" not in archive.namelist():
+        return [], b""
+    with archive.open("xl/styles.xml") as f:
+        root = ET.parse(f).getroot()
+
+    def children(tag: str) -> List[bytes]:
+        element = root.find(f"{{{MAIN_NS}}}{tag}")
+        return [ET.tostring(child) for child in element] if element is not None else []
+
+    num_formats = {}
+    element = root.find(f"{{{MAIN_NS}}}numFmts")
+    for child in (element if element is not None else []):
+        num_formats[child.get("numFmtId")] = ET.tostring(child)
+    fonts, fills, borders, style_xfs = children("fonts"), children("fills"), children("borders"), children("cellStyleXfs")
+
+    def pick(items: List[bytes], index: Optional[str]) -> bytes:
+        try:
+            return items[int(index)]
+        except (TypeError, ValueError, IndexError):
+            return b""
+
+    digests = []
+    element = root.find(f"{{{MAIN_NS}}}cellXfs")
+    for xf in (element if element is not None else []):
+        digest = hashlib.sha1(ET.tostring(xf))
+        digest.update(pick(fonts, xf.get("fontId")))
+        digest.update(pick(fills, xf.get("fillId")))
+        digest.update(pick(borders, xf.get("borderId")))
+        digest.update(num_formats.get(xf.get("numFmtId"), b""))
+        digest.update(pick(style_xfs, xf.get("xfId")))
+        digests.append(digest.digest())
+    shared = hashlib.sha1(b"".join(children("dxfs")) + b"".join(children("cellStyles"))).digest()
+    return digests, shared
+
+def _update_with_part(digest, archive: zipfile.ZipFile, part: str, visited: Set[str]) -> None:
+    """
+    パーツの内容と、そこから参照されるパーツ（図形、グラフ、画像など）の内容をダイジェストに加える
+    """
+    if part in visited or part not in archive.namelist():
+        return
+    visited.add(part)
+    digest.update(part.encode("utf-8"))
+    with archive.open(part) as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    for target in sorted(_relationships(archive, part).values()):
+        _update_with_part(digest, archive, target, visited)
+
+def _update_with_attributes(digest, element: ET.Element, skip: Tuple[str, ...] = ()) -> None:
+    """
+    要素のタグと属性（skip の属性を除く）をダイジェストに加える
+    """
+    digest.update(element.tag.encode("utf-8"))
+    for name, value in sorted(element.attrib.items()):
+        if name not in skip:
+            digest.update(f"\0{name}={value}".encode("utf-8"))
+    digest.update(b"\1")
+
+def _update_with_sheet(digest, archive: zipfile.ZipFile, part: str, shared_strings: List[bytes],
+                       styles: List[bytes]) -> None:
+    """
+    シートのXMLを行単位で読み、共有文字列とセル書式の番号を除いた内容と、番号が指す実際の内容をダイジェストに加える
+    （他のシートの編集で共有文字列や書式の番号がずれても、このシートのフィンガープリントは変わらない）
+    """
+    def style(index: Optional[str]) -> bytes:
+        try:
+            return styles[int(index)] if index is not None else b""
+        except (ValueError, IndexError):
+            return b""
+
+    value_tag = f"{{{MAIN_NS}}}v"
+    depth = 0
+    with archive.open(part) as f:
+        for event, element in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if element.tag == f"{{{MAIN_NS}}}row":
+                _update_with_attributes(digest, element, ("s",))
+                digest.update(style(element.get("s")))
+                for cell in element:
+                    # セル番地・型などの属性、数式、共有文字列以外の値（インライン文字列を含む）
+                    _update_with_attributes(digest, cell, ("s",))
+                    digest.update(style(cell.get("s")))
+                    for child in cell:
+                        if child.tag == value_tag and cell.get("t") == "s":
+                            try:
+                                digest.update(shared_strings[int(child.text)])
+                            except (TypeError, ValueError, IndexError):
+                                pass
+                        else:
+                            digest.update(ET.tostring(child))
+                element.clear()
+            elif depth == 1 and element.tag == f"{{{MAIN_NS}}}cols":
+                for column in element:
+                    _update_with_attributes(digest, column, ("style",))
+                    digest.update(style(column.get("style")))
+                element.clear()
+            elif depth == 1 and element.tag != f"{{{MAIN_NS}}}sheetData":
+                # 印刷設定・改ページ・結合セル・条件付き書式など
+                digest.update(ET.tostring(element))
+                element.clear()
+
+def worksheet_parts(archive: zipfile.ZipFile, workbook: ET.Element) -> List[Tuple[str, bool, Optional[str]]]:
+    """
+    Returns (name, visible, part name) of every sheet in workbook order.
+    """
+    relationships = _relationships(archive, "xl/workbook.xml")
+    sheets = workbook.find(f"{{{MAIN_NS}}}sheets")
+    return [(sheet.get("name"), sheet.get("state", "visible") == "visible", relationships.get(sheet.get(f"{{{REL_NS}}}id")))
+            for sheet in (sheets if sheets is not None else [])]
+
+def sheet_fingerprints(excel_file: str) -> Optional[List[SheetFingerprint]]:
+    """
+    Returns a fingerprint of every worksheet's cell data, styles, page setup and drawings, in workbook order.
+    .xls など zip 形式でないファイルは解析できないため None を返します。
+    """
+    if not is_ooxml_package(excel_file):
+        return None
+
+    with zipfile.ZipFile(excel_file) as archive:
+        with archive.open("xl/workbook.xml") as f:
+            workbook = ET.parse(f).getroot()
+        relationships = _relationships(archive, "xl/workbook.xml")
+        shared_strings = _shared_string_digests(archive)
+        styles, shared_styles = _style_digests(archive)
+
+        # 全シートに影響する部分: 日付の基準（1900/1904）、名前定義（印刷範囲・印刷タイトル）、テーマ、共通の書式
+        common = hashlib.sha256(FINGERPRINT_VERSION.encode("ascii"))
+        for tag in ("workbookPr", "definedNames"):
+            element = workbook.find(f"{{{MAIN_NS}}}{tag}")
+            if element is not None:
+                common.update(ET.tostring(element))
+        common.update(shared_styles)
+        for part in sorted(relationships.values()):
+            if part.startswith("xl/theme/"):
+                _update_with_part(common, archive, part, set())
+
+        fingerprints = []
+        for name, visible, part in worksheet_parts(archive, workbook):
+            digest = common.copy()
+            digest.update(name.encode("utf-8"))
+            if part in archive.namelist():
+                _update_with_sheet(digest, archive, part, shared_strings, styles)
+                for target in sorted(_relationships(archive, part).values()):
+                    _update_with_part(digest, archive, target, {part})
+            fingerprints.append(SheetFingerprint(name, visible, digest.hexdigest()))
+    return fingerprints